@@ -5,13 +5,24 @@
 # file that should have been included as part of this package.
 
 from collections.abc import Callable, Iterator
-from typing import TYPE_CHECKING, Any, TypeGuard
+from typing import TYPE_CHECKING, Any, TypeGuard, overload
 
 from typing_extensions import Self
 
 if TYPE_CHECKING:
     from ...utils import ExprProxy
 
+class ObjCollector:
+    def __new__(cls) -> Self: ...
+    def StartWrite(self) -> None: ...  # noqa: N802
+    def EndWrite(self) -> None: ...  # noqa: N802
+    def WriteByte(self, number: int) -> None: ...  # noqa: N802
+    def WriteWord(self, number: int) -> None: ...  # noqa: N802
+    def WriteDword(self, obj) -> None: ...  # noqa: N802
+    def WritePack(self, structformat: str, arglist: list) -> None: ...  # noqa: N802
+    def WriteBytes(self, b: bytes) -> None: ...  # noqa: N802
+    def WriteSpace(self, spacesize: int) -> None: ...  # noqa: N802
+
 class ObjAllocator:
     def WriteByte(self, number: int) -> None: ...  # noqa: N802
     def WriteWord(self, number: int) -> None: ...  # noqa: N802
@@ -20,6 +31,9 @@ class ObjAllocator:
     def WriteBytes(self, b: bytes) -> None: ...  # noqa: N802
     def WriteSpace(self, ssize: int) -> None: ...  # noqa: N802
     def _write_trigger(self, conditions: int, actions: int) -> None: ...
+    def _record_trigger(
+        self, prevptr, nextptr, conditions: Iterator, actions: Iterator, flags
+    ) -> None: ...
 
 class PayloadBuffer:
     def WriteByte(self, number: int) -> None: ...  # noqa: N802
@@ -32,12 +46,38 @@ class PayloadBuffer:
         self, prevptr, nextptr, conditions: Iterator, actions: Iterator, flags
     ) -> None: ...
 
+def relocate_payload(
+    data: bytes, prttable: bytes, orttable: bytes, offset: int
+) -> bytes: ...
+
+class TrgFields:
+    @staticmethod
+    def condition(*fields: Any) -> TrgFields: ...
+    @staticmethod
+    def action(*fields: Any) -> TrgFields: ...
+    def __len__(self) -> int: ...
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[Any]: ...
+    def __setitem__(self, index: int, value: Any) -> None: ...
+    def __iter__(self) -> Iterator[Any]: ...
+    def exprs(self) -> list[Any]: ...
+
 class PayloadBuilder:
     def __new__(cls) -> Self: ...
-    def alloc_objects(self, found_objects: dict) -> None: ...
-    def construct_payload(
-        self, found_objects: dict
-    ) -> tuple[bytes, list[int], list[int]]: ...
+    def register_object(self, obj: Any) -> None: ...
+    def collect_objects(self, root: Any) -> list: ...
+    def alloc_objects(
+        self, found_objects: dict, record: bool = False, cache: str | None = None
+    ) -> None: ...
+    @property
+    def alloc_time(self) -> tuple[float, float]: ...
+    @property
+    def object_times(self) -> tuple[list[float], list[float], list[float]]: ...
+    @property
+    def object_usage(self) -> tuple[list[int], list[int]]: ...
+    def construct_payload(self, found_objects: dict) -> tuple[bytes, bytes, bytes]: ...
     def register_create_payload_callback(self, f: Callable[[], Any]) -> None: ...
     def register_after_collecting_callback(self, f: Callable[[], Any]) -> None: ...
     def call_callbacks_on_create_payload(self) -> None: ...
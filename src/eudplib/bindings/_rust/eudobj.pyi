@@ -16,3 +16,5 @@ class EUDObject(ConstExpr):
     def GetDataSize(self) -> int: ...  # noqa: N802
     def CollectDependency(self, pbuf: ObjCollector) -> None: ...  # noqa: N802
     def WritePayload(self, pbuf: ObjAllocator | PayloadBuffer) -> None: ...  # noqa: N802
+
+def get_object_counter() -> int: ...
@@ -6,6 +6,9 @@
 
 from __future__ import annotations
 
+class MPQFileError(OSError):
+    archived_name: str
+
 class MPQ:
     @staticmethod
     def open(path: str) -> MPQ: ...
@@ -13,15 +16,37 @@ class MPQ:
     def create(path: str, sector_size: int = 3, file_count: int = 1024) -> MPQ: ...
     def get_file_names_from_listfile(self) -> list[str]: ...
     def extract_file(self, file_path: str) -> bytes: ...
+    def extract_into(self, file_path: str, buffer: bytearray) -> int: ...
     def add_file(
         self, archived_name: str, file_path: str, replace_existing: bool = True
     ) -> None: ...
+    def add_file_from_bytes(
+        self,
+        archived_name: str,
+        data: bytes | bytearray,
+        replace_existing: bool = True,
+    ) -> None: ...
+    def add_files(
+        self,
+        files: list[tuple[str, str | bytes | bytearray]],
+        file_count: int = 0,
+        replace_existing: bool = True,
+    ) -> None: ...
+    def copy_file_from(
+        self, source: MPQ, archived_name: str, replace_existing: bool = True
+    ) -> None: ...
     @staticmethod
     def set_file_locale(file_locale: int) -> None: ...
     def get_max_file_count(self) -> int: ...
     def set_max_file_count(self, count: int) -> None: ...
+    @property
+    def stale_size(self) -> int: ...
     def compact(self) -> None: ...
+    def close(self) -> None: ...
     @staticmethod
     def clone_with_sector_size(
-        input_path: str, output_path: str, sector_size: int
+        input_path: str,
+        output_path: str,
+        sector_size: int,
+        exclude: list[str] = ...,
     ) -> MPQ: ...
@@ -5,13 +5,20 @@
 # file that should have been included as part of this package.
 
 from .allocator import (
+    CachePayload,
     CompressPayload,
     ConstExpr,
     CreatePayload,
+    DumpBuildProfile,
+    EliminateDeadVariables,
     Evaluate,
     Forward,
+    GetBuildProfile,
     GetObjectAddr,
     IsConstExpr,
+    OptimizeTriggers,
+    ProfileBuild,
+    RecordPayload,
     RegisterCreatePayloadCallback,
     RlocInt,
     RlocInt_C,
@@ -64,6 +71,7 @@ from .mapdata import (
     GetSwitchIndex,
     GetUnitIndex,
     IsMapdataInitialized,
+    ShareStringSuffix,
     UnitProperty,
 )
 from .rawtrigger import (
@@ -261,13 +269,20 @@ from .variable import (
 )
 
 __all__ = [
+    "CachePayload",
     "CompressPayload",
     "ConstExpr",
     "CreatePayload",
+    "DumpBuildProfile",
+    "EliminateDeadVariables",
+    "GetBuildProfile",
     "Evaluate",
     "Forward",
     "GetObjectAddr",
+    "OptimizeTriggers",
+    "ProfileBuild",
     "IsConstExpr",
+    "RecordPayload",
     "RegisterCreatePayloadCallback",
     "RlocInt",
     "RlocInt_C",
@@ -312,6 +327,7 @@ __all__ = [
     "GetSwitchIndex",
     "GetUnitIndex",
     "IsMapdataInitialized",
+    "ShareStringSuffix",
     "UnitProperty",
     "Accumulate",
     "Action",
@@ -6,9 +6,16 @@
 
 from .constexpr import ConstExpr, Evaluate, Forward, IsConstExpr
 from .payload import (
+    CachePayload,
     CompressPayload,
     CreatePayload,
+    DumpBuildProfile,
+    EliminateDeadVariables,
+    GetBuildProfile,
     GetObjectAddr,
+    OptimizeTriggers,
+    ProfileBuild,
+    RecordPayload,
     RegisterCreatePayloadCallback,
     ShufflePayload,
 )
@@ -19,9 +26,16 @@ __all__ = [
     "Evaluate",
     "Forward",
     "IsConstExpr",
+    "CachePayload",
     "CompressPayload",
     "CreatePayload",
+    "DumpBuildProfile",
+    "EliminateDeadVariables",
+    "GetBuildProfile",
     "GetObjectAddr",
+    "OptimizeTriggers",
+    "ProfileBuild",
+    "RecordPayload",
     "RegisterCreatePayloadCallback",
     "ShufflePayload",
     "RlocInt",
@@ -0,0 +1,161 @@
+# Copyright 2024 by Armoha.
+# All rights reserved.
+# This file is part of EUD python library (eudplib),
+# and is released under "MIT License Agreement". Please see the LICENSE
+# file that should have been included as part of this package.
+"""
+Dead variable elimination over collected objects.
+
+A variable is read when its vartrigger is jumped into, or when any field of
+it is used anywhere other than these two kinds of writes:
+
+- SetDeaths(EPD(v + offset), ...) writes into v directly.
+- SetDeaths(EPD(w.getDestAddr()), SetTo, EPD(v.getValueAddr())) makes w
+  write into v when w is read.
+
+Deaths and SetDeaths address EPD(player) + 12 * unit, so constant unit is
+folded into the offset; any other unit on a variable makes the pass give up.
+
+Variables never read share one slot of EUDVarBuffer, and direct writes to
+them are removed from triggers whose actions are not referenced elsewhere.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
+
+from . import payload as pl
+from .peephole import _RefCollector
+
+if TYPE_CHECKING:
+    from ..eudobj import EUDObject
+    from ..rawtrigger.action import Action
+    from ..rawtrigger.rawtriggerdef import RawTrigger
+    from ..variable.eudv import VariableTriggerForward
+
+_Refs = list[tuple["EUDObject", int | None]]
+
+
+def eliminate_dead_variables(
+    objects: Mapping[EUDObject, Any], root: Any
+) -> tuple[int, int]:
+    """Remove variables never read from EUDVarBuffer.
+
+    :returns: Numbers of variables and actions removed.
+    """
+    from ..rawtrigger.rawtriggerdef import RawTrigger
+    from ..variable.vbuf import get_current_varbuffer
+
+    evb = get_current_varbuffer()
+    if evb is None or evb not in objects:
+        return 0, 0
+    # EUDVArray and object pools are indexed at runtime, skip them
+    owners = {start: v for v, (start, count) in evb._vslots.items() if count == 1}
+
+    collector = _RefCollector()
+    read: set[VariableTriggerForward] = set()
+    writes: list[tuple[RawTrigger, Action, VariableTriggerForward]] = []
+    unknown = False
+
+    def refs(expr: Any) -> _Refs:
+        start = len(collector.refs)
+        collector.WriteDword(expr)
+        return collector.refs[start:]
+
+    def var_slot(found: _Refs) -> tuple[VariableTriggerForward, int] | None:
+        if len(found) != 1 or found[0][0] is not evb or found[0][1] is None:
+            return None
+        # vartrigger i starts at evb + 72 * i; its action (+328) overlaps
+        # header of vartrigger i + 4
+        q = found[0][1] + 4
+        local = q % 72
+        if local >= 40:
+            local += 288
+        v = owners.get((q - local) // 72)
+        return None if v is None else (v, local)
+
+    def fold_unit(found: _Refs, unit: Any) -> _Refs:
+        nonlocal unknown
+        if isinstance(unit, int):
+            return [
+                (obj, None if offset is None else offset + 48 * unit)
+                for obj, offset in found
+            ]
+        if any(obj is evb for obj, _ in found):
+            unknown = True
+        return found
+
+    def mark_read(found: _Refs) -> None:
+        nonlocal unknown
+        for obj, offset in found:
+            if obj is not evb:
+                continue
+            slot = var_slot([(obj, offset)])
+            if offset is None:
+                unknown = True
+            elif slot is not None:
+                read.add(slot[0])
+
+    pl.phase = pl.PHASE_ANALYZING
+    try:
+        mark_read(refs(root))
+        for obj in objects:
+            if not isinstance(obj, RawTrigger):
+                start = len(collector.refs)
+                obj.CollectDependency(collector)
+                mark_read(collector.refs[start:])
+                continue
+            mark_read(refs(obj._prevptr))
+            mark_read(refs(obj._nextptr))
+            for cond in obj._conditions:
+                fields = list(cond.fields)
+                for i, field in enumerate(fields):
+                    found = refs(field)
+                    if i == 1 and fields[5] == 15:  # Deaths
+                        found = fold_unit(found, fields[3])
+                    mark_read(found)
+            for act in obj._actions:
+                fields = list(act.fields)
+                if fields[7] != 45:  # SetDeaths
+                    for field in act.fields.exprs():
+                        mark_read(refs(field))
+                    continue
+                for field in fields[:4] + fields[6:]:
+                    mark_read(refs(field))
+                dest = fold_unit(refs(fields[4]), fields[6])
+                amount = refs(fields[5])
+                dest_slot, amount_slot = var_slot(dest), var_slot(amount)
+                if dest_slot is None or dest_slot[1] == 0:
+                    mark_read(dest)
+                else:
+                    writes.append((obj, act, dest_slot[0]))
+                if not (
+                    dest_slot is not None
+                    and dest_slot[1] == 344  # dest
+                    and amount_slot is not None
+                    and amount_slot[1] == 348  # value
+                ):
+                    mark_read(amount)
+    finally:
+        pl.phase = 0
+        pl._referenced_objects.clear()
+
+    if unknown:
+        return 0, 0
+    dead = set(owners.values()) - read
+    if not dead:
+        return 0, 0
+
+    touched = {obj for obj, offset in collector.refs if offset != 0}
+    removed_actions = 0
+    for trg, act, v in writes:
+        if v not in dead or type(trg) is not RawTrigger or trg in touched:
+            continue
+        trg._actions.remove(act)
+        for i, remaining in enumerate(trg._actions):
+            remaining.actindex = i
+        removed_actions += 1
+
+    evb.remove_vartriggers(dead)
+    return len(dead), removed_actions
@@ -6,14 +6,15 @@
 
 from __future__ import annotations
 
+import json
 import random
 import time
-from typing import TYPE_CHECKING, TypeAlias
+from typing import TYPE_CHECKING, Any, TypeAlias
 
 from ...bindings._rust import allocator
 from ...localize import _
 from ...utils import EPError, ep_assert
-from .constexpr import Evaluable, Evaluate, Forward
+from .constexpr import Forward
 from .pbuffer import Payload
 from .rlocint import RlocInt, RlocInt_C
 
@@ -21,17 +22,24 @@ if TYPE_CHECKING:
     from ..eudobj import EUDObject
 
 _found_objects_dict: dict[EUDObject, int] = {}
-_untraversed_objects: list[EUDObject] = []
-_dynamic_objects_set: set[EUDObject] = set()
 _payload_builder = allocator.PayloadBuilder()
 
 PHASE_COLLECTING = 1
 PHASE_ALLOCATING = 2
 PHASE_WRITING = 3
+PHASE_ANALYZING = 4
 phase: int = 0
+_referenced_objects: list[EUDObject] = []
 
 _payload_compress: bool = False
 _payload_shuffle: bool = True
+_payload_record: bool = False
+_payload_cache: str | None = None
+_payload_optimize: bool = False
+_payload_eliminate: bool = False
+_profile_build: bool = False
+_build_profile: dict[str, Any] | None = None
+_collect_times: dict[EUDObject, float] = {}
 
 # -------
 
@@ -77,96 +85,276 @@ def ShufflePayload(mode: bool) -> None:  # noqa: N802
     _payload_shuffle = True if mode else False
 
 
-class ObjCollector:
+def RecordPayload(mode: bool) -> None:  # noqa: N802
+    """Set payload recording mode.
+
+    :param mode: If true, objects are recorded while allocating and written
+    without calling WritePayload again. If false, disable it.
+
+    .. note::
+        Objects which evaluate their own address inside WritePayload are
+        written the usual way even if recording mode is enabled.
+
+        Bytes of recorded objects are copied into payload by worker threads.
+        Expressions left unresolved while allocating are still evaluated on
+        the main thread, as are objects written the usual way.
     """
-    Object having PayloadBuffer-like interfaces. Collects all objects by
-    calling object.CollectDependency() for every related objects.
+    global _payload_record
+    ep_assert(mode in (True, False), _("Invalid type") + f": {mode}")
+    _payload_record = True if mode else False
+
+
+def CachePayload(path: str | None) -> None:  # noqa: N802
+    """Set payload placement cache.
+
+    :param path: File to keep object addresses between builds. Objects
+    unchanged since the previous build keep their address and only the
+    others are stacked again. If None, disable it.
+
+    .. note::
+        Objects are identified by their occupation map and output, so output
+        is recorded while allocating even if RecordPayload(False) is set.
+        Objects which evaluate their own address are not cached. This is
+        not an incremental build cache: every object is still collected,
+        written and stacked, and no payload bytes are reused. The cache only
+        keeps addresses stable and skips searching for those of unchanged
+        objects. The first object, where payload starts running, always
+        stays at offset 0.
     """
+    global _payload_cache
+    ep_assert(path is None or isinstance(path, str), _("Invalid type") + f": {path}")
+    _payload_cache = path
 
-    def __init__(self) -> None:
-        pass
 
-    def StartWrite(self) -> None:  # noqa: N802
-        pass
+def OptimizeTriggers(mode: bool) -> None:  # noqa: N802
+    """Set trigger optimization mode.
 
-    def EndWrite(self) -> None:  # noqa: N802
-        pass
+    :param mode: If true, CreatePayload threads jumps through empty triggers,
+    merges unconditional triggers into their only predecessor and drops
+    triggers made unreachable. If false, disable it.
 
-    def WriteByte(self, number: int) -> None:  # noqa: N802
-        pass
+    .. note::
+        Triggers whose fields are referenced by other objects (e.g. modified
+        with SetNextPtr) are left as they are.
+
+    .. warning::
+        Trigger addresses computed at runtime are assumed to be only jumped
+        into. Writing to a trigger through such an address, e.g.
+        ``f_dwwrite(trg_ptr + 20, x)`` with ``trg_ptr`` an EUDVariable holding
+        trigger address, may modify other code once triggers are merged.
+        Keep this off for such code.
+    """
+    global _payload_optimize
+    ep_assert(mode in (True, False), _("Invalid type") + f": {mode}")
+    _payload_optimize = True if mode else False
 
-    def WriteWord(self, number: int) -> None:  # noqa: N802
-        pass
 
-    def WriteDword(self, obj: Evaluable) -> None:  # noqa: N802
-        if not isinstance(obj, int):
-            Evaluate(obj)
+def EliminateDeadVariables(mode: bool) -> None:  # noqa: N802
+    """Set dead variable elimination mode.
 
-    def WritePack(self, structformat: str, arglist: list[Evaluable]) -> None:  # noqa: N802
-        for arg in arglist:
-            if not isinstance(arg, int):
-                Evaluate(arg)
+    :param mode: If true, CreatePayload finds EUDVariables whose value is
+    never read, lets them share one variable slot and removes writes to
+    them where possible. If false, disable it.
 
-    def WriteBytes(self, b: bytes) -> None:  # noqa: N802
-        pass
+    .. note::
+        Variables are taken as read when their address is used anywhere
+        other than as a destination of SetDeaths or SetVariables.
+    """
+    global _payload_eliminate
+    ep_assert(mode in (True, False), _("Invalid type") + f": {mode}")
+    _payload_eliminate = True if mode else False
 
-    def WriteSpace(self, spacesize: int) -> None:  # noqa: N802
-        pass
+
+def ProfileBuild(mode: bool) -> None:  # noqa: N802
+    """Set build profiling mode.
+
+    :param mode: If true, CreatePayload records time spent on each stage,
+    on each type of object and on compiling each EUDFunc. See GetBuildProfile.
+    If false, disable it.
+    """
+    global _profile_build, _build_profile
+    ep_assert(mode in (True, False), _("Invalid type") + f": {mode}")
+    _profile_build = True if mode else False
+    if not _profile_build:
+        _build_profile = None
+
+
+def GetBuildProfile() -> dict[str, Any]:  # noqa: N802
+    """Get profile of the last CreatePayload, recorded with ProfileBuild(True).
+
+    Profile has wall time of each stage in "stages", count, bytes and time
+    per EUDObject subclass in "objects", and trigger count and compile time
+    (excluding nested functions) per EUDFunc in "functions". Functions also
+    have payload bytes after stacking, variable slots and relocation entries
+    of their own, which are summed up per module in "modules". For calls
+    expanded by @EUDFunc(inline="auto"), functions have number of calls,
+    triggers emitted by them, triggers of body copies among them, and
+    return triggers skipped at runtime when each expanded call runs once.
+    """
+    if _build_profile is None:
+        raise EPError(_("Build profile is not recorded. Use ProfileBuild(True)"))
+    return _build_profile
+
+
+def DumpBuildProfile(path: str) -> None:  # noqa: N802
+    """Write profile of the last CreatePayload to path as JSON."""
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(GetBuildProfile(), file, indent=2)
+
+
+def _var_slots_by_owner() -> dict[object, int]:
+    """Variable slots of last payload, per EUDFuncN creating variables"""
+    from ..variable.vbuf import get_current_custom_varbuffer, get_current_varbuffer
+
+    slots: dict[object, int] = {}
+    evb = get_current_varbuffer()
+    if evb is not None:
+        for v, (_start, count) in evb._vslots.items():
+            owner = getattr(v, "_owner", None)
+            if owner is not None:
+                slots[owner] = slots.get(owner, 0) + count
+    ecvb = get_current_custom_varbuffer()
+    if ecvb is not None:
+        for v in ecvb._vdict:
+            owner = getattr(v, "_owner", None)
+            if owner is not None:
+                slots[owner] = slots.get(owner, 0) + 1
+    return slots
+
+
+def _record_build_profile(stage_times: dict[str, float]) -> None:
+    from ..eudfunc.eudfuncn import _compiled_funcs
+
+    global _build_profile
+
+    _, alloc_times, write_times = _payload_builder.object_times
+    occupied_bytes, relocs = _payload_builder.object_usage
+    total_relocs = max(sum(relocs), 1)
+    objects: dict[str, dict[str, Any]] = {}
+    # (payload bytes, relocation entries) of triggers of each EUDFuncN
+    func_usage: dict[object, list[int]] = {}
+    for obj, i in _found_objects_dict.items():
+        owner = getattr(obj, "_owner", None)
+        if owner is not None:
+            usage = func_usage.setdefault(owner, [0, 0])
+            usage[0] += occupied_bytes[i]
+            usage[1] += relocs[i]
+        name = type(obj).__name__
+        if name not in objects:
+            objects[name] = dict.fromkeys(
+                ("count", "bytes", "collect", "allocate", "write"), 0
+            )
+        stat = objects[name]
+        stat["count"] += 1
+        stat["bytes"] += obj.GetDataSize()
+        stat["collect"] += _collect_times.get(obj, 0.0)
+        stat["allocate"] += alloc_times[i]
+        stat["write"] += write_times[i]
+
+    var_slots = _var_slots_by_owner()
+    functions = []
+    modules: dict[str, dict[str, Any]] = {}
+    for func in _compiled_funcs:
+        payload_bytes, reloc_count = func_usage.get(func, (0, 0))
+        usage = {
+            "triggers": func._triggerCount,
+            "bytes": payload_bytes,
+            "var_slots": var_slots.get(func, 0),
+            "relocs": reloc_count,
+        }
+        functions.append(
+            {
+                "name": f"{func.__module__}.{func.__qualname__}",
+                **usage,
+                "reloc_share": reloc_count / total_relocs,
+                "time": func._compileTime,
+                "inlined_calls": func._inlineCalls,
+                "inlined_triggers": func._inlineTriggers,
+                "inlined_body_triggers": func._inlineBodyTriggers,
+                "inline_saved_triggers": (
+                    func._inlineCalls * func._returnTriggers
+                ),
+            }
+        )
+        module = modules.setdefault(func.__module__, dict.fromkeys(usage, 0))
+        for key, value in usage.items():
+            module[key] += value
+    for module in modules.values():
+        module["reloc_share"] = module["relocs"] / total_relocs
+    functions.sort(key=lambda f: f["time"], reverse=True)
+
+    search_time, apply_time = _payload_builder.alloc_time
+    _build_profile = {
+        "stages": stage_times,
+        "allocation": {"search": search_time, "apply": apply_time},
+        "objects": dict(
+            sorted(objects.items(), key=lambda kv: kv[1]["bytes"], reverse=True)
+        ),
+        "functions": functions,
+        "modules": dict(
+            sorted(modules.items(), key=lambda kv: kv[1]["bytes"], reverse=True)
+        ),
+    }
+
+
+def _reset_build_stats() -> None:
+    """Reset EUDFunc statistics of finished build. Profile is kept."""
+    from ..eudfunc.eudfuncn import _reset_compile_stats
+
+    _reset_compile_stats()
+
+
+def _write_usage_report(path: str) -> None:
+    """Write payload usage of each EUDFunc and module in last build profile."""
+    profile = GetBuildProfile()
+    header = (
+        f"{'triggers':>9} {'bytes':>10} {'vars':>6} {'relocs':>8} {'share':>7}  name"
+    )
+    with open(path, "w", encoding="utf-8") as file:
+        for title, rows in (
+            ("Modules", list(profile["modules"].items())),
+            ("Functions", [(f["name"], f) for f in profile["functions"]]),
+        ):
+            rows.sort(key=lambda row: row[1]["bytes"], reverse=True)
+            file.write(f"[{title}]\n{header}\n")
+            for name, usage in rows:
+                file.write(
+                    f"{usage['triggers']:>9} {usage['bytes']:>10}"
+                    f" {usage['var_slots']:>6} {usage['relocs']:>8}"
+                    f" {usage['reloc_share']:>7.2%}  {name}\n"
+                )
+            file.write("\n")
+
+
+ObjCollector = allocator.ObjCollector
 
 
 def _collect_objects(root: EUDObject | Forward) -> None:
     global phase
     global _found_objects_dict
-    global _dynamic_objects_set
-    global _untraversed_objects
 
     lprint(_("[Stage 1/3] CollectObjects"), flush=True)
 
     phase = PHASE_COLLECTING
 
-    objc = ObjCollector()
-    _found_objects_dict = {}
-    _dynamic_objects_set = set()
-    _untraversed_objects = []
-
-    # Evaluate root to register root object.
-    # root may not have WritePayload() method e.g: Forward()
-    Evaluate(root)
-
-    while _untraversed_objects:
-        while _untraversed_objects:
-            lprint(
-                _(" - Collected {} / {} objects").format(
-                    len(_found_objects_dict),
-                    len(_found_objects_dict) + len(_untraversed_objects),
-                )
-            )
-
-            obj = _untraversed_objects.pop()
-
-            objc.StartWrite()
-            obj.CollectDependency(objc)
-            objc.EndWrite()
-
-        # Check for new objects
-        for obj in _dynamic_objects_set:
-            objc.StartWrite()
-            obj.CollectDependency(objc)
-            objc.EndWrite()
+    found_objects = _payload_builder.collect_objects(root)
 
-    if len(_found_objects_dict) == 0:
+    if len(found_objects) == 0:
         raise EPError(_("No object collected"))
 
+    _collect_times.clear()
+    if _profile_build:
+        _collect_times.update(zip(found_objects, _payload_builder.object_times[0]))
+
     if _payload_shuffle:
         # Shuffle objects -> Randomize(?) addresses
-        iterobj = iter(_found_objects_dict)
-        rootobj = next(iterobj)
-        found_objects = list(iterobj)
+        rootobj = found_objects[0]
+        found_objects = found_objects[1:]
         random.shuffle(found_objects)
         found_objects.append(rootobj)
-        _found_objects_dict = {
-            obj: i for i, obj in enumerate(reversed(found_objects))
-        }
+        found_objects.reverse()
+
+    _found_objects_dict = {obj: i for i, obj in enumerate(found_objects)}
 
     # cleanup
     phase = 0
@@ -182,6 +370,54 @@ def _collect_objects(root: EUDObject | Forward) -> None:
         lprint(_("ShufflePayload has been turned off."), flush=True)
 
 
+def _eliminate_dead_variables(root: EUDObject | Forward) -> None:
+    from .liveness import eliminate_dead_variables
+
+    variables, actions = eliminate_dead_variables(_found_objects_dict, root)
+    if variables:
+        # Drop objects only referenced by dead variables
+        _collect_objects(root)
+    lprint(
+        _(" - Removed {} dead variables and {} writes to them").format(
+            variables, actions
+        ),
+        flush=True,
+    )
+
+
+def _report_inlined_calls() -> None:
+    from ..eudfunc.eudfuncn import _inline_summary
+
+    calls, copied, skipped = _inline_summary()
+    if calls:
+        lprint(
+            _(
+                " - Inlined {} EUDFunc calls: +{} triggers in payload,"
+                " -{} triggers executed"
+            ).format(calls, copied, skipped),
+            flush=True,
+        )
+
+
+def _optimize_triggers(root: EUDObject | Forward) -> None:
+    from ..rawtrigger.rawtriggerdef import RawTrigger
+    from .peephole import optimize_triggers
+
+    def count_triggers() -> int:
+        return sum(type(obj) is RawTrigger for obj in _found_objects_dict)
+
+    trigger_count = count_triggers()
+    if optimize_triggers(list(_found_objects_dict), root):
+        # Drop triggers made unreachable
+        _collect_objects(root)
+    lprint(
+        _(" - Peephole optimizer removed {} / {} triggers").format(
+            trigger_count - count_triggers(), trigger_count
+        ),
+        flush=True,
+    )
+
+
 # -------
 
 
@@ -195,7 +431,9 @@ def _allocate_objects() -> None:
     if not _payload_compress:
         raise EPError("CompressPayload(False) is currently not supported")
 
-    _payload_builder.alloc_objects(_found_objects_dict)
+    _payload_builder.alloc_objects(
+        _found_objects_dict, _payload_record, _payload_cache
+    )
 
     phase = 0
 
@@ -223,14 +461,37 @@ _register_after_collecting_callback = (
 def CreatePayload(root: EUDObject | Forward) -> Payload:  # noqa: N802
     from ..rawtrigger.rawtriggerdef import RawTrigger
 
+    global _build_profile
+
     # Call callbacks
     _payload_builder.call_callbacks_on_create_payload()
+    start = time.perf_counter()
     _collect_objects(root)
+    _report_inlined_calls()
     _payload_builder.call_callbacks_after_collecting()
-    setattr(RawTrigger, "WritePayload", RawTrigger._allocate_trigger)
+    if _payload_eliminate:
+        _eliminate_dead_variables(root)
+    if _payload_optimize:
+        _optimize_triggers(root)
+    collected = time.perf_counter()
+    if _payload_record or _payload_cache is not None:
+        setattr(RawTrigger, "WritePayload", RawTrigger._record_trigger)
+    else:
+        setattr(RawTrigger, "WritePayload", RawTrigger._allocate_trigger)
     _allocate_objects()
     setattr(RawTrigger, "WritePayload", RawTrigger._write_trigger)
-    return _construct_payload()
+    allocated = time.perf_counter()
+    payload = _construct_payload()
+    if _profile_build:
+        stage_times = {
+            "collect": collected - start,
+            "allocate": allocated - collected,
+            "write": time.perf_counter() - allocated,
+        }
+        _record_build_profile(stage_times)
+    else:
+        _build_profile = None
+    return payload
 
 
 _PayloadBuffer: TypeAlias = allocator.ObjAllocator | allocator.PayloadBuffer
@@ -240,21 +501,18 @@ defri: RlocInt_C = RlocInt(0, 4)
 def GetObjectAddr(obj: EUDObject) -> RlocInt_C:  # noqa: N802
     global _payload_builder
     global _found_objects_dict
-    global _untraversed_objects
-    global _dynamic_objects_set
 
     if phase == PHASE_COLLECTING:
-        if obj not in _found_objects_dict:
-            _untraversed_objects.append(obj)
-            _found_objects_dict[obj] = len(_found_objects_dict)
-            if obj.DynamicConstructed():
-                _dynamic_objects_set.add(obj)
-
+        _payload_builder.register_object(obj)
         return defri
 
     elif phase == PHASE_ALLOCATING:
         return defri
 
+    elif phase == PHASE_ANALYZING:
+        _referenced_objects.append(obj)
+        return defri
+
     elif phase == PHASE_WRITING:
         # ep_assert(_payload_builder.offset(_found_objects_dict[obj]) & 3 == 0)
         return _payload_builder.get_object_addr(_found_objects_dict[obj])
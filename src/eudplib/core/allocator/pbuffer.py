@@ -4,11 +4,33 @@
 # and is released under "MIT License Agreement". Please see the LICENSE
 # file that should have been included as part of this package.
 
+from array import array
+from collections.abc import Iterable
+
+from ...bindings._rust import allocator as alc
+
+
+def _offset_table(table: bytes | Iterable[int]) -> array:
+    if isinstance(table, bytes):
+        offsets = array("I")
+        offsets.frombytes(table)
+        return offsets
+    return array("I", table)
+
 
 class Payload:
     def __init__(
-        self, data: bytes, prttable: list[int], orttable: list[int]
+        self,
+        data: bytes,
+        prttable: bytes | Iterable[int],
+        orttable: bytes | Iterable[int],
     ) -> None:
         self.data = data
-        self.prttable = prttable
-        self.orttable = orttable
+        self.prttable = _offset_table(prttable)
+        self.orttable = _offset_table(orttable)
+
+    def relocate(self, offset: int) -> bytes:
+        """Payload data placed at offset, with both tables applied at once."""
+        return alc.relocate_payload(
+            self.data, self.prttable.tobytes(), self.orttable.tobytes(), offset
+        )
@@ -0,0 +1,192 @@
+# Copyright 2024 by Armoha.
+# All rights reserved.
+# This file is part of EUD python library (eudplib),
+# and is released under "MIT License Agreement". Please see the LICENSE
+# file that should have been included as part of this package.
+"""
+Peephole optimizer over collected RawTrigger chains.
+
+Only nextptr which is a trigger (or Forward to a trigger) is taken as a
+static jump. Every other reference to a trigger is classified by the offset
+it points to: offset 0 jumps into the trigger, any other offset reads or
+modifies it. Runtime pointer arithmetic on a trigger address is assumed to
+jump into it only.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+from . import payload as pl
+from .constexpr import Evaluate, Forward
+
+if TYPE_CHECKING:
+    from ..eudobj import EUDObject
+    from ..rawtrigger.rawtriggerdef import RawTrigger
+    from .rlocint import RlocInt_C
+
+_EPD_BASE = 0x58A364
+
+
+def _byte_offset(value: RlocInt_C) -> int | None:
+    if value.rlocmode == 4:
+        return value.offset
+    if value.rlocmode == 1:  # EPD
+        return value.offset * 4 + _EPD_BASE
+    return None
+
+
+class _RefCollector:
+    """ObjCollector recording objects referenced and offsets into them."""
+
+    def __init__(self) -> None:
+        self.refs: list[tuple[EUDObject, int | None]] = []
+
+    def _record(self, expr: Any) -> None:
+        if isinstance(expr, int):
+            return
+        found = pl._referenced_objects
+        start = len(found)
+        value = Evaluate(expr)
+        objs = found[start:]
+        del found[start:]
+        offset = _byte_offset(value) if len(objs) == 1 else None
+        self.refs.extend((obj, offset) for obj in objs)
+
+    def StartWrite(self) -> None:  # noqa: N802
+        pass
+
+    def EndWrite(self) -> None:  # noqa: N802
+        pass
+
+    def WriteByte(self, number: int) -> None:  # noqa: N802
+        pass
+
+    def WriteWord(self, number: int) -> None:  # noqa: N802
+        pass
+
+    def WriteDword(self, obj: Any) -> None:  # noqa: N802
+        self._record(obj)
+
+    def WritePack(self, structformat: str, arglist: list[Any]) -> None:  # noqa: N802
+        for arg in arglist:
+            self._record(arg)
+
+    def WriteBytes(self, b: bytes) -> None:  # noqa: N802
+        pass
+
+    def WriteSpace(self, spacesize: int) -> None:  # noqa: N802
+        pass
+
+
+def _jump_target(nextptr: Any) -> RawTrigger | None:
+    from ..rawtrigger.rawtriggerdef import RawTrigger
+
+    while isinstance(nextptr, Forward):
+        nextptr = nextptr.expr
+    # Subclasses may have their own layout
+    if type(nextptr) is RawTrigger:
+        return nextptr
+    return None
+
+
+def optimize_triggers(objects: Sequence[EUDObject], root: Any) -> int:
+    """Thread jumps through empty triggers and merge adjacent triggers.
+
+    Triggers are rewritten in place; bypassed and merged triggers become
+    unreachable and are dropped when objects are collected again.
+
+    :returns: Number of jumps threaded and triggers merged.
+    """
+    from ..rawtrigger.rawtriggerdef import RawTrigger
+
+    jumps: dict[RawTrigger, RawTrigger] = {}
+    collector = _RefCollector()
+    pl.phase = pl.PHASE_ANALYZING
+    try:
+        collector._record(root)
+        for obj in objects:
+            if type(obj) is not RawTrigger:
+                obj.CollectDependency(collector)
+                continue
+            target = _jump_target(obj._nextptr)
+            if target is None:
+                collector.WriteDword(obj._nextptr)
+            else:
+                jumps[obj] = target
+            collector.WriteDword(obj._prevptr)
+            for cond in obj._conditions:
+                cond.CollectDependency(collector)
+            for act in obj._actions:
+                act.CollectDependency(collector)
+    finally:
+        pl.phase = 0
+        pl._referenced_objects.clear()
+
+    entered: set[EUDObject] = set()
+    touched: set[EUDObject] = set()
+    for obj, offset in collector.refs:
+        (entered if offset == 0 else touched).add(obj)
+    predecessors = Counter(jumps.values())
+    rewrites = 0
+
+    # Jump threading: X -> (empty) -> Y  =>  X -> Y
+    def is_empty(trg: RawTrigger) -> bool:
+        return not (trg._conditions or trg._actions or trg in touched)
+
+    for trg, target in list(jumps.items()):
+        final, seen = target, {trg}
+        while final in jumps and is_empty(final) and final not in seen:
+            seen.add(final)
+            final = jumps[final]
+        if final is target or final in seen:  # no empty trigger or cycle
+            continue
+        trg._nextptr = final
+        jumps[trg] = final
+        predecessors[target] -= 1
+        predecessors[final] += 1
+        rewrites += 1
+
+    # Bypassed triggers no longer count as predecessors
+    def is_dead(trg: RawTrigger) -> bool:
+        return not (predecessors[trg] or trg in entered or trg in touched)
+
+    dead = [trg for trg in jumps if is_dead(trg)]
+    while dead:
+        target = jumps.pop(dead.pop(), None)
+        if target is not None:
+            predecessors[target] -= 1
+            if is_dead(target):
+                dead.append(target)
+
+    # Merge B into A when A jumps to B and nothing else reaches B
+    def can_merge(trg: RawTrigger, nxt: RawTrigger | None) -> bool:
+        return (
+            nxt is not None
+            and nxt is not trg
+            and trg._flags == nxt._flags == 4  # preserved, enabled
+            and not (trg._conditions or nxt._conditions)
+            and len(trg._actions) + len(nxt._actions) <= 64
+            and trg not in touched
+            and predecessors[nxt] == 1
+            and nxt not in entered
+            and nxt not in touched
+        )
+
+    for trg in list(jumps):
+        while can_merge(trg, nxt := jumps.get(trg)):
+            assert nxt is not None
+            for act in nxt._actions:
+                act.parenttrg = trg
+                act.actindex = len(trg._actions)
+                trg._actions.append(act)
+            nxt._actions = []
+            trg._nextptr = nxt._nextptr
+            del jumps[trg]
+            if nxt in jumps:
+                jumps[trg] = jumps.pop(nxt)
+            rewrites += 1
+
+    return rewrites
@@ -0,0 +1,265 @@
+# Copyright 2024 by Armoha.
+# All rights reserved.
+# This file is part of EUD python library (eudplib),
+# and is released under "MIT License Agreement". Please see the LICENSE
+# file that should have been included as part of this package.
+"""
+Headless trigger emulator. Runs payload triggers without StarCraft.
+
+Only memory-level conditions and actions which eudplib generates are
+emulated: Deaths/Memory(X), Switch, Accumulate, Always, Never and
+SetDeaths/SetMemory(X), SetSwitch, SetResources, PreserveTrigger.
+Visual-only actions are counted and ignored. Player groups (AllPlayers,
+Foes, Force1..) are not expanded; only CurrentPlayer is resolved, and
+other player fields are taken as EPD offsets.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+
+from ..localize import _
+from ..utils import EPError
+from .allocator.pbuffer import Payload
+from .rawtrigger.action import _acttypes
+from .rawtrigger.condition import _condtypes
+
+_STR_ADDRESS = 0x191943C8
+_DEATHS_ADDRESS = 0x58A364
+_CURPL_ADDRESS = 0x6509B0
+_SWITCH_ADDRESS = 0x58DC40
+_ORE_ADDRESS = 0x57F0F0
+_GAS_ADDRESS = 0x57F120
+_CURRENT_PLAYER = 13
+_EUDX = 0x4353  # "SC"
+
+# Actions without effect on memory
+_IGNORED_ACTIONS = frozenset((8, 9, 10, 12, 28, 29, 30, 31, 47))
+
+
+@dataclass
+class EmulatorStats:
+    """Numbers of triggers, conditions and actions evaluated."""
+
+    triggers: int = 0
+    conditions: int = 0
+    actions: int = 0
+
+
+class TriggerEmulator:
+    """Simulated 32-bit memory with payload placed at base address.
+
+    Addresses outside payload start as zero and are created on write.
+    """
+
+    def __init__(self, payload: Payload, base: int | None = None) -> None:
+        if base is None:
+            base = _STR_ADDRESS
+        if base & 3:
+            raise EPError(_("Payload base should be aligned by 4: {}").format(base))
+        data = payload.relocate(base)
+        self.base = base
+        self._payload = array("I")
+        self._payload.frombytes(data + bytes(-len(data) & 3))
+        self._memory: dict[int, int] = {}
+        self.stats = EmulatorStats()
+
+    def read_dword(self, address: int) -> int:
+        address &= 0xFFFFFFFF
+        if address & 3:
+            shift = (address & 3) * 8
+            low = self.read_dword(address & ~3) >> shift
+            high = self.read_dword((address & ~3) + 4) << (32 - shift)
+            return (low | high) & 0xFFFFFFFF
+        index = (address - self.base) >> 2
+        if 0 <= index < len(self._payload):
+            return self._payload[index]
+        return self._memory.get(address, 0)
+
+    def write_dword(self, address: int, value: int) -> None:
+        address &= 0xFFFFFFFF
+        value &= 0xFFFFFFFF
+        if address & 3:
+            shift = (address & 3) * 8
+            aligned = address & ~3
+            mask = (0xFFFFFFFF << shift) & 0xFFFFFFFF
+            low = self.read_dword(aligned) & ~mask | (value << shift) & mask
+            high = self.read_dword(aligned + 4) & mask | value >> (32 - shift)
+            self.write_dword(aligned, low)
+            self.write_dword(aligned + 4, high & 0xFFFFFFFF)
+            return
+        index = (address - self.base) >> 2
+        if 0 <= index < len(self._payload):
+            self._payload[index] = value
+        else:
+            self._memory[address] = value
+
+    def run(
+        self,
+        entry: int | None = None,
+        *,
+        player: int = 0,
+        end: int = 0,
+        max_triggers: int = 10_000_000,
+    ) -> EmulatorStats:
+        """Run trigger list from entry until nextptr is end. (one frame)
+
+        Defaults to payload root, which CreatePayload places at offset 0.
+        Returns counts of this run; self.stats accumulates all runs.
+        """
+        if entry is None:
+            entry = self.base
+        frame = EmulatorStats()
+        self.write_dword(_CURPL_ADDRESS, player)
+        node = entry & 0xFFFFFFFF
+        while node != end:
+            if frame.triggers >= max_triggers:
+                raise EPError(
+                    _("Trigger limit {} exceeded; infinite loop?").format(
+                        max_triggers
+                    )
+                )
+            frame.triggers += 1
+            self._run_trigger(node, frame)
+            node = self.read_dword(node + 4)
+
+        self.stats.triggers += frame.triggers
+        self.stats.conditions += frame.conditions
+        self.stats.actions += frame.actions
+        return frame
+
+    # -------
+
+    def _player(self, player: int) -> int:
+        if player == _CURRENT_PLAYER:
+            return self.read_dword(_CURPL_ADDRESS)
+        return player
+
+    def _deaths_address(self, player: int, unit: int) -> int:
+        return _DEATHS_ADDRESS + 4 * (self._player(player) + 12 * unit)
+
+    def _run_trigger(self, node: int, frame: EmulatorStats) -> None:
+        flag_address = node + 8 + 320 + 2048
+        flags = self.read_dword(flag_address)
+        if flags & 8:  # disabled
+            return
+
+        for i in range(16):
+            cond = node + 8 + 20 * i
+            word3 = self.read_dword(cond + 12)
+            condtype = word3 >> 24
+            if condtype == 0:
+                break
+            word4 = self.read_dword(cond + 16)
+            if (word4 >> 8) & 2:  # disabled condition
+                continue
+            frame.conditions += 1
+            if not self._check_condition(cond, word3, word4):
+                return
+
+        preserve = False
+        for i in range(64):
+            act = node + 8 + 320 + 32 * i
+            word6 = self.read_dword(act + 24)
+            acttype = (word6 >> 16) & 0xFF
+            if acttype == 0:
+                break
+            word7 = self.read_dword(act + 28)
+            if word7 & 2:  # disabled action
+                continue
+            frame.actions += 1
+            if acttype == 3:  # PreserveTrigger
+                preserve = True
+            else:
+                self._run_action(act, acttype, word6, word7)
+
+        if not (preserve or self.read_dword(flag_address) & 4):
+            self.write_dword(flag_address, self.read_dword(flag_address) | 8)
+
+    def _check_condition(self, cond: int, word3: int, word4: int) -> bool:
+        condtype = word3 >> 24
+        comparison = (word3 >> 16) & 0xFF
+        amount = self.read_dword(cond + 8)
+        if condtype == 15:  # Deaths
+            player = self.read_dword(cond + 4)
+            value = self.read_dword(self._deaths_address(player, word3 & 0xFFFF))
+            if word4 >> 16 == _EUDX:
+                value &= self.read_dword(cond)
+        elif condtype == 4:  # Accumulate
+            player = self._player(self.read_dword(cond + 4))
+            restype = word4 & 0xFF
+            ore = self.read_dword(_ORE_ADDRESS + 4 * player)
+            gas = self.read_dword(_GAS_ADDRESS + 4 * player)
+            value = (ore, gas, ore + gas)[restype] if restype < 3 else 0
+        elif condtype == 11:  # Switch
+            switch = word4 & 0xFF
+            state = self.read_dword(_SWITCH_ADDRESS + 4 * (switch >> 5))
+            is_set = bool(state >> (switch & 31) & 1)
+            return is_set == (comparison == 2)
+        elif condtype in (0, 22):  # Always
+            return True
+        elif condtype in (13, 23):  # Never
+            return False
+        else:
+            raise EPError(
+                _("Condition {} is not supported by emulator").format(
+                    _condtypes.get(condtype, condtype)
+                )
+            )
+
+        if comparison == 0:  # AtLeast
+            return value >= amount
+        elif comparison == 1:  # AtMost
+            return value <= amount
+        elif comparison == 10:  # Exactly
+            return value == amount
+        raise EPError(_("Invalid comparison: {}").format(comparison))
+
+    def _modify(self, address: int, modifier: int, amount: int, mask: int) -> None:
+        old = self.read_dword(address)
+        if modifier == 7:  # SetTo
+            new = amount
+        elif modifier == 8:  # Add
+            new = old + amount
+        elif modifier == 9:  # Subtract
+            new = max(old - amount, 0)
+        else:
+            raise EPError(_("Invalid modifier: {}").format(modifier))
+        self.write_dword(address, old & ~mask | new & mask)
+
+    def _run_action(self, act: int, acttype: int, word6: int, word7: int) -> None:
+        modifier = word6 >> 24
+        if acttype == 45:  # SetDeaths
+            player = self.read_dword(act + 16)
+            address = self._deaths_address(player, word6 & 0xFFFF)
+            mask = self.read_dword(act) if word7 >> 16 == _EUDX else 0xFFFFFFFF
+            self._modify(address, modifier, self.read_dword(act + 20), mask)
+        elif acttype == 26:  # SetResources
+            player = self._player(self.read_dword(act + 16))
+            amount = self.read_dword(act + 20)
+            restype = word6 & 0xFFFF
+            if restype in (0, 2):
+                self._modify(_ORE_ADDRESS + 4 * player, modifier, amount, 0xFFFFFFFF)
+            if restype in (1, 2):
+                self._modify(_GAS_ADDRESS + 4 * player, modifier, amount, 0xFFFFFFFF)
+        elif acttype == 13:  # SetSwitch
+            switch = self.read_dword(act + 20) & 0xFF
+            address = _SWITCH_ADDRESS + 4 * (switch >> 5)
+            bit = 1 << (switch & 31)
+            state = self.read_dword(address)
+            if modifier == 4:  # Set
+                state |= bit
+            elif modifier == 5:  # Clear
+                state &= ~bit
+            elif modifier == 6:  # Toggle
+                state ^= bit
+            else:
+                raise EPError(_("Random switch is not supported by emulator"))
+            self.write_dword(address, state)
+        elif acttype not in _IGNORED_ACTIONS:
+            raise EPError(
+                _("Action {} is not supported by emulator").format(
+                    _acttypes.get(acttype, acttype)
+                )
+            )
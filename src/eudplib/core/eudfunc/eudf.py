@@ -15,7 +15,7 @@ from ..variable.evcommon import _ev
 from .eudtypedfuncn import EUDFullFuncN, EUDTypedFuncN, EUDXTypedFuncN, _apply_types
 
 
-def EUDTypedFunc(argtypes, rettypes=None, *, traced=False):  # noqa: N802
+def EUDTypedFunc(argtypes, rettypes=None, *, traced=False, inline=False):  # noqa: N802
     def _eud_typed_func(fdecl_func):
         argspec = inspect.getfullargspec(fdecl_func)
         argn = len(argspec[0])
@@ -34,7 +34,13 @@ def EUDTypedFunc(argtypes, rettypes=None, *, traced=False):  # noqa: N802
             return fdecl_func(*args)
 
         ret = EUDTypedFuncN(
-            argn, caller, fdecl_func, argtypes, rettypes, traced=traced
+            argn,
+            caller,
+            fdecl_func,
+            argtypes,
+            rettypes,
+            traced=traced,
+            inline=inline,
         )
         functools.update_wrapper(ret, fdecl_func)
         return ret
@@ -46,15 +52,28 @@ def EUDTracedTypedFunc(argtypes, rettypes=None):  # noqa: N802
     return EUDTypedFunc(argtypes, rettypes, traced=True)
 
 
-def EUDFunc(fdecl_func):  # noqa: N802
-    return EUDTypedFunc(None, None, traced=False)(fdecl_func)
+def EUDFunc(fdecl_func=None, *, inline=False):  # noqa: N802
+    """Declare EUD function. Also usable as ``@EUDFunc(inline="auto")``.
+
+    With ``inline="auto"``, calls to function with only a few triggers are
+    expanded at call site instead of jumping to function body. Function
+    which creates its own EUDVariable, Db or other EUDObject, or calls other
+    EUDFunc, is never expanded. Python code in body runs again on each
+    expanded call, so its side effects should be repeatable.
+    """
+    decorator = EUDTypedFunc(None, None, traced=False, inline=inline)
+    if fdecl_func is None:
+        return decorator
+    return decorator(fdecl_func)
 
 
 def EUDTracedFunc(fdecl_func):  # noqa: N802
     return EUDTypedFunc(None, None, traced=True)(fdecl_func)
 
 
-def EUDXTypedFunc(argmasks, argtypes, rettypes=None, *, traced=False):  # noqa: N802
+def EUDXTypedFunc(  # noqa: N802
+    argmasks, argtypes, rettypes=None, *, traced=False, inline=False
+):
     def _eudx_typed_func(fdecl_func):
         argspec = inspect.getfullargspec(fdecl_func)
         argn = len(argspec[0])
@@ -73,7 +92,14 @@ def EUDXTypedFunc(argmasks, argtypes, rettypes=None, *, traced=False):  # noqa:
             return fdecl_func(*args)
 
         ret = EUDXTypedFuncN(
-            argn, caller, fdecl_func, argtypes, rettypes, argmasks, traced=traced
+            argn,
+            caller,
+            fdecl_func,
+            argtypes,
+            rettypes,
+            argmasks,
+            traced=traced,
+            inline=inline,
         )
         functools.update_wrapper(ret, fdecl_func)
         return ret
@@ -81,7 +107,9 @@ def EUDXTypedFunc(argmasks, argtypes, rettypes=None, *, traced=False):  # noqa:
     return _eudx_typed_func
 
 
-def EUDFullFunc(arginitvals, argtypes, rettypes=None, *, traced=False):  # noqa: N802
+def EUDFullFunc(  # noqa: N802
+    arginitvals, argtypes, rettypes=None, *, traced=False, inline=False
+):
     def _eud_full_func(fdecl_func):
         argspec = inspect.getfullargspec(fdecl_func)
         argn = len(argspec[0])
@@ -106,7 +134,14 @@ def EUDFullFunc(arginitvals, argtypes, rettypes=None, *, traced=False):  # noqa:
             return fdecl_func(*args)
 
         ret = EUDFullFuncN(
-            argn, arginitvals, caller, fdecl_func, argtypes, rettypes, traced=traced
+            argn,
+            arginitvals,
+            caller,
+            fdecl_func,
+            argtypes,
+            rettypes,
+            traced=traced,
+            inline=inline,
         )
         functools.update_wrapper(ret, fdecl_func)
         return ret
@@ -5,27 +5,51 @@
 # file that should have been included as part of this package.
 
 import functools
+import time
+from contextlib import contextmanager
 
 from ... import utils as ut
+from ...bindings._rust import eudobj
 from ...localize import _
 from ...utils.blockstru import BlockStruManager, set_blockstru_manager
 from .. import allocator as ac
 from .. import rawtrigger as bt
 from .. import variable as ev
+from ..rawtrigger import rawtriggerdef
+from ..variable import eudv
 from .trace.tracetool import _eud_trace_pop, _eud_trace_push
 
 _current_compiled_func = None
 _current_trigger_count = 0
+_current_object_count = 0
+_current_time = 0.0
+_compiled_funcs: list["EUDFuncN"] = []
+# Innermost call site being expanded by inline EUDFuncN, see EUDReturn
+_current_inline_frame = None
+# inline="auto" expands functions with fewer triggers than this, which
+# call no other EUDFunc out of line; see EUDFuncN._can_inline
+_INLINE_TRIGGER_LIMIT = 6
 
 
 def _update_func_trigger_count():
-    global _current_trigger_count
+    global _current_trigger_count, _current_time
+    global _current_object_count
     current_counter = bt.GetTriggerCounter()
     added_trigger_count = current_counter - _current_trigger_count
+    current_object_count = eudobj.get_object_counter()
+    current_time = time.perf_counter()
 
     if _current_compiled_func:
         _current_compiled_func._triggerCount += added_trigger_count
+        # EUDObjects other than triggers, e.g. Db or EUDArray
+        _current_compiled_func._objectCount += (
+            current_object_count - _current_object_count - added_trigger_count
+        )
+        # time spent on nested functions is excluded
+        _current_compiled_func._compileTime += current_time - _current_time
     _current_trigger_count = current_counter
+    _current_object_count = current_object_count
+    _current_time = current_time
 
 
 def _set_current_compiled_func(func):
@@ -34,18 +58,91 @@ def _set_current_compiled_func(func):
     last_compiled_func = _current_compiled_func
     _update_func_trigger_count()
     _current_compiled_func = func
+    rawtriggerdef._trigger_owner = func
+    eudv._created_variables = None if func is None else func._createdVariables
     return last_compiled_func
 
 
+@contextmanager
+def _untracked_variables():
+    """Variables created inside are not counted as state of function body"""
+    created_variables = eudv._created_variables
+    eudv._created_variables = None
+    try:
+        yield
+    finally:
+        eudv._created_variables = created_variables
+
+
+class _InlineFrame:
+    """Return point of an inline expansion of EUDFuncN."""
+
+    def __init__(self, func, rets):
+        self._func = func
+        self._rets = rets
+        self._fend = ac.Forward()
+
+    def _add_return(self, retv, needjump):
+        retv = ut.FlattenList(retv)
+        ut.ep_assert(
+            len(retv) == len(self._rets),
+            _("Number of returned values should be constant.")
+            + _(" (From function %s)").format(self._func._bodyfunc.__name__),
+        )
+
+        var_assigns, const_assigns = list(), list()
+        for fret, ret in zip(self._rets, retv):
+            if ev.IsEUDVariable(ret):
+                var_assigns.append((fret, bt.SetTo, ret))
+            else:
+                const_assigns.append((fret, bt.SetTo, ret))
+        ev.SeqCompute(const_assigns + var_assigns)
+
+        if needjump:
+            bt.SetNextTrigger(self._fend)
+
+
+def _inline_summary():
+    """Tradeoff of inline EUDFuncNs.
+
+    (call sites expanded, triggers of body copies they added to payload,
+    triggers of return paths they skip when each expanded call runs once)
+    """
+    calls = sum(func._inlineCalls for func in _compiled_funcs)
+    copied = sum(func._inlineBodyTriggers for func in _compiled_funcs)
+    skipped = sum(
+        func._inlineCalls * func._returnTriggers for func in _compiled_funcs
+    )
+    return calls, copied, skipped
+
+
+def _reset_compile_stats():
+    """Forget compile time and inline expansions counted for last build"""
+    for func in _compiled_funcs:
+        func._compileTime = 0.0
+        func._inlineCalls = 0
+        func._inlineTriggers = 0
+        func._inlineBodyTriggers = 0
+    _compiled_funcs.clear()
+
+
 class EUDFuncN:
-    def __init__(self, argn, callerfunc, bodyfunc, *, traced):
+    def __init__(self, argn, callerfunc, bodyfunc, *, traced, inline=False):
         """EUDFuncN
 
         :param callerfunc: Function to be wrapped.
         :param argn: The number of arguments got by callerfunc
         :param bodyfunc: Where function should return to
+        :param inline: If "auto", calls are expanded at call site when
+            function body has fewer triggers than _INLINE_TRIGGER_LIMIT,
+            calls no other EUDFunc and creates no state of its own.
         """
 
+        ut.ep_assert(
+            inline in (False, "auto"),
+            _("Invalid inline policy: {}").format(inline),
+        )
+
         if bodyfunc is None:
             bodyfunc = callerfunc
 
@@ -70,7 +167,22 @@ class EUDFuncN:
         self._fargs = None
         self._frets = None
         self._triggerCount = None
+        self._compileTime = 0.0
         self._traced = traced
+        self._inline = inline
+        self._predefined = False
+        self._expanding = False
+        self._inlineCalls = 0
+        self._inlineTriggers = 0
+        self._inlineBodyTriggers = 0
+        # Triggers run to return to caller, which inline calls skip
+        self._returnTriggers = 0
+        # EUDFunc calls, objects and variables of body; inline copies of
+        # body would not share them
+        self._calls = 0
+        self._objectCount = 0
+        self._createdVariables = [] if inline == "auto" else None
+        self._hasLocalState = False
 
     def size(self):
         if not self._fstart:
@@ -79,8 +191,16 @@ class EUDFuncN:
         return self._triggerCount
 
     def _create_func_body(self):
+        global _current_inline_frame
+
         self._triggerCount = 0
+        _compiled_funcs.append(self)
         last_compiled_func = _set_current_compiled_func(self)
+        # EUDReturn in function body returns from this function
+        last_inline_frame = _current_inline_frame
+        _current_inline_frame = None
+        # Parameters or returns set by _EUDPredefineParam/Return
+        self._predefined = self._fargs is not None or self._frets is not None
 
         # Add return point
         self._fend = ac.Forward()
@@ -112,10 +232,12 @@ class EUDFuncN:
         if self._retn is None or self._retn == 0:
             self._fend = bt.RawTrigger()
             self._nptr = self._fend + 4
+            self._returnTriggers = 1
         else:
             fend_trgs = ut.FlattenList(ev.VProc(self._frets, []))
             self._fend = fend_trgs[0]
             self._nptr = fend_trgs[-1]._actions[-1] + 20
+            self._returnTriggers = len(fend_trgs)
 
         bt.PopTriggerScope()
 
@@ -130,17 +252,25 @@ class EUDFuncN:
         # No return -> set return count to 0
         if self._retn is None:
             self._retn = 0
+        _current_inline_frame = last_inline_frame
         _set_current_compiled_func(last_compiled_func)
 
+        if self._createdVariables is not None:
+            # Local variables keep their values between calls
+            own = {id(v) for v in self._fargs} | {id(v) for v in self._frets or ()}
+            self._hasLocalState = self._objectCount > 0 or any(
+                not v._rvalue and id(v) not in own for v in self._createdVariables
+            )
+            self._createdVariables = None
+
     def _create_func_args(self):
         if self._fargs is None:
-            if self._arginits is None:
-                self._fargs = [ev.EUDVariable() for _ in range(self._argn)]
-            else:
-                self._fargs = []
-                for initvals in self._arginits:
-                    argv = ev.EUDXVariable(*initvals)
-                    self._fargs.append(argv)
+            self._fargs = self._new_args()
+
+    def _new_args(self):
+        if self._arginits is None:
+            return [ev.EUDVariable() for _ in range(self._argn)]
+        return [ev.EUDXVariable(*initvals) for initvals in self._arginits]
 
     def _add_return(self, retv, needjump):
         retv = ut.FlattenList(retv)
@@ -171,6 +301,8 @@ class EUDFuncN:
     def _call_with_last_args(self, *, ret=None):
         if self._fstart is None:
             self._create_func_body()
+        if _current_compiled_func is not None:
+            _current_compiled_func._calls += 1
 
         fcallend = ac.Forward()
 
@@ -217,6 +349,10 @@ class EUDFuncN:
             _("Argument number mismatch : ")
             + "len(%s) != %d" % (repr(args), self._argn),
         )
+        if self._can_inline():
+            return self._inline_call(args, ret)
+        if _current_compiled_func is not None:
+            _current_compiled_func._calls += 1
 
         fcallend = ac.Forward()
 
@@ -262,6 +398,88 @@ class EUDFuncN:
                     pass
             return ut.List2Assignable(ret)
 
+    def _can_inline(self):
+        return (
+            self._inline == "auto"
+            and self._nptr is not None  # not compiling function body
+            and not self._expanding  # recursive call
+            and not self._traced
+            and not self._predefined
+            and not self._calls  # callee triggers are not counted
+            and not self._hasLocalState
+            and self._triggerCount < _INLINE_TRIGGER_LIMIT
+        )
+
+    def _inline_call(self, args, ret):
+        """Expand function body at call site.
+
+        Arguments are copied to new variables and returns are written to ret
+        directly, without jumping to function and its return point. Python
+        body runs again for each call site, so only bodies without their own
+        variables, objects or EUDFunc calls are expanded.
+        """
+        global _current_inline_frame
+
+        start = bt.GetTriggerCounter()
+        if ret is None:
+            ret = ev.EUDCreateVariables(self._retn)
+        ret = ut.FlattenList(ret)
+        ut.ep_assert(
+            len(ret) == self._retn,
+            _("Return number mismatch : ")
+            + "len(%s) != %d" % (repr(ret), self._retn),
+        )
+
+        with _untracked_variables():
+            fargs = self._new_args()
+        var_assigns, const_assigns = list(), list()
+        for farg, arg in zip(fargs, args):
+            if ev.IsEUDVariable(arg):
+                var_assigns.append((farg, bt.SetTo, arg))
+            else:
+                const_assigns.append((farg, bt.SetTo, arg))
+        if len(var_assigns) <= 2:
+            ev.SeqCompute(const_assigns + var_assigns)
+        else:
+            ev.NonSeqCompute(const_assigns + var_assigns)
+        body_start = bt.GetTriggerCounter()
+
+        frame = _InlineFrame(self, ret)
+        last_inline_frame = _current_inline_frame
+        _current_inline_frame = frame
+        f_bsm = BlockStruManager()
+        prev_bsm = set_blockstru_manager(f_bsm)
+        self._expanding = True
+        try:
+            final_rets = self._callerfunc(*fargs)
+            if final_rets is not None:
+                frame._add_return(ut.Assignable2List(final_rets), False)
+            frame._fend << bt.NextTrigger()
+
+            if not f_bsm.empty():
+                raise ut.EPError(
+                    _("Block start/end mismatch inside function")
+                    + f": {', '.join(name for name, _data in f_bsm._blockstru)}"
+                )
+        finally:
+            self._expanding = False
+            _current_inline_frame = last_inline_frame
+            set_blockstru_manager(prev_bsm)
+        self._inlineCalls += 1
+        self._inlineTriggers += bt.GetTriggerCounter() - start
+        self._inlineBodyTriggers += bt.GetTriggerCounter() - body_start
+
+        if self._frets is not None:
+            for retv in ret:
+                try:
+                    retv.makeR()
+                except AttributeError:
+                    pass
+            return ut.List2Assignable(ret)
+
 
 def EUDReturn(*args):  # noqa: N802
-    _current_compiled_func._add_return(args, True)
+    if _current_inline_frame is not None:
+        _current_inline_frame._add_return(args, True)
+    else:
+        _current_compiled_func._add_return(args, True)
@@ -54,8 +54,10 @@ class EUDTypedFuncN(EUDFuncN):
     arguments to types prior to function call.
     """
 
-    def __init__(self, argn, callerfunc, bodyfunc, argtypes, rettypes, *, traced):
-        super().__init__(argn, callerfunc, bodyfunc, traced=traced)
+    def __init__(
+        self, argn, callerfunc, bodyfunc, argtypes, rettypes, *, traced, inline=False
+    ):
+        super().__init__(argn, callerfunc, bodyfunc, traced=traced, inline=inline)
         self._argtypes = argtypes
         self._rettypes = rettypes
 
@@ -78,30 +80,55 @@ class EUDXTypedFuncN(EUDTypedFuncN):
     """
 
     def __init__(
-        self, argn, callerfunc, bodyfunc, argtypes, rettypes, argmasks, *, traced
+        self,
+        argn,
+        callerfunc,
+        bodyfunc,
+        argtypes,
+        rettypes,
+        argmasks,
+        *,
+        traced,
+        inline=False,
     ):
         super().__init__(
-            argn, callerfunc, bodyfunc, argtypes, rettypes, traced=traced
+            argn,
+            callerfunc,
+            bodyfunc,
+            argtypes,
+            rettypes,
+            traced=traced,
+            inline=inline,
         )
         self._argmasks = argmasks
 
-    def _create_func_args(self):
+    def _new_args(self):
         ut.ep_assert(
             self._argn == len(self._argmasks),
             _("Different number of arguments({}) from mask declarations({})."),
         )
-        if self._fargs is None:
-            self._fargs = [ev.EUDXVariable(0, mask) for mask in self._argmasks]
+        return [ev.EUDXVariable(0, mask) for mask in self._argmasks]
 
 
 class EUDFullFuncN(EUDFuncN):
     def __init__(
-        self, argn, arginitvals, callerfunc, bodyfunc, argtypes, rettypes, *, traced
+        self,
+        argn,
+        arginitvals,
+        callerfunc,
+        bodyfunc,
+        argtypes,
+        rettypes,
+        *,
+        traced,
+        inline=False,
     ):
         arginitvals = list(arginitvals)
         while len(arginitvals) < argn:
             arginitvals.append((0, bt.SetTo, 0, None))
-        super().__init__(arginitvals, callerfunc, bodyfunc, traced=traced)
+        super().__init__(
+            arginitvals, callerfunc, bodyfunc, traced=traced, inline=inline
+        )
         self._argtypes = argtypes
         self._rettypes = rettypes
 
@@ -8,7 +8,7 @@ from .mapdata import GetChkTokenized, IsMapdataInitialized
 from .playerinfo import GetPlayerInfo
 from .proptable import GetPropertyIndex
 from .stringmap import GetLocationIndex, GetStringIndex, GetSwitchIndex, GetUnitIndex
-from .tblformat import TBL
+from .tblformat import TBL, ShareStringSuffix
 from .unitprp import UnitProperty
 
 __all__ = [
@@ -21,5 +21,6 @@ __all__ = [
     "GetSwitchIndex",
     "GetUnitIndex",
     "TBL",
+    "ShareStringSuffix",
     "UnitProperty",
 ]
@@ -32,7 +32,9 @@ def sectionname_format(sn: str | bytes) -> bytes:
 
 class CHK:
     def __init__(self) -> None:
-        self.sections: dict[bytes, bytes] = {}
+        # Sections are read-only views of the loaded scenario.chk until they
+        # are read by getsection or replaced by setsection.
+        self.sections: dict[bytes, bytes | memoryview] = {}
 
     def loadblank(self) -> None:
         self.sections = {}
@@ -49,18 +51,19 @@ class CHK:
         t = self.sections  # temporarily store
         self.sections = {}
 
+        view = memoryview(b).toreadonly()
         index = 0
-        while index < len(b):
+        while index < len(view):
             # read data
-            sectionname = b[index : index + 4]
-            sectionlength = ut.b2i4(b, index + 4)
+            sectionname = bytes(view[index : index + 4])
+            sectionlength = ut.b2i4(view, index + 4)
 
             if sectionlength < 0:
                 # jsp with negative section size.
                 self.sections = t
                 return False
 
-            section = b[index + 8 : index + 8 + sectionlength]
+            section = view[index + 8 : index + 8 + sectionlength]
             index += sectionlength + 8
 
             self.sections[sectionname] = section
@@ -73,10 +76,10 @@ class CHK:
         return t
 
     def savechk(self) -> bytes:
-        # calculate output size
-        blist = []
+        # join copies every section into the output once
+        blist: list[bytes | memoryview] = []
         for name, binary in self.sections.items():
-            blist.append(name + ut.i2b4(len(binary)) + binary)
+            blist.extend((name, ut.i2b4(len(binary)), binary))
 
         fake_section = [b"ISOM"]
         import random
@@ -92,7 +95,15 @@ class CHK:
 
     def getsection(self, sectionname: str | bytes) -> bytes:
         sectionname = sectionname_format(sectionname)
-        return self.sections[sectionname]  # KeyError may be raised.
+        section = self.sections[sectionname]  # KeyError may be raised.
+        if isinstance(section, memoryview):
+            section = self.sections[sectionname] = section.tobytes()
+        return section
+
+    def getsectionview(self, sectionname: str | bytes) -> memoryview:
+        """Get read-only view of section without copying it."""
+        sectionname = sectionname_format(sectionname)
+        return memoryview(self.sections[sectionname]).toreadonly()
 
     def setsection(self, sectionname: str | bytes, b: bytes) -> None:
         sectionname = sectionname_format(sectionname)
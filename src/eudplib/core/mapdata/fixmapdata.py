@@ -17,7 +17,7 @@ def _fix_map_data(chkt: CHK) -> None:
 
 
 def _fix_unit_map(chkt: CHK) -> None:
-    unit = bytearray(chkt.getsection("UNIT"))
+    unit = bytearray(chkt.getsectionview("UNIT"))
 
     for i in range(0, len(unit), 36):
         # Disable flags for default value
@@ -58,7 +58,7 @@ def _fix_stats_and_settings(chkt: CHK) -> None:
         ("TECx", 44, (2, 2, 2, 2)),
     )
     for name, count, settings in sections:
-        data = bytearray(chkt.getsection(name))
+        data = bytearray(chkt.getsectionview(name))
 
         for i in range(count):
             if data[i] == 0:
@@ -79,15 +79,20 @@ def _apply_remastered_chk(chkt: CHK) -> None:
 
 
 def _fix_mtxm_0_0_null(chkt: CHK) -> None:
-    mtxm = bytearray(chkt.getsection("MTXM"))
+    mtxm = chkt.getsectionview("MTXM")
 
     null_tiles = []
     for i in range(0, len(mtxm), 2):
         if mtxm[i : i + 2] == b"\0\0":
-            mtxm[i : i + 2] = b"\x01\0"
             null_tiles.append(i // 2)
 
     if null_tiles:
+        # Copy MTXM only when it has to be modified
+        fixed_mtxm = bytearray(mtxm)
+        for tile in null_tiles:
+            fixed_mtxm[2 * tile] = 1
+        chkt.setsection("MTXM", fixed_mtxm)
+
         dim = chkt.getsection("DIM")
         width = b2i2(dim, 0)
 
@@ -100,5 +105,3 @@ def _fix_mtxm_0_0_null(chkt: CHK) -> None:
             + "\n"
             + _("Replaced them to 0000.01, because they cause desync.")
         )
-
-    chkt.setsection("MTXM", mtxm)
@@ -9,7 +9,8 @@ String table manager. Internally used in eudplib.
 
 from __future__ import annotations
 
-from collections.abc import Callable, Sequence
+import struct
+from collections.abc import Container, Sequence
 from typing import TYPE_CHECKING, Literal
 
 from ... import utils as ut
@@ -20,6 +21,7 @@ if TYPE_CHECKING:
     from .stringmap import StringIdMap
 
 unit_name_encoding: str | None = None
+_share_suffix: bool = False
 
 
 def DecodeUnitNameAs(e: str) -> None:  # noqa: N802
@@ -28,6 +30,18 @@ def DecodeUnitNameAs(e: str) -> None:  # noqa: N802
     unit_name_encoding = e
 
 
+def ShareStringSuffix(mode: bool) -> None:  # noqa: N802
+    """Store strings which are suffix of another string inside that string.
+
+    Saves space of STR section, which also holds payload. Don't turn on if
+    you overwrite map strings in game; strings added by ForceAddString are
+    never shared.
+    """
+    global _share_suffix
+    ut.ep_assert(mode in (True, False), _("Invalid type") + f": {mode}")
+    _share_suffix = mode
+
+
 def _ignore_color(s: bytes) -> bytes | None:
     has_color = False
     ret = []
@@ -42,20 +56,71 @@ def _ignore_color(s: bytes) -> bytes | None:
         return None
 
 
-def _b2in(n: int) -> Callable[[Sequence[int], int], int]:
-    b2in_map = {2: ut.b2i2, 4: ut.b2i4}
-    return b2in_map[n]
-
-
-def _i2bn(n: int) -> Callable[[int], bytes]:
-    i2bn_map = {2: ut.i2b2, 4: ut.i2b4}
-    return i2bn_map[n]
+def _entry_format(n: int) -> str:
+    entry_format_map = {2: "H", 4: "I"}
+    return entry_format_map[n]
 
 
 def _roundup_by_4(num: int) -> int:
     return -((-num) // 4) * 4
 
 
+def _read_strings(content: bytes, size: int) -> list[bytes | None]:
+    """Read strings of TBL. None for string with invalid offset."""
+    fmt = _entry_format(size)
+    (stringcount,) = struct.unpack_from("<" + fmt, content, 0)
+    offsets = struct.unpack_from(f"<{stringcount}{fmt}", content, size)
+    contentlen = len(content)
+    strings: list[bytes | None] = []
+    for offset in offsets:
+        if offset >= contentlen:
+            strings.append(None)
+            continue
+        send = content.find(b"\0", offset)
+        if send == -1:  # no null terminator
+            send = contentlen
+        strings.append(content[offset:send])
+    return strings
+
+
+def _next_nonempty_strings(
+    strings: Sequence[bytes | None], skipped: Container[int] = ()
+) -> list[bytes | None]:
+    """For each string, the first non-empty string after it, if any.
+
+    Indices in skipped are 1-based string ids and never chosen.
+    """
+    next_strings: list[bytes | None] = [None] * len(strings)
+    nextstring = None
+    for i in range(len(strings) - 1, -1, -1):
+        next_strings[i] = nextstring
+        string = strings[i]
+        if string and i + 1 not in skipped:
+            nextstring = string
+    return next_strings
+
+
+def _suffix_hosts(strings: Sequence[bytes], unshared: Sequence[bool]) -> list[int]:
+    """For each string, index of the longest string that ends with it.
+
+    Strings are sorted by their reversed bytes once; a string is suffix of
+    another iff it is prefix of the following strings in reversed order.
+    """
+    hosts = list(range(len(strings)))
+    rstrings = [s[::-1] for s in strings]
+    order = sorted(
+        (i for i in range(len(strings)) if not unshared[i]),
+        key=rstrings.__getitem__,
+    )
+    host = None
+    for i in reversed(order):
+        if host is not None and rstrings[host].startswith(rstrings[i]):
+            hosts[i] = host
+        else:
+            host = i
+    return hosts
+
+
 class TBL:
     def __init__(
         self,
@@ -76,12 +141,14 @@ class TBL:
         self._dataindextb: list[int] = []  # String starts from #1
         self._capacity: int = save_entry  # Size of STR section
         self._emptystring: list[tuple[int, bytes] | int] = []
+        self._unshared: list[bool] = []  # data id -> added by ForceAddString
         self._loaded: bool = False
         self._first_extended_string: bytes | None = None
 
         self._finalized: bool = False
         self._tbldata: bytes = b""
         self._stroffset: list[int] = []
+        self._shared_bytes: int = 0
 
         if content is not None:
             if init_chkt:
@@ -95,35 +162,22 @@ class TBL:
         self._stringmap.clear()
         self._dataindextb.clear()
         self._emptystring.clear()
+        self._unshared.clear()
         self._first_extended_string = None
         self._capacity = self._saveentry
 
-        size = self._loadentry
-        b2i = _b2in(size)
-        stringcount = b2i(content, 0)
-
-        for i in range(stringcount):
-            i += 1
-            stringoffset = b2i(content, i * size)
-            send = stringoffset
-            while content[send] != 0:
-                send += 1
+        strings = _read_strings(content, self._loadentry)
+        next_strings = _next_nonempty_strings(strings)
 
-            string = content[stringoffset:send]
+        for i, string in enumerate(strings):
+            if string is None:
+                raise IndexError(_("Invalid string offset"))
             if string == b"":
-                empty_len = len(self._emptystring)
-                for j in range(i, stringcount):
-                    j += 1
-                    nextoffset = b2i(content, j * size)
-                    nextend = nextoffset
-                    while content[nextend] != 0:
-                        nextend += 1
-                    nextstring = content[nextoffset:nextend]
-                    if nextstring != b"":
-                        self._emptystring.append((i - 1, nextstring))
-                        break
-                if len(self._emptystring) == empty_len:
-                    self._emptystring.append(i - 1)
+                nextstring = next_strings[i]
+                if nextstring is not None:
+                    self._emptystring.append((i, nextstring))
+                else:
+                    self._emptystring.append(i)
             self.AddString(string)
         self._loaded = True
 
@@ -137,6 +191,7 @@ class TBL:
         self._stringmap.clear()
         self._dataindextb.clear()
         self._emptystring.clear()
+        self._unshared.clear()
         self._first_extended_string = None
         self._capacity = self._saveentry
 
@@ -195,49 +250,33 @@ class TBL:
                 if forcstrid:
                     reserved_str.add(forcstrid)
 
-        size = self._loadentry
-        b2i = _b2in(size)
         removed_str = set(locdict.keys()).union(swnmdict.keys()) - reserved_str
-        stringcount = b2i(content, 0)
+        strings = _read_strings(content, self._loadentry)
+        next_strings = _next_nonempty_strings(strings, removed_str)
+        next_ids: list[int] = [0] * len(strings)
+        next_id = 0
+        for j in range(len(strings), 0, -1):
+            next_ids[j - 1] = next_id
+            if strings[j - 1] and j not in removed_str:
+                next_id = j
+
+        for i, string in enumerate(strings, 1):
+            if string is None:
+                # invalid string offset
+                continue
 
-        for i in range(stringcount):
-            i += 1
-            stringoffset = b2i(content, i * size)
-            send = stringoffset
-            try:
-                while content[send] != 0:
-                    send += 1
-            except IndexError:
-                if stringoffset == send:
-                    # invalid string offset
-                    continue
-                else:
-                    # no null terminator
-                    pass
-
-            string = content[stringoffset:send]
             if string == b"" or i in removed_str:
-                empty_len = len(self._emptystring)
-                for j in range(i, stringcount):
-                    j += 1
-                    if j in removed_str:
-                        continue
-                    nextoffset = b2i(content, j * size)
-                    nextend = nextoffset
-                    while content[nextend] != 0:
-                        nextend += 1
-                    nextstring = content[nextoffset:nextend]
-                    if nextstring != b"":
-                        if j in unitdict and unit_name_encoding:
-                            try:
-                                nextstring = (
-                                    nextstring.decode(unit_name_encoding)
-                                ).encode("utf-8")
-                            except UnicodeDecodeError:
-                                pass
-                        self._emptystring.append((i - 1, nextstring))
-                        break
-                if len(self._emptystring) == empty_len:
+                nextstring = next_strings[i - 1]
+                if nextstring is not None:
+                    if next_ids[i - 1] in unitdict and unit_name_encoding:
+                        try:
+                            nextstring = (
+                                nextstring.decode(unit_name_encoding)
+                            ).encode("utf-8")
+                        except UnicodeDecodeError:
+                            pass
+                    self._emptystring.append((i - 1, nextstring))
+                else:
                     self._emptystring.append(i - 1)
 
             if string:
@@ -297,6 +336,7 @@ class TBL:
                     nextstring = self._first_extended_string
                 dataindex = self._datatb.index(nextstring)
                 self._datatb.insert(dataindex, string)
+                self._unshared.insert(dataindex, False)
                 for i, v in enumerate(self._dataindextb):
                     if v >= dataindex:
                         self._dataindextb[i] += 1
@@ -308,6 +348,7 @@ class TBL:
                     self._first_extended_string = string
                 dataindex = len(self._datatb)
                 self._datatb.append(string)
+                self._unshared.append(False)
                 self._dataindextb.append(dataindex)
                 # string + b'\0' + string offset
                 self._capacity += _roundup_by_4(len(string) + 1) + self._saveentry
@@ -345,38 +386,54 @@ class TBL:
             return self._tbldata
 
         # calculate offset of each string
-        outbytes = []
         self._stroffset.clear()
         size = self._saveentry
         outindex = _roundup_by_4(size * len(self._dataindextb) + size)
 
-        for s in self._datatb:
+        hosts: Sequence[int]
+        if _share_suffix:
+            hosts = _suffix_hosts(self._datatb, self._unshared)
+        else:
+            hosts = range(len(self._datatb))
+        self._shared_bytes = 0
+        for dataidx, s in enumerate(self._datatb):
+            host = hosts[dataidx]
+            if host != dataidx:
+                self._stroffset.append(-len(s))  # offset from end of host
+                self._shared_bytes += _roundup_by_4(len(s) + 1)
+                continue
             self._stroffset.append(outindex)
             outindex += _roundup_by_4(len(s) + 1)
-        i2b = _i2bn(size)
-
-        # String count
-        outbytes.append(i2b(len(self._dataindextb)))
-
-        # String offsets
-        for dataidx in self._dataindextb:
-            outbytes.append(i2b(self._stroffset[dataidx]))
-
-        tablesize = size * (len(self._dataindextb) + 1)
-        for _n in range(_roundup_by_4(tablesize) - tablesize):
-            outbytes.append(b"\0")
-
-        # String data
-        for s in self._datatb:
-            outbytes.append(s)
-            for _n in range(_roundup_by_4(len(s) + 1) - len(s)):
-                outbytes.append(b"\0")
+        stroffset = self._stroffset
+        for dataidx, host in enumerate(hosts):
+            if host != dataidx:
+                stroffset[dataidx] += stroffset[host] + len(self._datatb[host])
+
+        # Padding is left as zero-filled
+        outbytes = bytearray(outindex)
+        fmt = _entry_format(size)
+        struct.pack_into(
+            f"<{len(self._dataindextb) + 1}{fmt}",
+            outbytes,
+            0,
+            len(self._dataindextb),
+            *(stroffset[dataidx] for dataidx in self._dataindextb),
+        )
+        for dataidx, (offset, s) in enumerate(zip(stroffset, self._datatb)):
+            if hosts[dataidx] == dataidx:
+                outbytes[offset : offset + len(s)] = s
 
-        self._tbldata = b"".join(outbytes)
+        self._tbldata = bytes(outbytes)
         return self._tbldata
 
     def finalize(self) -> tuple[bytes, list[int]]:
         self.save_tbl()
+        if _share_suffix and not self._finalized:
+            print(
+                _(" - String suffix sharing saved {} bytes").format(
+                    self._shared_bytes
+                )
+            )
         self._finalized = True
         return self._tbldata, self._stroffset
 
@@ -394,6 +451,7 @@ class TBL:
         dataindex = len(self._datatb)
         # self._stringmap[string] = stringindex
         self._datatb.append(string)
+        self._unshared.append(True)
         self._dataindextb.append(dataindex)
         # string + b'\0' + string offset
         self._capacity += _roundup_by_4(len(string) + 1) + self._saveentry
@@ -11,6 +11,7 @@ from typing import TYPE_CHECKING
 from typing_extensions import Self
 
 from ... import utils as ut
+from ...bindings._rust import allocator as alc
 from ...localize import _
 from ..allocator import ConstExpr, IsConstExpr
 from .consttype import Byte, Dword, Word
@@ -124,7 +125,7 @@ class Action(ConstExpr):
     ) -> None:
         """See :mod:`eudplib.base.stocktrg` for stock actions list."""
         super().__init__()
-        self.fields: list[Dword] = [
+        self.fields: alc.TrgFields = alc.TrgFields.action(
             locid1,
             strid,
             wavid,
@@ -137,12 +138,13 @@ class Action(ConstExpr):
             flags,
             0,
             eudx,
-        ]
+        )
         self.parenttrg: RawTrigger | None = None
         self.actindex: int | None = None
 
     def __copy__(self) -> Action:
-        return self.__class__(*self.fields[:10], eudx=self.fields[11])  # type: ignore[arg-type]
+        fields = list(self.fields)
+        return self.__class__(*fields[:10], eudx=fields[11])  # type: ignore[arg-type]
 
     def disable(self) -> None:
         if isinstance(self.fields[9], ConstExpr):
@@ -253,9 +255,8 @@ class Action(ConstExpr):
         return self.parenttrg.Evaluate() + 8 + 320 + 32 * self.actindex
 
     def CollectDependency(self, pbuffer: ObjCollector) -> None:  # noqa: N802
-        for field in self.fields[:6]:
-            if not isinstance(field, int):
-                pbuffer.WriteDword(field)  # type: ignore[arg-type]
+        for field in self.fields.exprs():
+            pbuffer.WriteDword(field)
 
     def WritePayload(self, pbuffer: _PayloadBuffer) -> None:  # noqa: N802
-        pbuffer.WritePack("IIIIIIHBBBBH", self.fields)  # type: ignore[arg-type]
+        pbuffer.WritePack("IIIIIIHBBBBH", list(self.fields))
@@ -11,6 +11,7 @@ from typing import TYPE_CHECKING, NoReturn
 from typing_extensions import Self
 
 from ... import utils as ut
+from ...bindings._rust import allocator as alc
 from ...localize import _
 from ..allocator import ConstExpr, IsConstExpr
 from .consttype import Byte, Dword, Word
@@ -84,7 +85,7 @@ class Condition(ConstExpr):
     ) -> None:
         """See :mod:`eudplib.base.stockcond` for stock conditions list."""
         super().__init__()
-        self.fields: list[Dword] = [
+        self.fields: alc.TrgFields = alc.TrgFields.condition(
             locid,
             player,
             amount,
@@ -94,12 +95,13 @@ class Condition(ConstExpr):
             restype,
             flags,
             eudx,
-        ]
+        )
         self.parenttrg: RawTrigger | None = None
         self.condindex: int | None = None
 
     def __copy__(self) -> Condition:
-        return self.__class__(*self.fields[:8], eudx=self.fields[8])  # type: ignore[arg-type]
+        fields = list(self.fields)
+        return self.__class__(*fields[:8], eudx=fields[8])  # type: ignore[arg-type]
 
     def disable(self) -> None:
         if isinstance(self.fields[7], ConstExpr):
@@ -180,11 +182,11 @@ class Condition(ConstExpr):
         return self.parenttrg.Evaluate() + 8 + self.condindex * 20
 
     def CollectDependency(self, pbuffer: ObjCollector) -> None:  # noqa: N802
-        for field in self.fields[:3]:
-            pbuffer.WriteDword(field)  # type: ignore[arg-type]
+        for field in self.fields.exprs():
+            pbuffer.WriteDword(field)
 
     def WritePayload(self, pbuffer: _PayloadBuffer) -> None:  # noqa: N802
-        pbuffer.WritePack("IIIHBBBBH", self.fields)  # type: ignore[arg-type]
+        pbuffer.WritePack("IIIHBBBBH", list(self.fields))
 
     def __bool__(self) -> NoReturn:
         raise RuntimeError(_("To prevent error, Condition can't be put into if."))
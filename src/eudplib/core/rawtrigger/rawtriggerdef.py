@@ -23,6 +23,8 @@ from .triggerscope import NextTrigger, _register_trigger
 # Trigger counter thing
 
 _trg_counter = 0
+# EUDFuncN being compiled, set by eudfuncn
+_trigger_owner: object = None
 
 
 def GetTriggerCounter() -> int:  # noqa: N802
@@ -169,6 +171,7 @@ class RawTrigger(EUDObject):
         # Register trigger to global table
         global _trg_counter
         _trg_counter += 1
+        self._owner = _trigger_owner
         _register_trigger(self)  # This should be called before (1)
 
         # Set linked list pointers
@@ -208,11 +211,19 @@ class RawTrigger(EUDObject):
     def _allocate_trigger(self, pbuffer: alc.ObjAllocator) -> None:
         pbuffer._write_trigger(len(self._conditions), len(self._actions))
 
+    def _record_trigger(self, pbuffer: alc.ObjAllocator) -> None:
+        pbuffer._record_trigger(
+            self._prevptr,
+            self._nextptr,
+            (cond.fields for cond in self._conditions),
+            (act.fields for act in self._actions),
+            self._flags,
+        )
+
     def _write_trigger(self, pbuffer: alc.PayloadBuffer) -> None:
         pbuffer._write_trigger(
             self._prevptr,
             self._nextptr,
-            # FIXME: Change Condition and Action to #[pyclass]
             (cond.fields for cond in self._conditions),
             (act.fields for act in self._actions),
             self._flags,
@@ -4,28 +4,83 @@
 # and is released under "MIT License Agreement". Please see the LICENSE
 # file that should have been included as part of this package.
 
-from .buttonset import DefaultButtonSet, DefButtonSetDict
-from .flingy import DefaultFlingy, DefFlingyDict
-from .icon import DefaultIcon, DefIconDict
-from .image import DefaultImage, DefImageDict
-from .iscript import DefaultIscript, DefIscriptDict
-from .portrait import DefaultPortrait, DefPortraitDict
-from .sfxdata import DefaultSfxData, DefSfxDataDict
-from .sprite import DefaultSprite, DefSpriteDict
-from .stattxt import DefaultRank, DefaultStatText, DefRankDict, DefStatTextDict
-from .tech import DefaultTech, DefTechDict
-from .trg import (
-    DefAIScriptDict,
-    DefaultAIScriptAtLocation,
-    DefaultAIScriptWithoutLocation,
-    DefaultUnit,
-    DefLocationDict,
-    DefSwitchDict,
-    DefUnitDict,
-)
-from .unitorder import DefaultUnitOrder, DefUnitOrderDict
-from .upgrade import DefaultUpgrade, DefUpgradeDict
-from .weapon import DefaultWeapon, DefWeaponDict
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .buttonset import DefaultButtonSet, DefButtonSetDict
+    from .flingy import DefaultFlingy, DefFlingyDict
+    from .icon import DefaultIcon, DefIconDict
+    from .image import DefaultImage, DefImageDict
+    from .iscript import DefaultIscript, DefIscriptDict
+    from .portrait import DefaultPortrait, DefPortraitDict
+    from .sfxdata import DefaultSfxData, DefSfxDataDict
+    from .sprite import DefaultSprite, DefSpriteDict
+    from .stattxt import DefaultRank, DefaultStatText, DefRankDict, DefStatTextDict
+    from .tech import DefaultTech, DefTechDict
+    from .trg import (
+        DefAIScriptDict,
+        DefaultAIScriptAtLocation,
+        DefaultAIScriptWithoutLocation,
+        DefaultUnit,
+        DefLocationDict,
+        DefSwitchDict,
+        DefUnitDict,
+    )
+    from .unitorder import DefaultUnitOrder, DefUnitOrderDict
+    from .upgrade import DefaultUpgrade, DefUpgradeDict
+    from .weapon import DefaultWeapon, DefWeaponDict
+
+# Tables are large; each submodule is imported on first access of its names.
+_submodule = {
+    "DefaultButtonSet": "buttonset",
+    "DefButtonSetDict": "buttonset",
+    "DefaultFlingy": "flingy",
+    "DefFlingyDict": "flingy",
+    "DefaultIcon": "icon",
+    "DefIconDict": "icon",
+    "DefaultImage": "image",
+    "DefImageDict": "image",
+    "DefaultIscript": "iscript",
+    "DefIscriptDict": "iscript",
+    "DefaultPortrait": "portrait",
+    "DefPortraitDict": "portrait",
+    "DefaultSfxData": "sfxdata",
+    "DefSfxDataDict": "sfxdata",
+    "DefaultSprite": "sprite",
+    "DefSpriteDict": "sprite",
+    "DefaultRank": "stattxt",
+    "DefaultStatText": "stattxt",
+    "DefRankDict": "stattxt",
+    "DefStatTextDict": "stattxt",
+    "DefaultTech": "tech",
+    "DefTechDict": "tech",
+    "DefAIScriptDict": "trg",
+    "DefaultAIScriptAtLocation": "trg",
+    "DefaultAIScriptWithoutLocation": "trg",
+    "DefaultUnit": "trg",
+    "DefLocationDict": "trg",
+    "DefSwitchDict": "trg",
+    "DefUnitDict": "trg",
+    "DefaultUnitOrder": "unitorder",
+    "DefUnitOrderDict": "unitorder",
+    "DefaultUpgrade": "upgrade",
+    "DefUpgradeDict": "upgrade",
+    "DefaultWeapon": "weapon",
+    "DefWeaponDict": "weapon",
+}
+
+
+def __getattr__(name: str) -> object:
+    try:
+        submodule = _submodule[name]
+    except KeyError:
+        err = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(err) from None
+    value = getattr(import_module(f".{submodule}", __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "DefaultButtonSet",
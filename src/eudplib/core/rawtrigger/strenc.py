@@ -18,24 +18,7 @@ from ..mapdata import (
     GetUnitIndex,
 )
 from .consttype import ConstType, T, U, _Byte, _Dword, _Word
-from .strdict import (
-    DefAIScriptDict,
-    DefButtonSetDict,
-    DefFlingyDict,
-    DefIconDict,
-    DefImageDict,
-    DefIscriptDict,
-    DefLocationDict,
-    DefPortraitDict,
-    DefSpriteDict,
-    DefStatTextDict,
-    DefSwitchDict,
-    DefTechDict,
-    DefUnitDict,
-    DefUnitOrderDict,
-    DefUpgradeDict,
-    DefWeaponDict,
-)
+from . import strdict
 
 if TYPE_CHECKING:
     from ..allocator import ConstExpr
@@ -141,18 +124,19 @@ def EncodeAIScript(ais: _Arg) -> _Dword:  # noqa: N802
     if isinstance(ai, bytes):
         ut.ep_assert(len(ai) >= 4, _("AIScript name too short"))
 
+        aiscript_dict = strdict.DefAIScriptDict
         if len(ai) > 4:
-            if ai in DefAIScriptDict:
-                return ut.b2i4(DefAIScriptDict[ai])
+            if ai in aiscript_dict:
+                return ut.b2i4(aiscript_dict[ai])
             sl = _("Cannot encode string {} as {}.").format(ai, "AIScript")
-            for match in difflib.get_close_matches(ai, DefAIScriptDict.keys()):
+            for match in difflib.get_close_matches(ai, aiscript_dict.keys()):
                 sl += "\n" + _(" - Suggestion: {}").format(match)
 
         elif len(ai) == 4:
-            if ai in DefAIScriptDict.values():
+            if ai in aiscript_dict.values():
                 return ut.b2i4(ai)
             sl = _("Cannot encode string {} as {}.").format(ai, "AIScript")
-            for match in difflib.get_close_matches(ai, DefAIScriptDict.values()):
+            for match in difflib.get_close_matches(ai, aiscript_dict.values()):
                 sl += "\n" + _(" - Suggestion: {}").format(match)
         raise ut.EPError(sl)
 
@@ -218,7 +202,7 @@ def EncodeLocation(loc: __ExprProxy) -> _Word:
 
 
 def EncodeLocation(loc: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("location", GetLocationIndex, DefLocationDict, loc)  # type: ignore[return-value]
+    return _EncodeAny("location", GetLocationIndex, strdict.DefLocationDict, loc)  # type: ignore[return-value]
 
 
 @overload
@@ -257,7 +241,7 @@ def EncodeSwitch(sw: __ExprProxy) -> _Byte:
 
 
 def EncodeSwitch(sw: __Arg) -> _Byte:  # noqa: N802
-    return _EncodeAny("switch", GetSwitchIndex, DefSwitchDict, sw)  # type: ignore[return-value]
+    return _EncodeAny("switch", GetSwitchIndex, strdict.DefSwitchDict, sw)  # type: ignore[return-value]
 
 
 @overload
@@ -276,7 +260,7 @@ def EncodeUnit(u: __ExprProxy) -> _Word:
 
 
 def EncodeUnit(u: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("unit", GetUnitIndex, DefUnitDict, u)  # type: ignore[return-value]
+    return _EncodeAny("unit", GetUnitIndex, strdict.DefUnitDict, u)  # type: ignore[return-value]
 
 
 @overload
@@ -296,7 +280,7 @@ def EncodeTBL(t: _ExprProxy) -> _Dword:
 
 def EncodeTBL(t: _Arg) -> _Dword:  # noqa: N802
     # TODO: handle custom stat_txt.tbl
-    return _EncodeAny("stat_txt.tbl", lambda s: {}[s], DefStatTextDict, t)
+    return _EncodeAny("stat_txt.tbl", lambda s: {}[s], strdict.DefStatTextDict, t)
 
 
 @overload
@@ -315,7 +299,7 @@ def EncodeFlingy(flingy: __ExprProxy) -> _Word:
 
 
 def EncodeFlingy(flingy: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("flingy", lambda s: {}[s], DefFlingyDict, flingy)  # type: ignore[return-value]
+    return _EncodeAny("flingy", lambda s: {}[s], strdict.DefFlingyDict, flingy)  # type: ignore[return-value]
 
 
 @overload
@@ -334,7 +318,7 @@ def EncodeIcon(icon: __ExprProxy) -> _Word:
 
 
 def EncodeIcon(icon: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("icon", lambda s: {}[s], DefIconDict, icon)  # type: ignore[return-value]
+    return _EncodeAny("icon", lambda s: {}[s], strdict.DefIconDict, icon)  # type: ignore[return-value]
 
 
 @overload
@@ -353,7 +337,7 @@ def EncodeSprite(sprite: __ExprProxy) -> _Word:
 
 
 def EncodeSprite(sprite: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("sprite", lambda s: {}[s], DefSpriteDict, sprite)  # type: ignore[return-value]
+    return _EncodeAny("sprite", lambda s: {}[s], strdict.DefSpriteDict, sprite)  # type: ignore[return-value]
 
 
 @overload
@@ -372,7 +356,7 @@ def EncodeImage(image: __ExprProxy) -> _Word:
 
 
 def EncodeImage(image: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("image", lambda s: {}[s], DefImageDict, image)  # type: ignore[return-value]
+    return _EncodeAny("image", lambda s: {}[s], strdict.DefImageDict, image)  # type: ignore[return-value]
 
 
 @overload
@@ -391,7 +375,7 @@ def EncodeIscript(iscript: __ExprProxy) -> _Word:
 
 
 def EncodeIscript(iscript: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("iscript", lambda s: {}[s], DefIscriptDict, iscript)  # type: ignore[return-value]
+    return _EncodeAny("iscript", lambda s: {}[s], strdict.DefIscriptDict, iscript)  # type: ignore[return-value]
 
 
 @overload
@@ -410,7 +394,7 @@ def EncodeUnitOrder(order: __ExprProxy) -> _Byte:
 
 
 def EncodeUnitOrder(order: __Arg) -> _Byte:  # noqa: N802
-    return _EncodeAny("UnitOrder", lambda s: {}[s], DefUnitOrderDict, order)  # type: ignore[return-value]
+    return _EncodeAny("UnitOrder", lambda s: {}[s], strdict.DefUnitOrderDict, order)  # type: ignore[return-value]
 
 
 @overload
@@ -429,7 +413,7 @@ def EncodeWeapon(weapon: __ExprProxy) -> _Byte:
 
 
 def EncodeWeapon(weapon: __Arg) -> _Byte:  # noqa: N802
-    return _EncodeAny("weapon", lambda s: {}[s], DefWeaponDict, weapon)  # type: ignore[return-value]
+    return _EncodeAny("weapon", lambda s: {}[s], strdict.DefWeaponDict, weapon)  # type: ignore[return-value]
 
 
 @overload
@@ -448,7 +432,7 @@ def EncodeTech(tech: __ExprProxy) -> _Byte:
 
 
 def EncodeTech(tech: __Arg) -> _Byte:  # noqa: N802
-    return _EncodeAny("tech", lambda s: {}[s], DefTechDict, tech)  # type: ignore[return-value]
+    return _EncodeAny("tech", lambda s: {}[s], strdict.DefTechDict, tech)  # type: ignore[return-value]
 
 
 @overload
@@ -467,7 +451,7 @@ def EncodeUpgrade(upgrade: __ExprProxy) -> _Byte:
 
 
 def EncodeUpgrade(upgrade: __Arg) -> _Byte:  # noqa: N802
-    return _EncodeAny("upgrade", lambda s: {}[s], DefUpgradeDict, upgrade)  # type: ignore[return-value]
+    return _EncodeAny("upgrade", lambda s: {}[s], strdict.DefUpgradeDict, upgrade)  # type: ignore[return-value]
 
 
 @overload
@@ -486,7 +470,7 @@ def EncodePortrait(portrait: __ExprProxy) -> _Word:
 
 
 def EncodePortrait(portrait: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("portrait", lambda s: {}[s], DefPortraitDict, portrait)  # type: ignore[return-value]
+    return _EncodeAny("portrait", lambda s: {}[s], strdict.DefPortraitDict, portrait)  # type: ignore[return-value]
 
 
 @overload
@@ -505,4 +489,6 @@ def EncodeButtonSet(buttonset: __ExprProxy) -> _Word:
 
 
 def EncodeButtonSet(buttonset: __Arg) -> _Word:  # noqa: N802
-    return _EncodeAny("buttonset", lambda s: {}[s], DefButtonSetDict, buttonset)  # type: ignore[return-value]
+    return _EncodeAny(  # type: ignore[return-value]
+        "buttonset", lambda s: {}[s], strdict.DefButtonSetDict, buttonset
+    )
@@ -17,25 +17,6 @@ from .constenc import (
     _Player,
 )
 from .consttype import Byte, Dword, Word
-from .strdict import (
-    DefaultAIScriptAtLocation,
-    DefaultAIScriptWithoutLocation,
-    DefaultButtonSet,
-    DefaultFlingy,
-    DefaultIcon,
-    DefaultImage,
-    DefaultIscript,
-    DefaultPortrait,
-    DefaultRank,
-    DefaultSfxData,
-    DefaultSprite,
-    DefaultStatText,
-    DefaultTech,
-    DefaultUnit,
-    DefaultUnitOrder,
-    DefaultUpgrade,
-    DefaultWeapon,
-)
 
 if TYPE_CHECKING:
     from ...scdata import (
@@ -48,6 +29,25 @@ if TYPE_CHECKING:
         Upgrade,
         Weapon,
     )
+    from .strdict import (
+        DefaultAIScriptAtLocation,
+        DefaultAIScriptWithoutLocation,
+        DefaultButtonSet,
+        DefaultFlingy,
+        DefaultIcon,
+        DefaultImage,
+        DefaultIscript,
+        DefaultPortrait,
+        DefaultRank,
+        DefaultSfxData,
+        DefaultSprite,
+        DefaultStatText,
+        DefaultTech,
+        DefaultUnit,
+        DefaultUnitOrder,
+        DefaultUpgrade,
+        DefaultWeapon,
+    )
 
 AllyStatus: TypeAlias = "TrgAllyStatus | Byte | ExprProxy[AllyStatus]"
 Comparison: TypeAlias = "TrgComparison | Byte | ExprProxy[Comparison]"
@@ -62,7 +62,7 @@ SwitchState: TypeAlias = "TrgSwitchState | Byte | ExprProxy[SwitchState]"
 _UnitProperty: TypeAlias = "UnitProperty | bytes | ExprProxy[_UnitProperty]"
 
 AIScriptAtLocation: TypeAlias = (
-    DefaultAIScriptAtLocation | str | bytes | Dword | ExprProxy["AIScriptAtLocation"]
+    "DefaultAIScriptAtLocation | str | bytes | Dword | ExprProxy[AIScriptAtLocation]"
 )
 """4-characters AIScript are also allowed for input"""
 AIScriptWithoutLocation: TypeAlias = """(
@@ -27,6 +27,7 @@ from ...utils import (
 )
 from .. import rawtrigger as bt
 from ..allocator import ConstExpr, Forward
+from ..rawtrigger import rawtriggerdef
 from .vbase import VariableBase
 from .vbuf import get_current_varbuffer
 
@@ -36,6 +37,8 @@ if TYPE_CHECKING:
 
 
 _is_rvalue_strict = False
+# Variables created while compiling body of inline EUDFuncN, see eudfuncn
+_created_variables: list[EUDVariable] | None = None
 
 
 def EP_SetRValueStrictMode(mode: bool) -> None:  # noqa: N802
@@ -98,6 +101,8 @@ class VariableTriggerForward(ConstExpr):
     def __init__(self, initval) -> None:
         super().__init__()
         self._initval = initval
+        # EUDFuncN being compiled, for payload usage report
+        self._owner = rawtriggerdef._trigger_owner
 
     def Evaluate(self):  # noqa: N802
         evb = get_current_varbuffer()
@@ -124,6 +129,8 @@ class EUDVariable(VariableBase):
         self._vartrigger = VariableTriggerForward(initval)
         self._varact = self._vartrigger + (8 + 320)
         self._rvalue = False
+        if _created_variables is not None:
+            _created_variables.append(self)
 
     def GetVTable(self) -> ConstExpr:  # noqa: N802
         return self._vartrigger
@@ -10,6 +10,8 @@ from ...localize import _
 from ...utils import EPError, unProxy
 from .. import rawtrigger as bt
 from ..allocator import ConstExpr
+from ..rawtrigger import rawtriggerdef
+from . import eudv
 from .eudv import EUDVariable, process_dest
 from .vbuf import get_current_custom_varbuffer
 
@@ -22,6 +24,7 @@ class XVariableTriggerForward(ConstExpr):
     def __init__(self, initval) -> None:
         super().__init__()
         self._initval = initval
+        self._owner = rawtriggerdef._trigger_owner
 
     def Evaluate(self):  # noqa: N802
         evb = get_current_custom_varbuffer()
@@ -61,3 +64,5 @@ class EUDXVariable(EUDVariable):
         self._vartrigger = XVariableTriggerForward(args)
         self._varact = self._vartrigger + (8 + 320)
         self._rvalue = False
+        if eudv._created_variables is not None:
+            eudv._created_variables.append(self)
@@ -7,6 +7,7 @@
 from __future__ import annotations
 
 from collections import deque
+from collections.abc import Collection
 from typing import TYPE_CHECKING, Literal
 
 from ... import utils as ut
@@ -22,7 +23,6 @@ if TYPE_CHECKING:
     from ..allocator.payload import ObjCollector
     from .eudv import VariableTriggerForward
 
-
 class EUDVarBuffer(EUDObject):
     """Variable buffer
 
@@ -33,6 +33,8 @@ class EUDVarBuffer(EUDObject):
         super().__init__()
 
         self._vdict: dict[VariableTriggerForward, ConstExpr] = {}
+        # (first slot, number of slots) of each key
+        self._vslots: dict[VariableTriggerForward, tuple[int, int]] = {}
         self._initvals: list[int | ConstExpr] = []
 
     def DynamicConstructed(self) -> Literal[True]:  # noqa: N802
@@ -43,16 +45,38 @@ class EUDVarBuffer(EUDObject):
 
     def create_vartrigger(self, v, initval) -> ConstExpr:
         ret = self + (72 * len(self._initvals))
+        self._vslots[v] = (len(self._initvals), 1)
         self._initvals.append(initval)
         self._vdict[v] = ret
         return ret
 
     def create_vartriggers(self, v, initvals) -> ConstExpr:
         ret = self + (72 * len(self._initvals))
+        self._vslots[v] = (len(self._initvals), len(initvals))
         self._initvals.extend(initvals)
         self._vdict[v] = ret
         return ret
 
+    def remove_vartriggers(self, dead: Collection[VariableTriggerForward]) -> None:
+        """Drop slots of dead variables. They share one slot instead."""
+        initvals: list[int | ConstExpr] = []
+        self._vdict.clear()
+        vslots = self._vslots
+        self._vslots = {}
+        for v, (start, count) in vslots.items():
+            if v in dead:
+                continue
+            self._vdict[v] = self + (72 * len(initvals))
+            self._vslots[v] = (len(initvals), count)
+            initvals.extend(self._initvals[start : start + count])
+
+        if dead:
+            sink = self + (72 * len(initvals))
+            initvals.append(0)
+            for v in dead:
+                self._vdict[v] = sink
+        self._initvals = initvals
+
     def GetDataSize(self) -> int:  # noqa: N802
         return 2404 + 72 * (len(self._initvals) - 1)
 
@@ -5,10 +5,11 @@
 # file that should have been included as part of this package.
 
 from .epscompile import EPS_SetDebug, epsCompile
-from .epsimp import EPSLoader
+from .epsimp import EPSLoader, EPSPrefetch
 
 __all__ = [
     "EPS_SetDebug",
     "EPSLoader",
+    "EPSPrefetch",
     "epsCompile",
 ]
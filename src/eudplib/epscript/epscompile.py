@@ -4,6 +4,7 @@
 # and is released under "MIT License Agreement". Please see the LICENSE
 # file that should have been included as part of this package.
 
+import hashlib
 import platform
 from ctypes import CDLL, c_char_p, c_int, c_void_p
 
@@ -16,7 +17,8 @@ _libfile = {
 }[platform.system()]
 
 
-libeps = CDLL(find_data_file(_libfile, __file__))
+_libpath = find_data_file(_libfile, __file__)
+libeps = CDLL(_libpath)
 libeps.compileString.argtypes = [c_char_p, c_char_p]
 libeps.compileString.restype = c_void_p
 libeps.freeCompiledResult.argtypes = [c_void_p]
@@ -27,20 +29,28 @@ libeps.registerPlibConstants.argtypes = [c_char_p]
 libeps.registerPyKeywords.argtypes = [c_char_p]
 libeps.registerPyBuiltins.argtypes = [c_char_p]
 
+# Compiler states which affect output, for compile cache key
+_libhash: bytes | None = None
+_registered: dict[str, bytes] = {}
+_debug_mode = 0
+
 
 def _set_eps_globals(global_list):
     global_list_c = b"\0".join(u2b(g) for g in global_list) + b"\0"
     libeps.registerPlibConstants(global_list_c)
+    _registered["globals"] = global_list_c
 
 
 def _set_py_keywords(keyword_list):
     keyword_list_c = b"\0".join(u2b(g) for g in keyword_list) + b"\0"
     libeps.registerPyKeywords(keyword_list_c)
+    _registered["keywords"] = keyword_list_c
 
 
 def _set_py_builtins(builtin_list):
     builtin_list_c = b"\0".join(u2b(g) for g in builtin_list) + b"\0"
     libeps.registerPyBuiltins(builtin_list_c)
+    _registered["builtins"] = builtin_list_c
 
 
 def epsCompile(filename, b_code):  # noqa: N802
@@ -53,5 +63,39 @@ def epsCompile(filename, b_code):  # noqa: N802
     return output_str
 
 
+def _get_compiler_state():
+    return dict(_registered), _debug_mode
+
+
+def _set_compiler_state(registered, debug_mode):
+    register = {
+        "globals": libeps.registerPlibConstants,
+        "keywords": libeps.registerPyKeywords,
+        "builtins": libeps.registerPyBuiltins,
+    }
+    for kind, names in registered.items():
+        register[kind](names)
+        _registered[kind] = names
+    EPS_SetDebug(debug_mode)
+
+
+def epsCompileDigest(filename, b_code):  # noqa: N802
+    """Digest of epsCompile(filename, b_code) inputs and compiler states."""
+    global _libhash
+    if _libhash is None:
+        with open(_libpath, "rb") as file:
+            _libhash = hashlib.sha256(file.read()).digest()
+
+    digest = hashlib.sha256(_libhash)
+    for kind in sorted(_registered):
+        digest.update(u2b(kind) + b"\0" + _registered[kind] + b"\0")
+    digest.update(bytes([_debug_mode]))
+    digest.update(u2b(filename) + b"\0")
+    digest.update(b_code)
+    return digest.digest()
+
+
 def EPS_SetDebug(b):  # noqa: N802
+    global _debug_mode
     libeps.setDebugMode(b)
+    _debug_mode = 1 if b else 0
@@ -5,16 +5,20 @@
 # and is released under "MIT License Agreement". Please see the LICENSE
 # file that should have been included as part of this package.
 
+import marshal
 import os
 import re
 import sys
 import types
 from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from importlib.machinery import FileFinder, SourceFileLoader
+from importlib.util import MAGIC_NUMBER
 
 from ..localize import _
 from ..utils import EPError
-from .epscompile import epsCompile
+from . import epscompile
+from .epscompile import epsCompile, epsCompileDigest
 from .linetable_calculator import (
     PYCODE_ATTRIBUTES,
     gen_code_options,
@@ -23,6 +27,8 @@ from .linetable_calculator import (
 
 lineno_regex = re.compile(b" *# \\(Line (\\d+)\\) (.+)")
 is_scdb_map = False
+# Header of compiled epScript cache (__epspy__/*.epc), followed by digest
+_EPC_MAGIC = b"EPC\x01" + MAGIC_NUMBER
 
 
 def IsSCDBMap():  # noqa: N802
@@ -99,6 +105,32 @@ def _modify_code_lnotab(codeobj: types.CodeType, ep_lineno_map):
     return codeobj
 
 
+def _epspy_path(path, ext):
+    dirname, filename = os.path.split(path)
+    epsdir = os.path.join(dirname, "__epspy__")
+    if not os.path.isdir(epsdir):
+        os.mkdir(epsdir)
+    return os.path.join(epsdir, os.path.splitext(filename)[0] + ext)
+
+
+def _epc_header(path, file_data):
+    from .. import __version__
+
+    digest = epsCompileDigest(os.path.abspath(path), file_data)
+    return _EPC_MAGIC + __version__.encode("ascii") + b"\0" + digest
+
+
+def _load_cached_code(path, header):
+    try:
+        with open(_epspy_path(path, ".epc"), "rb") as file:
+            cached = file.read()
+        if cached.startswith(header):
+            return marshal.loads(cached[len(header) :])
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    return None
+
+
 class EPSLoader(SourceFileLoader):
     def create_module(self, spec):
         module_name = spec.name
@@ -108,6 +140,32 @@ class EPSLoader(SourceFileLoader):
         sys.modules[module_name] = module
         return module
 
+    def get_code(self, fullname):
+        """Load code object from __epspy__ cache, or compile and cache it.
+
+        Cache is keyed by epScript source, compiler and registered globals,
+        so unchanged modules skip both compilation and linetable rewrite.
+        """
+        global is_scdb_map
+        path = self.get_filename(fullname)
+        with open(path, "rb") as file:
+            file_data = file.read()
+        if "SCDB.eps" in os.path.relpath(path):
+            is_scdb_map = True
+
+        header = _epc_header(path, file_data)
+        codeobj = _load_cached_code(path, header)
+        if codeobj is not None:
+            return codeobj
+
+        codeobj = self.source_to_code(self._compile(path, file_data), path)
+        try:
+            with open(_epspy_path(path, ".epc"), "wb") as file:
+                file.write(header + marshal.dumps(codeobj))
+        except OSError:
+            pass
+        return codeobj
+
     def get_data(self, path):
         """Return the data from path as raw bytes."""
         global is_scdb_map
@@ -117,17 +175,15 @@ class EPSLoader(SourceFileLoader):
                 return file_data
             if "SCDB.eps" in os.path.relpath(path):
                 is_scdb_map = True
-            print(_('[epScript] Compiling "{}"...').format(os.path.relpath(path)))
-            compiled = epsCompile(path, file_data)
+        return self._compile(path, file_data)
+
+    def _compile(self, path, file_data):
+        print(_('[epScript] Compiling "{}"...').format(os.path.relpath(path)))
+        compiled = epsCompile(path, file_data)
         if compiled is None:
             raise EPError(_(" - Compiled failed for {}").format(path))
-        dirname, filename = os.path.split(path)
-        epsdir = os.path.join(dirname, "__epspy__")
         try:
-            if not os.path.isdir(epsdir):
-                os.mkdir(epsdir)
-            ofname = os.path.splitext(filename)[0] + ".py"
-            ofname = os.path.join(epsdir, ofname)
+            ofname = _epspy_path(path, ".py")
             with open(ofname, "w", encoding="utf-8") as file:
                 file.write(compiled.decode("utf-8"))
         except OSError:
@@ -186,3 +242,60 @@ class EPSFinder:
 
 
 sys.meta_path.append(EPSFinder())
+
+
+def _prefetch_init(compiler_state):
+    epscompile._set_compiler_state(*compiler_state)
+
+
+def _prefetch_eps(path):
+    """Compile path into __epspy__ cache. Returns whether it compiled."""
+    fullname = os.path.splitext(os.path.basename(path))[0]
+    try:
+        EPSLoader(fullname, path).get_code(fullname)
+    except EPError:
+        return False  # error is reported again when importing the module
+    return True
+
+
+def EPSPrefetch(directory=".", max_workers=None):  # noqa: N802
+    """Compile .eps files under directory in parallel, before importing them.
+
+    Results are stored in __epspy__ cache, which EPSLoader reads on import.
+    Like any process pool, call it under ``if __name__ == "__main__":``.
+    With ``max_workers=1``, files are compiled in this process instead.
+
+    :returns: Paths of files which failed to compile.
+    """
+    stale = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = (d for d in dirnames if d not in ("__epspy__", "__pycache__"))
+        for filename in filenames:
+            if not filename.endswith(".eps"):
+                continue
+            path = os.path.abspath(os.path.join(dirpath, filename))
+            with open(path, "rb") as file:
+                header = _epc_header(path, file.read())
+            if _load_cached_code(path, header) is None:
+                stale.append(path)
+
+    if max_workers == 1 or len(stale) <= 1:
+        results = [_prefetch_eps(path) for path in stale]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_prefetch_init,
+            initargs=(epscompile._get_compiler_state(),),
+        ) as executor:
+            results = list(executor.map(_prefetch_eps, stale))
+
+    failed = [path for path, ok in zip(stale, results) if not ok]
+    if failed:
+        print(
+            _("[epScript] Failed to compile {} / {} files:").format(
+                len(failed), len(stale)
+            )
+        )
+        for path in failed:
+            print(f" - {os.path.relpath(path)}")
+    return failed
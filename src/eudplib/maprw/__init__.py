@@ -8,7 +8,7 @@ from .injector.apply_injector import PRT_SkipPayloadRelocator
 from .injector.mainloop import EUDDoEvents, EUDOnStart
 from .inlinecode.ilcprocesstrig import PRT_SetInliningRate
 from .loadmap import LoadMap
-from .mpqadd import MPQAddFile, MPQAddWave, MPQCheckFile
+from .mpqadd import CacheMPQAssets, MPQAddFile, MPQAddWave, MPQCheckFile
 from .savemap import SaveMap
 
 __all__ = [
@@ -17,6 +17,7 @@ __all__ = [
     "EUDOnStart",
     "PRT_SetInliningRate",
     "LoadMap",
+    "CacheMPQAssets",
     "MPQAddFile",
     "MPQAddWave",
     "MPQCheckFile",
@@ -42,23 +42,13 @@ def initialize_payload(
     str_padding = -len(str_section) & 3
     payload_offset = 0x191943C8 + len(str_section) + str_padding
 
-    orig_payload = payload.data
-    new_payload = bytearray(orig_payload)
-
-    for prt in payload.prttable:
-        v = ut.b2i4(new_payload[prt : prt + 4])
-        v += payload_offset // 4
-        new_payload[prt : prt + 4] = ut.i2b4(v)
-    for ort in payload.orttable:
-        v = ut.b2i4(new_payload[ort : ort + 4])
-        v += payload_offset
-        new_payload[ort : ort + 4] = ut.i2b4(v)
+    new_payload = payload.relocate(payload_offset)
 
     str_section = str_section + bytes(str_padding) + new_payload
     chkt.setsection(get_string_section_name(), str_section)
 
     if mrgndata is not None:
-        orig_mrgn = chkt.getsection("MRGN")
+        orig_mrgn = chkt.getsectionview("MRGN")
         mrgn_section = []
         for i in range(0, len(orig_mrgn), 4):
             if i % 20 == 16:  # remove name
@@ -136,7 +126,7 @@ def initialize_payload(
 
     # Previous rawtrigger datas
 
-    oldtrigraw = chkt.getsection("TRIG")
+    oldtrigraw = chkt.getsectionview("TRIG")
     oldtrigs = [oldtrigraw[i : i + 2400] for i in range(0, len(oldtrigraw), 2400)]
     proc_trigs = []
 
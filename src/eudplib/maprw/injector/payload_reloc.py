@@ -4,10 +4,14 @@
 # and is released under "MIT License Agreement". Please see the LICENSE
 # file that should have been included as part of this package.
 
+from array import array
+from collections.abc import Iterable
+
 from ... import core as c
 from ... import ctrlstru as cs
 from ... import utils as ut
 from ...core.allocator.pbuffer import Payload
+from ...localize import _
 from ...memio import f_dwread_epd
 
 """ Stage 2 :
@@ -15,11 +19,98 @@ from ...memio import f_dwread_epd
 """
 
 
+# Stride runs shorter than this are cheaper as single offsets
+_MIN_RUN_LENGTH = 3
+
+
+def plan_relocation(table: Iterable[int]) -> tuple[array, array]:
+    """Group relocation offsets into runs of regular stride.
+
+    :param table: Byte offsets of dwords to relocate.
+    :returns: (runs, singles) in dword units. runs is flattened
+        (start, stride, count) triples, and singles are offsets left alone.
+    """
+    epds = sorted(offset // 4 for offset in table)
+    runs, singles = array("I"), array("I")
+    i = 0
+    while i < len(epds):
+        j = i + 1
+        if j < len(epds):
+            stride = epds[j] - epds[i]
+            while j + 1 < len(epds) and epds[j + 1] - epds[j] == stride:
+                j += 1
+            j += 1
+        count = j - i
+        if count >= _MIN_RUN_LENGTH:
+            runs.extend((epds[i], stride, count))
+            i = j
+        else:
+            singles.append(epds[i])
+            i += 1
+    return runs, singles
+
+
+def _relocate_singles(
+    orig_payload: c.Db, singles: array, value: c.ConstExpr | int
+) -> None:
+    singledb = c.Db(singles.tobytes())
+    n = c.EUDVariable()
+    n << len(singles)
+    if cs.EUDWhile()(n >= 1):
+        n += ut.EPD(singledb) - 1
+        epd, dst = f_dwread_epd(n), c.Forward()
+        c.VProc(
+            epd,
+            [
+                n.SubtractNumber(ut.EPD(singledb)),
+                epd.AddNumber(ut.EPD(orig_payload)),
+                epd.SetDest(ut.EPD(dst) + 4),
+            ],
+        )
+        cs.DoActions(dst << c.SetDeaths(0, c.Add, value, 0))
+    cs.EUDEndWhile()
+
+
+def _relocate_runs(
+    orig_payload: c.Db, runs: array, value: c.ConstExpr | int
+) -> None:
+    rundb = c.Db(runs.tobytes())
+    n, run = c.EUDVariable(), c.EUDVariable()
+    n << len(runs) // 3
+    run << ut.EPD(rundb)
+    if cs.EUDWhile()(n >= 1):
+        epd, stride = f_dwread_epd(run), f_dwread_epd(run + 1)
+        count = f_dwread_epd(run + 2)
+        cs.DoActions(
+            n.SubtractNumber(1),
+            run.AddNumber(3),
+            epd.AddNumber(ut.EPD(orig_payload)),
+        )
+        if cs.EUDWhile()(count >= 1):
+            dst = c.Forward()
+            c.VProc(epd, [count.SubtractNumber(1), epd.SetDest(ut.EPD(dst) + 4)])
+            cs.DoActions(dst << c.SetDeaths(0, c.Add, value, 0))
+            epd += stride
+        cs.EUDEndWhile()
+    cs.EUDEndWhile()
+
+
 def create_payload_relocator(payload: Payload) -> Payload:
     # We first build code injector.
-    prtdb = c.Db(b"".join([ut.i2b4(x // 4) for x in payload.prttable]))
-    ortdb = c.Db(b"".join([ut.i2b4(x // 4) for x in payload.orttable]))
-    n = c.EUDVariable()
+    prtruns, prtsingles = plan_relocation(payload.prttable)
+    ortruns, ortsingles = plan_relocation(payload.orttable)
+    table_size = 4 * (len(payload.prttable) + len(payload.orttable))
+    planned_size = 4 * (
+        len(prtruns) + len(prtsingles) + len(ortruns) + len(ortsingles)
+    )
+    print(
+        _(" - Relocation table: {} -> {} bytes ({} runs, {} single offsets)").format(
+            table_size,
+            planned_size,
+            (len(prtruns) + len(ortruns)) // 3,
+            len(prtsingles) + len(ortsingles),
+        )
+    )
 
     orig_payload = c.Db(payload.data)
 
@@ -31,38 +122,16 @@ def create_payload_relocator(payload: Payload) -> Payload:
         # should be able to penetrate through this very easily
 
         # init prt
-        if payload.prttable:
-            n << len(payload.prttable)
-            if cs.EUDWhile()(n >= 1):
-                n += ut.EPD(prtdb) - 1
-                epd, dst = f_dwread_epd(n), c.Forward()
-                c.VProc(
-                    epd,
-                    [
-                        n.SubtractNumber(ut.EPD(prtdb)),
-                        epd.AddNumber(ut.EPD(orig_payload)),
-                        epd.SetDest(ut.EPD(dst) + 4),
-                    ],
-                )
-                cs.DoActions(dst << c.SetDeaths(0, c.Add, orig_payload // 4, 0))
-            cs.EUDEndWhile()
+        if prtruns:
+            _relocate_runs(orig_payload, prtruns, orig_payload // 4)
+        if prtsingles:
+            _relocate_singles(orig_payload, prtsingles, orig_payload // 4)
 
         # init ort
-        if payload.orttable:
-            n << len(payload.orttable)
-            if cs.EUDWhile()(n >= 1):
-                n += ut.EPD(ortdb) - 1
-                epd, dst = f_dwread_epd(n), c.Forward()
-                c.VProc(
-                    epd,
-                    [
-                        n.SubtractNumber(ut.EPD(ortdb)),
-                        epd.AddNumber(ut.EPD(orig_payload)),
-                        epd.SetDest(ut.EPD(dst) + 4),
-                    ],
-                )
-                cs.DoActions(dst << c.SetDeaths(0, c.Add, orig_payload, 0))
-            cs.EUDEndWhile()
+        if ortruns:
+            _relocate_runs(orig_payload, ortruns, orig_payload)
+        if ortsingles:
+            _relocate_singles(orig_payload, ortsingles, orig_payload)
 
         # Jump
         c.SetNextTrigger(orig_payload)
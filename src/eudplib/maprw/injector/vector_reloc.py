@@ -200,7 +200,7 @@ def create_vector_relocator(chkt: CHK, payload: Payload) -> None:
     for b1, b2 in zip(mrgn_trigger_prt, mrgn_trigger_ort):
         mrgn_trigger.append(b1 ^ b2)
 
-    oldmrgnraw = chkt.getsection("MRGN")
+    oldmrgnraw = chkt.getsectionview("MRGN")
     mrgn_section = bytes(mrgn_trigger) + oldmrgnraw[2408 + 836 :]
     if len(mrgn_section) != 5100:
         raise RuntimeError(_("MRGN section size bug"))
@@ -271,7 +271,7 @@ def create_vector_relocator(chkt: CHK, payload: Payload) -> None:
 
     # Previous rawtrigger datas
 
-    oldtrigraw = chkt.getsection("TRIG")
+    oldtrigraw = chkt.getsectionview("TRIG")
     oldtrigs = [oldtrigraw[i : i + 2400] for i in range(0, len(oldtrigraw), 2400)]
     proc_trigs = []
 
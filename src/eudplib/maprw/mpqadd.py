@@ -3,14 +3,19 @@
 # This file is part of EUD python library (eudplib),
 # and is released under "MIT License Agreement". Please see the LICENSE
 # file that should have been included as part of this package.
+
+import hashlib
 import os
-from tempfile import NamedTemporaryFile
 
 from .. import utils as ut
 from ..bindings._rust import mpqapi
 from ..localize import _
 
 _addedFiles: dict[bytes, tuple[str, str | bytes | bytearray | None, bool]] = {}  # noqa: N816
+_asset_cache: str | None = None
+_asset_cache_limit = 4
+# bump when flags or compression of added files change
+_ASSET_CACHE_FORMAT = b"eudplib-mpq-assets:1:compress|encrypted:zlib"
 
 
 def update_filelist_by_listfile(mpqr: mpqapi.MPQ) -> None:
@@ -90,39 +95,93 @@ def MPQAddWave(fname: str, path_or_content: str | bytes | bytearray | None) -> N
     MPQAddFile(fname, path_or_content, True)
 
 
-def _update_mpq(mpqw: mpqapi.MPQ) -> None:
-    """Really append additional mpq file to mpq file.
+def CacheMPQAssets(directory: str | None, max_archives: int = 4) -> None:  # noqa: N802
+    """Set cache directory for compressed files of output map.
 
-    `MPQAddFile` queues addition, and _update_mpq really adds them.
+    :param directory: Directory to keep archives of base map with the files
+    from `MPQAddFile` already compressed in. If the base map, the added files
+    and the sector size are unchanged since a previous build, the archive is
+    copied instead of compressing every file again. If None, disable it.
+    :param max_archives: Number of archives kept in the directory. Least
+    recently used archives are removed when a new one is cached.
     """
+    global _asset_cache, _asset_cache_limit
+    ut.ep_assert(
+        directory is None or isinstance(directory, str),
+        _("Invalid type") + f": {directory}",
+    )
+    ut.ep_assert(
+        isinstance(max_archives, int) and max_archives >= 1,
+        _("Invalid type") + f": {max_archives}",
+    )
+    _asset_cache = directory
+    _asset_cache_limit = max_archives
 
-    count = mpqw.get_max_file_count()
-    if count < len(_addedFiles):  # need to increase max file count
-        max_count = max(1024, 1 << (len(_addedFiles)).bit_length())
-        try:
-            mpqw.set_max_file_count(max_count)
-        except Exception as e:
-            raise ut.EPError(_("Failed to increase max file limit")) from e
 
-    for fname, path_or_content, is_wav in _addedFiles.values():
+def _asset_cache_path(base_map: str | bytes, sector_size: int | None) -> str | None:
+    """Path of cached archive for base map and added files."""
+    if _asset_cache is None:
+        return None
+
+    def digest(path_or_content: str | bytes | bytearray) -> bytes:
+        if isinstance(path_or_content, str):
+            with open(path_or_content, "rb") as file:
+                path_or_content = file.read()
+        return hashlib.sha256(path_or_content).digest()
+
+    key = hashlib.sha256(_ASSET_CACHE_FORMAT)
+    key.update(f"{sector_size}".encode())
+    key.update(digest(base_map))
+    for fname, path_or_content, _is_wav in _addedFiles.values():
         if path_or_content is None:
             continue
+        key.update(fname.encode("utf-8") + b"\0")
+        key.update(digest(path_or_content))
+
+    os.makedirs(_asset_cache, exist_ok=True)
+    cache_path = os.path.join(_asset_cache, key.hexdigest() + ".mpq")
+    if os.path.isfile(cache_path):
+        os.utime(cache_path)  # mark as recently used
+    return cache_path
+
+
+def _evict_asset_cache() -> None:
+    """Remove least recently used archives over the limit."""
+    if _asset_cache is None:
+        return
+    archives = []
+    for entry in os.scandir(_asset_cache):
+        if entry.is_file() and entry.name.endswith(".mpq"):
+            archives.append((entry.stat().st_mtime, entry.path))
+    archives.sort(reverse=True)
+    for _mtime, path in archives[_asset_cache_limit:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # in use by another build
 
-        if isinstance(path_or_content, str):
-            file_path = path_or_content
-        else:
-            # Create temporary file
-            f = NamedTemporaryFile(delete=False)
-            f.write(bytes(path_or_content))
-            file_path = f.name
-            f.close()
 
-        try:
-            mpqw.add_file(fname, file_path)
-        except Exception as e:
-            raise ut.EPError(
-                _("Failed adding file {} to mpq: May be duplicate").format(fname)
-            ) from e
-
-        if not isinstance(path_or_content, str):
-            os.unlink(file_path)
+def _update_mpq(mpqw: mpqapi.MPQ) -> None:
+    """Really append additional mpq file to mpq file.
+
+    `MPQAddFile` queues addition, and _update_mpq really adds them.
+    """
+
+    files = [
+        (fname, path_or_content)
+        for fname, path_or_content, _is_wav in _addedFiles.values()
+        if path_or_content is not None
+    ]
+    # hash table is resized once, and files are written back to back
+    try:
+        mpqw.add_files(files, len(_addedFiles))
+    except mpqapi.MPQFileError as e:
+        raise ut.EPError(
+            _("Failed adding file {} to mpq: May be duplicate").format(
+                e.archived_name
+            )
+        ) from e
+    except Exception as e:
+        raise ut.EPError(
+            _("Failed adding file {} to mpq: May be duplicate").format(e)
+        ) from e
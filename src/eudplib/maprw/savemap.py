@@ -5,12 +5,14 @@
 # file that should have been included as part of this package.
 
 import binascii
+import functools
 import os
-import tempfile
+import shutil
 from collections.abc import Callable
 
 from ..bindings._rust import mpqapi
 from ..core import RegisterCreatePayloadCallback
+from ..core.allocator import payload
 from ..core.eudfunc.trace.tracetool import _get_trace_map, _reset_trace_map
 from ..core.mapdata import fixmapdata, mapdata
 from ..localize import _
@@ -18,7 +20,7 @@ from ..utils import EPError
 from .injector.apply_injector import apply_injector
 from .injector.mainloop import main_starter
 from .inlinecode.ilcprocesstrig import _preprocess_inline_code
-from .mpqadd import _update_mpq
+from .mpqadd import _asset_cache_path, _evict_asset_cache, _update_mpq
 
 trace_header = None
 trace_map = []
@@ -38,6 +40,60 @@ def get_trace_map() -> None:
 RegisterCreatePayloadCallback(get_trace_map)
 
 
+def _permission_error() -> EPError:
+    return EPError(
+        _(
+            "You lack permission to access the output map"
+            "\n"
+            "Try turning off antivirus or StarCraft"
+        )
+    )
+
+
+def _clone_base_map(path: str, input_path: str, sector_size: int) -> mpqapi.MPQ:
+    # need to remove old file first because SFileCreateArchive2 does
+    # not overwrite file and instead raise ERROR_ALREADY_EXISTS error
+    if os.path.isfile(path):
+        try:
+            os.remove(path)
+        except PermissionError as e:
+            raise _permission_error() from e
+
+    try:
+        # scenario.chk is left out so that fake one does not leave a hole
+        mw = mpqapi.MPQ.clone_with_sector_size(
+            input_path, path, sector_size, ["staredit\\scenario.chk"]
+        )
+    except Exception as e:
+        raise EPError(_("Fail to access output map")) from e
+
+    # add fake staredit\scenario.chk
+    mw.set_file_locale(0)
+    try:
+        mw.add_file_from_bytes("staredit\\scenario.chk", b"")
+    except Exception as e:
+        raise EPError(_("Fail to add scenario.chk")) from e
+    return mw
+
+
+def _copy_base_map(path: str, rawfile: bytes) -> mpqapi.MPQ:
+    # Process by modifying existing mpqfile
+    try:
+        with open(path, "wb") as file:
+            file.write(rawfile)
+    except PermissionError as e:
+        raise _permission_error() from e
+    except Exception as e:
+        raise EPError(_("Fail to access output map")) from e
+
+    try:
+        mw = mpqapi.MPQ.open(path)
+    except Exception as e:
+        raise EPError(_("Fail to access output map")) from e
+    mw.set_file_locale(0)
+    return mw
+
+
 def SaveMap(fname: str, rootf: Callable, *, sector_size: int | None = None) -> None:  # noqa: N802
     """Save output map with root function.
 
@@ -65,80 +121,61 @@ def SaveMap(fname: str, rootf: Callable, *, sector_size: int | None = None) -> N
 
         if _load_map_path is None:
             raise EPError(_("Must use LoadMap first"))
-
-        # need to remove old file first because SFileCreateArchive2 does
-        # not overwrite file and instead raise ERROR_ALREADY_EXISTS error
-        if os.path.isfile(fname):
-            try:
-                os.remove(fname)
-            except PermissionError as e:
-                raise EPError(
-                    _(
-                        "You lack permission to access the output map"
-                        "\n"
-                        "Try turning off antivirus or StarCraft"
-                    )
-                ) from e
-
-        try:
-            mw = mpqapi.MPQ.clone_with_sector_size(
-                _load_map_path, fname, sector_size
-            )
-        except Exception as e:
-            raise EPError(_("Fail to access output map")) from e
-
-        # add fake staredit\scenario.chk
-        mw.set_file_locale(0)
-        f = tempfile.NamedTemporaryFile(delete=False)
-        f.write(b"")
-        chk_path = f.name
-        f.close()
-        try:
-            mw.add_file("staredit\\scenario.chk", chk_path)
-        except Exception as e:
-            raise EPError(_("Fail to add scenario.chk")) from e
-        os.unlink(chk_path)
-        mw.set_file_locale(0x409)
-
+        base_map: str | bytes = _load_map_path
+        write_base_map = functools.partial(
+            _clone_base_map, input_path=_load_map_path, sector_size=sector_size
+        )
+    else:
+        sector_size = None
+        base_map = mapdata.GetRawFile()
+        write_base_map = functools.partial(_copy_base_map, rawfile=base_map)
+
+    # base map and added files, without scenario.chk
+    cache_path = _asset_cache_path(base_map, sector_size)
+    if cache_path is None:
+        mw = write_base_map(fname)
+        _update_mpq(mw)
     else:
-        # Process by modifying existing mpqfile
+        if not os.path.isfile(cache_path):
+            temp_path = cache_path + ".tmp"
+            cache_mw = write_base_map(temp_path)
+            _update_mpq(cache_mw)
+            # copies of the archive inherit its holes
+            if cache_mw.stale_size:
+                try:
+                    cache_mw.compact()
+                except Exception as e:
+                    raise EPError(_("Fail to compact MPQ")) from e
+            cache_mw.close()
+            os.replace(temp_path, cache_path)
+            _evict_asset_cache()
         try:
-            with open(fname, "wb") as file:
-                file.write(mapdata.GetRawFile())
+            shutil.copyfile(cache_path, fname)
         except PermissionError as e:
-            raise EPError(
-                _(
-                    "You lack permission to access the output map"
-                    "\n"
-                    "Try turning off antivirus or StarCraft"
-                )
-            ) from e
+            raise _permission_error() from e
         except Exception as e:
             raise EPError(_("Fail to access output map")) from e
-
         try:
             mw = mpqapi.MPQ.open(fname)
         except Exception as e:
             raise EPError(_("Fail to access output map")) from e
 
     # add real staredit\scenario.chk
-    f = tempfile.NamedTemporaryFile(delete=False)
-    f.write(bytes(rawchk))
-    chk_path = f.name
-    f.close()
+    if sector_size is not None:
+        mw.set_file_locale(0x409)
     try:
-        mw.add_file("staredit\\scenario.chk", chk_path)
+        mw.add_file_from_bytes("staredit\\scenario.chk", rawchk)
     except Exception as e:
         raise EPError(_("Fail to add scenario.chk")) from e
-    os.unlink(chk_path)
     mw.set_file_locale(0)
 
-    _update_mpq(mw)
-    try:
-        mw.compact()
-    except Exception as e:
-        raise EPError(_("Fail to compact MPQ")) from e
-    del mw
+    # cloned archive has no hole to compact
+    if mw.stale_size:
+        try:
+            mw.compact()
+        except Exception as e:
+            raise EPError(_("Fail to compact MPQ")) from e
+    mw.close()
 
     if trace_map:
         trace_fname = fname + ".epmap"
@@ -150,3 +187,10 @@ def SaveMap(fname: str, rootf: Callable, *, sector_size: int | None = None) -> N
             wf.write(f"H1: {binascii.hexlify(trace_header[1]).decode('ascii')}\n")
             for k, v in trace_map:
                 wf.write(f" - {k:08X} : {v}\n")
+
+    if payload._build_profile is not None:
+        usage_fname = fname + ".epusage"
+        print(_("Writing payload usage report to {}").format(usage_fname))
+        payload._write_usage_report(usage_fname)
+    # EUDFuncs compiled for next build are counted afresh
+    payload._reset_build_stats()
@@ -16,7 +16,7 @@ from ...core import (
     EncodeTBL,
     EUDVariable,
 )
-from ...core.rawtrigger.strdict import DefRankDict, DefSfxDataDict
+from ...core.rawtrigger import strdict
 from ...core.rawtrigger.strenc import _EncodeAny
 from ...utils import ep_assert, unProxy
 
@@ -443,7 +443,7 @@ class RankKind(ByteKind):
         return _EncodeAny(
             "rank",
             lambda s: {}[s],
-            DefRankDict,
+            strdict.DefRankDict,
             other,
         )
 
@@ -567,7 +567,7 @@ class SfxDataKind(WordKind):
         return _EncodeAny(
             "sfxdata.dat",
             lambda s: {}[s],
-            DefSfxDataDict,
+            strdict.DefSfxDataDict,
             other,
         )
 
@@ -10,7 +10,7 @@ from ..ctrlstru import (
     EUDInfLoop,
 )
 from ..memio.rwcommon import br1, bw1
-from .cp949_table import cp949_table
+from .cp949_table import get_cp949_table
 
 """
 KSC5601 -> Unicode 2.0 mapping table, compressed for the 94*94 codeset.
@@ -27,10 +27,7 @@ index (n-33)*94+m-33.
 @EUDFunc
 def f_cp949_to_utf8_cpy(dst, src):
     # Create conversion table
-    cvtb = [0] * 65536
-    for (ch1, ch2), tab in cp949_table:
-        cvtb[ch1 + ch2 * 256] = tab
-    cvtb = EUDArray(cvtb)
+    cvtb = EUDArray(get_cp949_table().tolist())
 
     br1.seekoffset(src)
     bw1.seekoffset(dst)
@@ -152,6 +152,46 @@ impl Archive {
         Ok(())
     }
 
+    /// Adds a file to MPQ archive from memory, without going through the disk
+    pub fn add_file_from_bytes(
+        &mut self,
+        data: &[u8],
+        archived_name: &str,
+        replace_existing: bool,
+    ) -> Result<()> {
+        let carchived_name = CString::new(archived_name)?;
+        let flags = if replace_existing {
+            MPQ_FILE_COMPRESS | MPQ_FILE_ENCRYPTED | MPQ_FILE_REPLACEEXISTING
+        } else {
+            MPQ_FILE_COMPRESS | MPQ_FILE_ENCRYPTED
+        };
+        let mut file_handle: HANDLE = ptr::null_mut();
+        unsafe_try_call!(SFileCreateFile(
+            self.handle,
+            carchived_name.as_ptr(),
+            0,
+            data.len() as DWORD,
+            SFileGetLocale(),
+            flags,
+            &mut file_handle as *mut HANDLE
+        ));
+        let written = unsafe {
+            SFileWriteFile(
+                file_handle,
+                data.as_ptr() as *const c_void,
+                data.len() as DWORD,
+                MPQ_COMPRESSION_ZLIB,
+            )
+        };
+        let write_error = unsafe { GetLastError() };
+        // File handle is freed by SFileFinishFile even if writing failed
+        unsafe_try_call!(SFileFinishFile(file_handle));
+        if !written {
+            return Err(From::from(ErrorCode(write_error)));
+        }
+        Ok(())
+    }
+
     /// Gets the limit for number of files that can be stored in the MPQ archive.
     pub fn get_max_file_count(&mut self) -> u32 {
         unsafe { SFileGetMaxFileCount(self.handle) }
@@ -239,6 +279,31 @@ impl<'a> File<'a> {
         }
         Ok(buf)
     }
+
+    /// Reads data from the start of the file into `buf`, up to its length
+    pub fn read_into(&mut self, buf: &mut [u8]) -> Result<usize> {
+        if self.need_reset {
+            unsafe {
+                if SFileSetFilePointer(self.file_handle, 0, ptr::null_mut(), 0)
+                    == SFILE_INVALID_SIZE
+                {
+                    return Err(From::from(ErrorCode(GetLastError())));
+                }
+            }
+        }
+
+        let size = self.get_size()?.min(buf.len() as u64);
+        let mut read: DWORD = 0;
+        self.need_reset = true;
+        unsafe_try_call!(SFileReadFile(
+            self.file_handle,
+            mem::transmute(buf.as_mut_ptr()),
+            size as u32,
+            &mut read as *mut DWORD,
+            ptr::null_mut(),
+        ));
+        Ok(read as usize)
+    }
 }
 
 impl<'a> Drop for File<'a> {
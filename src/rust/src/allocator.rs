@@ -1,7 +1,9 @@
 pub(crate) mod constexpr;
 mod payload;
 mod pbuffer;
+mod placement;
 pub(crate) mod rlocint;
+mod trgfields;
 
 use pyo3::prelude::*;
 
@@ -11,9 +13,11 @@ pub(crate) mod allocator_mod {
     #[pymodule_export]
     use super::constexpr::{evaluate, is_constexpr, Forward, PyConstExpr};
     #[pymodule_export]
-    use super::payload::{ObjAllocator, PayloadBuilder};
+    use super::payload::{ObjAllocator, ObjCollector, PayloadBuilder};
     #[pymodule_export]
-    use super::pbuffer::PayloadBuffer;
+    use super::pbuffer::{relocate_payload, PayloadBuffer};
     #[pymodule_export]
     use super::rlocint::{py_rlocint, to_rlocint, PyRlocInt};
+    #[pymodule_export]
+    use super::trgfields::TrgFields;
 }
@@ -1,28 +1,113 @@
+use crate::allocator::constexpr::evaluate;
 use crate::allocator::pbuffer::PayloadBuffer;
+use crate::allocator::placement::{
+    load_placements, occupied_runs, save_placements, stack_objects, ObjDigest,
+};
 use crate::allocator::rlocint::{PyRlocInt, RlocInt};
+use crate::allocator::trgfields::TrgFields;
 use indicatif::{ProgressBar, ProgressStyle};
 use pyo3::create_exception;
 use pyo3::intern;
 use pyo3::prelude::*;
-use pyo3::types::{PyBytes, PyDict, PyTuple};
+use pyo3::types::{PyBytes, PyDict, PyInt, PyIterator, PyList, PyTuple};
+use std::collections::{HashMap, HashSet};
+use std::path::PathBuf;
+use std::time::Instant;
 
 create_exception!(allocator, AllocError, pyo3::exceptions::PyException);
 
+/// Object having PayloadBuffer-like interfaces. Collects all objects by
+/// calling object.CollectDependency() for every related objects.
+#[pyclass(module = "eudplib.core.allocator")]
+pub struct ObjCollector;
+
+#[pymethods]
+impl ObjCollector {
+    #[new]
+    fn new() -> Self {
+        Self
+    }
+
+    #[allow(non_snake_case)]
+    fn StartWrite(&self) {}
+
+    #[allow(non_snake_case)]
+    fn EndWrite(&self) {}
+
+    #[allow(non_snake_case)]
+    fn WriteByte(&self, _number: &Bound<'_, PyAny>) {}
+
+    #[allow(non_snake_case)]
+    fn WriteWord(&self, _number: &Bound<'_, PyAny>) {}
+
+    #[allow(non_snake_case)]
+    fn WriteDword(&self, obj: &Bound<'_, PyAny>) -> PyResult<()> {
+        if !obj.is_instance_of::<PyInt>() {
+            evaluate(obj)?;
+        }
+        Ok(())
+    }
+
+    #[allow(non_snake_case)]
+    fn WritePack(&self, _structformat: &str, arglist: &Bound<'_, PyList>) -> PyResult<()> {
+        for arg in arglist.iter() {
+            if !arg.is_instance_of::<PyInt>() {
+                evaluate(&arg)?;
+            }
+        }
+        Ok(())
+    }
+
+    #[allow(non_snake_case)]
+    fn WriteBytes(&self, _b: &Bound<'_, PyAny>) {}
+
+    #[allow(non_snake_case)]
+    fn WriteSpace(&self, _spacesize: usize) {}
+}
+
+/// Unresolved value recorded while allocating, patched in writing phase.
+pub(crate) struct RecordSlot {
+    pub(crate) offset: usize,
+    pub(crate) size: usize,
+    pub(crate) expr: PyObject,
+}
+
+/// Output of WritePayload recorded in allocating phase.
+///
+/// Only bytes in occupied dwords are kept: `runs` are (object offset, length,
+/// offset in PayloadBuilder.record_data) of each occupied dword run.
+pub(crate) struct ObjRecord {
+    pub(crate) runs: Vec<(usize, usize, usize)>,
+    pub(crate) slots: Vec<RecordSlot>,
+}
+
 /// Object having PayloadBuffer-like interfaces. Collects all objects by
 /// calling object.WritePayload() for every related object.
+///
+/// In recording mode, written constants and unresolved expressions are kept
+/// so that the object does not need to be written again.
 #[pyclass(module = "eudplib.core.allocator")]
 pub struct ObjAllocator {
     suboccupmap: bool,
     suboccupidx: u32,
     occupmap: Vec<i32>,
+    // Recording mode
+    record: bool,
+    recordable: bool,
+    image: Vec<u8>,
+    slots: Vec<RecordSlot>,
 }
 
 impl ObjAllocator {
-    fn new() -> Self {
+    fn new(record: bool) -> Self {
         Self {
             suboccupmap: false,
             suboccupidx: 0,
             occupmap: Vec::new(),
+            record,
+            recordable: record,
+            image: Vec::new(),
+            slots: Vec::new(),
         }
     }
 
@@ -30,6 +115,9 @@ impl ObjAllocator {
         self.suboccupmap = false;
         self.suboccupidx = 0;
         self.occupmap.clear();
+        self.recordable = self.record;
+        self.image.clear();
+        self.slots.clear();
     }
 
     fn end_write(&mut self) -> Vec<i32> {
@@ -40,6 +128,17 @@ impl ObjAllocator {
         std::mem::take(&mut self.occupmap)
     }
 
+    /// Take recorded output. None if the object could not be recorded.
+    fn end_record(&mut self) -> Option<(Vec<u8>, Vec<RecordSlot>)> {
+        if !self.recordable {
+            return None;
+        }
+        Some((
+            std::mem::take(&mut self.image),
+            std::mem::take(&mut self.slots),
+        ))
+    }
+
     fn push(&mut self, suboccupmap: bool) {
         self.occupmap.push(if !suboccupmap {
             -1
@@ -70,28 +169,117 @@ impl ObjAllocator {
             self.suboccupmap = false;
         }
     }
+
+    fn occup_space(&mut self, ssize: u32) {
+        self.suboccupidx += ssize;
+        if self.suboccupidx >= 4 {
+            self.push(self.suboccupmap);
+            self.suboccupidx -= 4;
+            for _ in 0..(self.suboccupidx / 4) {
+                self.push(false);
+            }
+            self.suboccupidx %= 4;
+            self.suboccupmap = false;
+        }
+    }
+
+    /// Value to record at image offset `at`; expressions are left to slots.
+    fn record_value_at(
+        &mut self,
+        at: usize,
+        number: &Bound<'_, PyAny>,
+        size: usize,
+    ) -> PyResult<i32> {
+        Ok(if number.is_instance_of::<PyInt>() {
+            number.extract::<i64>()? as i32
+        } else if let Ok(rlocint) = number.extract::<PyRlocInt>() {
+            // Already evaluated with allocating phase address; can't record.
+            if rlocint.0.rlocmode != 0 {
+                self.recordable = false;
+            }
+            rlocint.0.offset
+        } else {
+            self.slots.push(RecordSlot {
+                offset: at,
+                size,
+                expr: number.clone().unbind(),
+            });
+            0
+        })
+    }
+
+    fn record_value(&mut self, number: &Bound<'_, PyAny>, size: usize) -> PyResult<()> {
+        if !self.recordable {
+            return Ok(());
+        }
+        let offset = self.record_value_at(self.image.len(), number, size)?;
+        self.image.extend_from_slice(&offset.to_le_bytes()[..size]);
+        Ok(())
+    }
+
+    fn record_fields(&mut self, py: Python, fields: &TrgFields) -> PyResult<()> {
+        if !self.recordable {
+            return Ok(());
+        }
+        let base = self.image.len();
+        self.image.extend_from_slice(fields.bytes());
+        for (offset, size, expr) in fields.exprs() {
+            let value = self.record_value_at(base + offset, expr.bind(py), size)?;
+            self.image[base + offset..base + offset + size]
+                .copy_from_slice(&value.to_le_bytes()[..size]);
+        }
+        Ok(())
+    }
+
+    fn record_bytes(&mut self, b: &[u8]) {
+        if self.recordable {
+            self.image.extend_from_slice(b);
+        }
+    }
+
+    fn record_space(&mut self, ssize: usize) {
+        if self.recordable {
+            self.image.resize(self.image.len() + ssize, 0);
+        }
+    }
+
+    fn record_pack(&mut self, structformat: &str, arglist: &Bound<'_, PyList>) -> PyResult<()> {
+        for (b, number) in structformat.bytes().zip(arglist.iter()) {
+            let argsize = match b {
+                66 => 1, // 'B'
+                72 => 2, // 'H'
+                73 => 4, // 'I'
+                _ => panic!("Unknown struct format: {b}"),
+            };
+            self.record_value(&number, argsize)?;
+        }
+        Ok(())
+    }
 }
 
 #[pymethods]
 impl ObjAllocator {
     #[allow(non_snake_case)]
-    fn WriteByte(&mut self, _number: &Bound<'_, PyAny>) {
+    fn WriteByte(&mut self, number: &Bound<'_, PyAny>) -> PyResult<()> {
         self.occup1();
+        self.record_value(number, 1)
     }
 
     #[allow(non_snake_case)]
-    fn WriteWord(&mut self, _number: &Bound<'_, PyAny>) {
+    fn WriteWord(&mut self, number: &Bound<'_, PyAny>) -> PyResult<()> {
         self.occup1();
         self.occup1();
+        self.record_value(number, 2)
     }
 
     #[allow(non_snake_case)]
-    fn WriteDword(&mut self, _number: &Bound<'_, PyAny>) {
+    fn WriteDword(&mut self, number: &Bound<'_, PyAny>) -> PyResult<()> {
         self.push(true);
+        self.record_value(number, 4)
     }
 
     #[allow(non_snake_case)]
-    fn WritePack(&mut self, structformat: &str, _arglist: &Bound<'_, PyAny>) {
+    fn WritePack(&mut self, structformat: &str, arglist: &Bound<'_, PyAny>) -> PyResult<()> {
         let ssize: u32 = structformat
             .bytes()
             .map(|x| match x {
@@ -108,6 +296,10 @@ impl ObjAllocator {
         for _ in 0..(ssize & 3) {
             self.occup1();
         }
+        if self.recordable {
+            self.record_pack(structformat, arglist.downcast()?)?;
+        }
+        Ok(())
     }
 
     #[allow(non_snake_case)]
@@ -120,24 +312,20 @@ impl ObjAllocator {
         for _ in 0..(ssize & 3) {
             self.occup1();
         }
+        self.record_bytes(b.as_bytes());
         Ok(())
     }
 
     #[allow(non_snake_case)]
     fn WriteSpace(&mut self, ssize: u32) {
-        self.suboccupidx += ssize;
-        if self.suboccupidx >= 4 {
-            self.push(self.suboccupmap);
-            self.suboccupidx -= 4;
-            for _ in 0..(self.suboccupidx / 4) {
-                self.push(false);
-            }
-            self.suboccupidx %= 4;
-            self.suboccupmap = false;
-        }
+        self.occup_space(ssize);
+        self.record_space(ssize as usize);
     }
 
     fn _write_trigger(&mut self, conditions: u32, actions: u32) {
+        // Trigger fields are not given; fall back to WritePayload on writing.
+        self.recordable = false;
+
         self.push(true); // prevptr
         self.push(true); // nextptr
 
@@ -149,7 +337,7 @@ impl ObjAllocator {
             for _ in 0..5 {
                 self.push(true);
             }
-            self.WriteSpace(20 * (15 - conditions));
+            self.occup_space(20 * (15 - conditions));
         }
 
         // Actions
@@ -160,66 +348,111 @@ impl ObjAllocator {
             for _ in 0..8 {
                 self.push(true);
             }
-            self.WriteSpace(32 * (63 - actions));
+            self.occup_space(32 * (63 - actions));
         }
 
         // Preserved flag
         self.push(true);
 
-        self.WriteSpace(27);
+        self.occup_space(27);
         self.occup1();
     }
-}
 
-fn stack_objects(dwoccupmap_list: Vec<Vec<i32>>) -> (Vec<u32>, usize) {
-    let mut dwoccupmap_sum = vec![-1; dwoccupmap_list.iter().map(Vec::len).sum()];
-    let mut alloctable = Vec::with_capacity(dwoccupmap_sum.len());
-    let mut lallocaddr = 0;
-    let mut payload_size = 0;
-
-    for dwoccupmap in dwoccupmap_list {
-        // Find the appropriate position to allocate an object
-        let mut i = 0;
-        while i < dwoccupmap.len() {
-            // Update on conflict map
-            if dwoccupmap[i] != -1 && dwoccupmap_sum[lallocaddr + i] != -1 {
-                lallocaddr = (dwoccupmap_sum[lallocaddr + i] - dwoccupmap[i]) as usize;
-                i = 0;
+    fn _record_trigger(
+        &mut self,
+        prevptr: &Bound<'_, PyAny>,
+        nextptr: &Bound<'_, PyAny>,
+        conditions: &Bound<'_, PyIterator>,
+        actions: &Bound<'_, PyIterator>,
+        flags: &Bound<'_, PyAny>,
+    ) -> PyResult<()> {
+        self.record_value(prevptr, 4)?;
+        self.record_value(nextptr, 4)?;
+
+        // Conditions
+        let mut condition_count = 0;
+        for condition in conditions {
+            let condition = condition?;
+            if let Ok(fields) = condition.downcast::<TrgFields>() {
+                self.record_fields(condition.py(), &fields.borrow())?;
             } else {
-                i += 1;
+                self.record_pack("IIIHBBBBH", condition.downcast()?)?;
             }
+            condition_count += 1;
+        }
+        if condition_count < 16 {
+            self.record_bytes(&[0; 20]);
+            self.record_space(20 * (15 - condition_count as usize));
         }
 
-        // Apply occupation map
-        for (i, &occup) in dwoccupmap.iter().enumerate().rev() {
-            let curoff = lallocaddr + i;
-            if occup != -1 || dwoccupmap_sum[curoff] != -1 {
-                dwoccupmap_sum[curoff] = if dwoccupmap_sum[curoff + 1] == -1 {
-                    curoff as i32 + 1
-                } else {
-                    dwoccupmap_sum[curoff + 1]
-                };
+        // Actions
+        let mut action_count = 0;
+        for action in actions {
+            let action = action?;
+            if let Ok(fields) = action.downcast::<TrgFields>() {
+                self.record_fields(action.py(), &fields.borrow())?;
+            } else {
+                self.record_pack("IIIIIIHBBBBH", action.downcast()?)?;
             }
+            action_count += 1;
         }
-        alloctable.push((lallocaddr * 4) as u32);
-
-        let obj_size = lallocaddr + dwoccupmap.len();
-        let obj_payload_size = obj_size * 4;
-        if obj_payload_size > payload_size {
-            payload_size = obj_payload_size;
+        if action_count < 64 {
+            self.record_bytes(&[0; 32]);
+            self.record_space(32 * (63 - action_count as usize));
         }
+
+        // Preserved flag
+        self.record_value(flags, 4)?;
+
+        self.record_space(27);
+        self.record_bytes(&[0]);
+
+        let recordable = self.recordable;
+        self._write_trigger(condition_count, action_count);
+        self.recordable = recordable;
+        Ok(())
     }
+}
 
-    (alloctable, payload_size)
+/// Digest of object's occupation map and recorded output.
+fn obj_digest(dwoccupmap: &[i32], recorded: &(Vec<u8>, Vec<RecordSlot>)) -> u64 {
+    let mut digest = ObjDigest::new();
+    for &occup in dwoccupmap {
+        digest.write(&[(occup != -1) as u8]);
+    }
+    let (image, slots) = recorded;
+    digest.write(image);
+    for slot in slots {
+        digest.write(&(slot.offset as u32).to_le_bytes());
+        digest.write(&[slot.size as u8]);
+    }
+    digest.finish()
 }
 
 #[pyclass(module = "eudplib.core.allocator")]
 pub struct PayloadBuilder {
     callbacks_on_create_payload: Vec<PyObject>,
     callbacks_after_collecting: Vec<PyObject>,
+    // Collecting phase
+    found_objects: Vec<PyObject>,
+    found_index: HashMap<usize, usize>, // id(obj) -> index in found_objects
+    untraversed_objects: Vec<usize>,
+    dynamic_objects: Vec<usize>,
+    // Same as dynamic_objects, for membership test while collecting
+    dynamic_index: HashSet<usize>,
+    // GetDataSize() of dynamic objects when their dependency was last collected
+    dynamic_datasize: HashMap<usize, usize>,
     // Allocating & Writing phase
     alloctable: Vec<u32>,
     payload_size: usize,
+    // Seconds spent on searching & applying object placements
+    alloc_time: (f64, f64),
+    // Seconds spent on each object while collecting, allocating and writing
+    object_times: (Vec<f64>, Vec<f64>, Vec<f64>),
+    // Occupied bytes and relocation entries of each object
+    object_usage: (Vec<usize>, Vec<usize>),
+    records: Vec<Option<ObjRecord>>,
+    record_data: Vec<u8>,
 }
 
 #[pymethods]
@@ -229,8 +462,19 @@ impl PayloadBuilder {
         Self {
             callbacks_on_create_payload: Vec::new(),
             callbacks_after_collecting: Vec::new(),
+            found_objects: Vec::new(),
+            found_index: HashMap::new(),
+            untraversed_objects: Vec::new(),
+            dynamic_objects: Vec::new(),
+            dynamic_index: HashSet::new(),
+            dynamic_datasize: HashMap::new(),
             alloctable: Vec::new(),
             payload_size: 0,
+            alloc_time: (0.0, 0.0),
+            object_times: (Vec::new(), Vec::new(), Vec::new()),
+            object_usage: (Vec::new(), Vec::new()),
+            records: Vec::new(),
+            record_data: Vec::new(),
         }
     }
 
@@ -254,9 +498,152 @@ impl PayloadBuilder {
         }
     }
 
-    fn alloc_objects(&mut self, py: Python, found_objects: &Bound<'_, PyDict>) -> PyResult<()> {
-        let obja = Bound::new(py, ObjAllocator::new())?;
+    /// Register object found while collecting dependencies.
+    ///
+    /// Called by GetObjectAddr in collecting phase.
+    fn register_object(&mut self, obj: &Bound<'_, PyAny>) -> PyResult<()> {
+        let key = obj.as_ptr() as usize;
+        if self.found_index.contains_key(&key) {
+            return Ok(());
+        }
+        let index = self.found_objects.len();
+        self.found_index.insert(key, index);
+        self.found_objects.push(obj.clone().unbind());
+        self.untraversed_objects.push(index);
+        if obj
+            .call_method0(intern!(obj.py(), "DynamicConstructed"))?
+            .is_truthy()?
+        {
+            self.dynamic_objects.push(index);
+            self.dynamic_index.insert(index);
+        }
+        Ok(())
+    }
+
+    /// Collect every object reachable from root, in the order they are found.
+    ///
+    /// Dynamically constructed objects only grow while collecting, so they
+    /// are re-examined only when their GetDataSize() has changed since
+    /// their dependencies were last collected.
+    fn collect_objects(slf: &Bound<'_, Self>, root: &Bound<'_, PyAny>) -> PyResult<Vec<PyObject>> {
+        let py = slf.py();
+        {
+            let mut builder = slf.borrow_mut();
+            builder.found_objects.clear();
+            builder.found_index.clear();
+            builder.untraversed_objects.clear();
+            builder.dynamic_objects.clear();
+            builder.dynamic_index.clear();
+            builder.dynamic_datasize.clear();
+            builder.object_times.0.clear();
+        }
+        let objc = Bound::new(py, ObjCollector)?;
+        let arg = PyTuple::new(py, [objc])?;
+        let bar = ProgressBar::new(0);
+        bar.set_style(
+            ProgressStyle::with_template("[{elapsed}] {bar:40.cyan/blue} {pos} / {len} objects")
+                .unwrap()
+                .progress_chars("##-"),
+        );
+
+        // Evaluate root to register root object.
+        // root may not have WritePayload() method e.g: Forward()
+        evaluate(root)?;
+
+        // Borrows of PayloadBuilder must not outlive each iteration because
+        // CollectDependency re-enters register_object through GetObjectAddr.
+        let collect_dependency = |index: usize| -> PyResult<()> {
+            let start = Instant::now();
+            let obj = slf.borrow().found_objects[index].clone_ref(py);
+            let obj = obj.bind(py);
+            obj.call_method1(intern!(py, "CollectDependency"), arg.clone())?;
+            {
+                let mut builder = slf.borrow_mut();
+                let times = &mut builder.object_times.0;
+                if times.len() <= index {
+                    times.resize(index + 1, 0.0);
+                }
+                times[index] += start.elapsed().as_secs_f64();
+            }
+            if slf.borrow().dynamic_index.contains(&index) {
+                let datasize = obj
+                    .call_method0(intern!(py, "GetDataSize"))
+                    .and_then(|size| size.extract::<usize>());
+                let mut builder = slf.borrow_mut();
+                match datasize {
+                    Ok(datasize) => builder.dynamic_datasize.insert(index, datasize),
+                    Err(_) => builder.dynamic_datasize.remove(&index),
+                };
+            }
+            Ok(())
+        };
+
+        loop {
+            loop {
+                let next = {
+                    let mut builder = slf.borrow_mut();
+                    bar.set_length(builder.found_objects.len() as u64);
+                    builder.untraversed_objects.pop()
+                };
+                let Some(index) = next else { break };
+                collect_dependency(index)?;
+                bar.inc(1);
+            }
+
+            // Check for new objects
+            let dynamic_objects = slf.borrow().dynamic_objects.clone();
+            for index in dynamic_objects {
+                let last_datasize = slf.borrow().dynamic_datasize.get(&index).copied();
+                if let Some(last_datasize) = last_datasize {
+                    let obj = slf.borrow().found_objects[index].clone_ref(py);
+                    let datasize = obj
+                        .bind(py)
+                        .call_method0(intern!(py, "GetDataSize"))
+                        .and_then(|size| size.extract::<usize>());
+                    if matches!(datasize, Ok(datasize) if datasize == last_datasize) {
+                        continue;
+                    }
+                }
+                collect_dependency(index)?;
+            }
+
+            if slf.borrow().untraversed_objects.is_empty() {
+                break;
+            }
+        }
+        bar.finish();
+
+        let mut builder = slf.borrow_mut();
+        builder.found_index.clear();
+        builder.dynamic_objects.clear();
+        builder.dynamic_index.clear();
+        builder.dynamic_datasize.clear();
+        let found_count = builder.found_objects.len();
+        builder.object_times.0.resize(found_count, 0.0);
+        Ok(std::mem::take(&mut builder.found_objects))
+    }
+
+    /// Write objects into ObjAllocator and stack them into payload.
+    ///
+    /// If `cache` is given, objects whose digest is found there are placed
+    /// at their address from previous build and only the rest are stacked.
+    /// Output is always recorded for the digest then; objects which cannot
+    /// be recorded are stacked normally and not cached.
+    #[pyo3(signature = (found_objects, record=false, cache=None))]
+    fn alloc_objects(
+        &mut self,
+        py: Python,
+        found_objects: &Bound<'_, PyDict>,
+        record: bool,
+        cache: Option<PathBuf>,
+    ) -> PyResult<()> {
+        let obja = Bound::new(py, ObjAllocator::new(record || cache.is_some()))?;
         let mut dwoccupmap_list = Vec::with_capacity(found_objects.len());
+        let mut digests = Vec::with_capacity(found_objects.len());
+        self.records.clear();
+        self.record_data.clear();
+        self.object_times.1.clear();
+        self.object_usage.0.clear();
         let bar = ProgressBar::new(found_objects.len() as u64);
         bar.println(" - Preprocessing objects..");
         bar.set_style(
@@ -266,38 +653,126 @@ impl PayloadBuilder {
         );
         let arg = PyTuple::new(py, [obja.clone()])?;
         for (obj, _v) in found_objects.iter() {
+            let start = Instant::now();
             {
                 let mut obja = obja.borrow_mut();
                 obja.start_write();
             }
             obj.call_method1(intern!(py, "WritePayload"), arg.clone())?;
-            let dwoccupmap = {
+            let (dwoccupmap, recorded) = {
                 let mut obja = obja.borrow_mut();
-                obja.end_write()
+                (obja.end_write(), obja.end_record())
             };
             let dwoccupmap_len = dwoccupmap.len();
-            let datasize = obj
+            let objsize = obj
                 .call_method0(intern!(py, "GetDataSize"))?
                 .extract::<usize>()?;
-            let datasize = (datasize + 3) >> 2;
+            let datasize = (objsize + 3) >> 2;
             if dwoccupmap_len != datasize {
                 return Err(AllocError::new_err(format!("Occupation map length ({dwoccupmap_len}) & Object size ({datasize}) mismatch for {obj}")));
             }
+            if cache.is_some() {
+                digests.push(
+                    recorded
+                        .as_ref()
+                        .map(|recorded| obj_digest(&dwoccupmap, recorded)),
+                );
+            }
+            if record {
+                let record = match recorded {
+                    Some((image, slots)) => {
+                        let written_bytes = image.len();
+                        if written_bytes != objsize {
+                            return Err(AllocError::new_err(format!(
+                                "obj.GetDataSize() ({objsize}) != Real payload size({written_bytes}) for {obj:?}"
+                            )));
+                        }
+                        let mut runs = Vec::new();
+                        for (start, end) in occupied_runs(&dwoccupmap) {
+                            let start = start * 4;
+                            let end = (end * 4).min(written_bytes);
+                            runs.push((start, end - start, self.record_data.len()));
+                            self.record_data.extend_from_slice(&image[start..end]);
+                        }
+                        Some(ObjRecord { runs, slots })
+                    }
+                    None => None,
+                };
+                self.records.push(record);
+            }
+            let occupied = dwoccupmap.iter().filter(|&&occup| occup != -1).count();
+            self.object_usage.0.push(occupied * 4);
             dwoccupmap_list.push(dwoccupmap);
+            self.object_times.1.push(start.elapsed().as_secs_f64());
             bar.inc(1);
         }
         bar.finish();
         println!(" - Allocating objects..");
-        (self.alloctable, self.payload_size) = stack_objects(dwoccupmap_list);
+        let mut preplaced = Vec::new();
+        if let Some(cache) = &cache {
+            let mut placements = load_placements(cache);
+            for digest in &digests {
+                let addr = digest.and_then(|digest| placements.get_mut(&digest)?.pop());
+                preplaced.push(addr.map(|addr| addr as usize / 4));
+            }
+            let reused = preplaced.iter().filter(|addr| addr.is_some()).count();
+            println!(
+                " - Reusing {reused} / {} object placements from cache",
+                digests.len()
+            );
+        }
+        let placement = stack_objects(&dwoccupmap_list, &preplaced);
+        self.alloctable = placement.alloctable;
+        self.payload_size = placement.payload_size;
+        self.alloc_time = (
+            placement.search_time.as_secs_f64(),
+            placement.apply_time.as_secs_f64(),
+        );
+        println!(
+            " - Allocated {} bytes (search: {:.3}s, apply: {:.3}s)",
+            self.payload_size, self.alloc_time.0, self.alloc_time.1
+        );
+        if let Some(cache) = &cache {
+            save_placements(cache, &digests, &self.alloctable)?;
+        }
         Ok(())
     }
 
+    /// Seconds spent on (searching, applying) placements in last allocation.
+    #[getter]
+    fn alloc_time(&self) -> (f64, f64) {
+        self.alloc_time
+    }
+
+    /// Seconds spent on each object in last (collecting, allocating,
+    /// writing), in the order of collected objects and found_objects.
+    #[getter]
+    fn object_times(&self) -> (Vec<f64>, Vec<f64>, Vec<f64>) {
+        self.object_times.clone()
+    }
+
+    /// (occupied bytes, relocation entries) of each object in last
+    /// allocating and writing, in the order of found_objects.
+    #[getter]
+    fn object_usage(&self) -> (Vec<usize>, Vec<usize>) {
+        self.object_usage.clone()
+    }
+
     fn construct_payload(
-        &self,
-        py: Python,
+        slf: &Bound<'_, Self>,
         found_objects: &Bound<'_, PyDict>,
-    ) -> PyResult<(Vec<u8>, Vec<usize>, Vec<usize>)> {
-        let pbuf = Bound::new(py, PayloadBuffer::new(self.payload_size))?;
+    ) -> PyResult<(Vec<u8>, Vec<u8>, Vec<u8>)> {
+        let py = slf.py();
+        let (records, record_data) = {
+            let mut builder = slf.borrow_mut();
+            (
+                std::mem::take(&mut builder.records),
+                std::mem::take(&mut builder.record_data),
+            )
+        };
+        // GetObjectAddr borrows PayloadBuilder while objects are written
+        let builder = slf.borrow();
+        let pbuf = Bound::new(py, PayloadBuffer::new(builder.payload_size))?;
         let bar = ProgressBar::new(found_objects.len() as u64);
         bar.println(" - Writing objects..");
         bar.set_style(
@@ -306,10 +781,23 @@ impl PayloadBuilder {
                 .progress_chars("##-"),
         );
         let arg = PyTuple::new(py, [pbuf.clone()])?;
+        let mut write_times = Vec::with_capacity(found_objects.len());
+        let mut relocs = Vec::with_capacity(found_objects.len());
         for (i, (obj, _v)) in found_objects.iter().enumerate() {
+            let start = Instant::now();
+            let reloc_count = pbuf.borrow().reloc_count();
+            // Recorded objects are patched without calling WritePayload again
+            if let Some(Some(record)) = records.get(i) {
+                let mut pbuf = pbuf.borrow_mut();
+                pbuf.write_record(py, builder.alloctable[i] as usize, record)?;
+                relocs.push(pbuf.reloc_count() - reloc_count);
+                write_times.push(start.elapsed().as_secs_f64());
+                bar.inc(1);
+                continue;
+            }
             {
                 let mut pbuf = pbuf.borrow_mut();
-                pbuf.start_write(self.alloctable[i] as usize);
+                pbuf.start_write(builder.alloctable[i] as usize);
             }
             obj.call_method1(intern!(py, "WritePayload"), arg.clone())?;
             let written_bytes = {
@@ -324,11 +812,20 @@ impl PayloadBuilder {
                     "obj.GetDataSize() ({objsize}) != Real payload size({written_bytes}) for {obj:?}"
                 )));
             }
+            relocs.push(pbuf.borrow().reloc_count() - reloc_count);
+            write_times.push(start.elapsed().as_secs_f64());
             bar.inc(1);
         }
         bar.finish();
+        drop(builder);
+        {
+            let mut builder = slf.borrow_mut();
+            builder.object_times.2 = write_times;
+            builder.object_usage.1 = relocs;
+        }
         Ok({
             let mut pbuf = pbuf.borrow_mut();
+            pbuf.flush_records(py, &record_data);
             pbuf.create_payload()
         })
     }
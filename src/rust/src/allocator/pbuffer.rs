@@ -1,7 +1,13 @@
 use crate::allocator::constexpr::evaluate;
+use crate::allocator::payload::ObjRecord;
+use crate::allocator::trgfields::TrgFields;
 use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
-use pyo3::types::{PyIterator, PyList};
+use pyo3::types::{PyBytes, PyIterator, PyList};
+
+/// Payload size per shard below which bytes of recorded objects are copied
+/// by fewer threads.
+const MIN_SHARD_SIZE: usize = 1 << 18;
 
 /// Buffer where EUDObject should write to.
 #[pyclass(module = "eudplib.core.allocator")]
@@ -11,6 +17,9 @@ pub struct PayloadBuffer {
     data: Vec<u8>,
     prttable: Vec<usize>,
     orttable: Vec<usize>,
+    // Writes of recorded objects, deferred to flush_records
+    copies: Vec<(usize, usize, usize)>, // (payload offset, length, record offset)
+    patches: Vec<(usize, usize, [u8; 4])>, // (payload offset, size, bytes)
 }
 
 impl PayloadBuffer {
@@ -21,6 +30,8 @@ impl PayloadBuffer {
             data: vec![0; totlen],
             prttable: Vec::new(),
             orttable: Vec::new(),
+            copies: Vec::new(),
+            patches: Vec::new(),
         }
     }
 
@@ -33,11 +44,104 @@ impl PayloadBuffer {
         self.datacur - self.datastart
     }
 
-    pub(crate) fn create_payload(&mut self) -> (Vec<u8>, Vec<usize>, Vec<usize>) {
+    /// Number of relocation entries written so far.
+    pub(crate) fn reloc_count(&self) -> usize {
+        self.prttable.len() + self.orttable.len()
+    }
+
+    /// Write object recorded in allocating phase, only evaluating the
+    /// expressions that could not be resolved then.
+    ///
+    /// Relocation tables are updated right away, so they keep the order of
+    /// objects. Bytes are written later by flush_records.
+    pub(crate) fn write_record(
+        &mut self,
+        py: Python,
+        writeaddr: usize,
+        record: &ObjRecord,
+    ) -> PyResult<()> {
+        for &(offset, length, src) in &record.runs {
+            self.copies.push((writeaddr + offset, length, src));
+        }
+        for slot in &record.slots {
+            let dst = writeaddr + slot.offset;
+            let rlocint = evaluate(slot.expr.bind(py))?;
+            let rlocmode = rlocint.0.rlocmode;
+            if rlocmode != 0 {
+                if slot.size != 4 || dst % 4 != 0 {
+                    return Err(PyValueError::new_err(
+                        "Cannot write non-const in byte/word/nonalligned dword.",
+                    ));
+                }
+                match rlocmode {
+                    1 => self.prttable.push(dst),
+                    4 => self.orttable.push(dst),
+                    _ => {
+                        return Err(PyValueError::new_err(format!(
+                            "rlocmode should be 1 or 4, not {rlocmode}"
+                        )))
+                    }
+                }
+            }
+            self.patches
+                .push((dst, slot.size, rlocint.0.offset.to_le_bytes()));
+        }
+        Ok(())
+    }
+
+    /// Copy bytes of recorded objects, splitting payload into shards
+    /// written by worker threads.
+    ///
+    /// Only the copies of recorded runs and already evaluated slots are
+    /// parallel. Slots are evaluated by write_record and objects without a
+    /// record are written by WritePayload, both on the main thread with the
+    /// GIL held. Each dword of payload is occupied by at most one object, so
+    /// shards never depend on each other.
+    pub(crate) fn flush_records(&mut self, py: Python, record_data: &[u8]) {
+        let copies = std::mem::take(&mut self.copies);
+        let patches = std::mem::take(&mut self.patches);
+        let threads = std::thread::available_parallelism().map_or(1, |n| n.get());
+        let shard_count = threads.min(self.data.len() / MIN_SHARD_SIZE).max(1);
+        let data = &mut self.data;
+        py.allow_threads(|| write_shards(data, shard_count, &copies, &patches, record_data));
+    }
+
+    fn write_fields(&mut self, py: Python, fields: &TrgFields) -> PyResult<()> {
+        let bytes = fields.bytes();
+        let base = self.datacur;
+        self.data[base..base + bytes.len()].copy_from_slice(bytes);
+        for (offset, size, expr) in fields.exprs() {
+            let rlocint = evaluate(expr.bind(py))?;
+            let rlocmode = rlocint.0.rlocmode;
+            let dst = base + offset;
+            if !(rlocmode == 0 || (size == 4 && dst % 4 == 0)) {
+                return Err(PyValueError::new_err(
+                    "Cannot write non-const in byte/word/nonalligned dword.",
+                ));
+            }
+            if rlocmode == 1 {
+                self.prttable.push(dst);
+            } else if rlocmode == 4 {
+                self.orttable.push(dst);
+            }
+            self.data[dst..dst + size].copy_from_slice(&rlocint.0.offset.to_le_bytes()[..size]);
+        }
+        self.datacur += bytes.len();
+        Ok(())
+    }
+
+    /// Payload and its relocation tables, as native-endian u32 arrays.
+    pub(crate) fn create_payload(&mut self) -> (Vec<u8>, Vec<u8>, Vec<u8>) {
+        let table_bytes = |table: Vec<usize>| -> Vec<u8> {
+            table
+                .into_iter()
+                .flat_map(|offset| (offset as u32).to_ne_bytes())
+                .collect()
+        };
         (
             std::mem::take(&mut self.data),
-            std::mem::take(&mut self.prttable),
-            std::mem::take(&mut self.orttable),
+            table_bytes(std::mem::take(&mut self.prttable)),
+            table_bytes(std::mem::take(&mut self.orttable)),
         )
     }
 }
@@ -146,7 +250,12 @@ impl PayloadBuffer {
         // Conditions
         let mut condition_count = 0;
         for condition in conditions {
-            self.WritePack("IIIHBBBBH", condition?.downcast()?)?;
+            let condition = condition?;
+            if let Ok(fields) = condition.downcast::<TrgFields>() {
+                self.write_fields(condition.py(), &fields.borrow())?;
+            } else {
+                self.WritePack("IIIHBBBBH", condition.downcast()?)?;
+            }
             condition_count += 1;
         }
         if condition_count < 16 {
@@ -157,7 +266,12 @@ impl PayloadBuffer {
         // Actions
         let mut action_count = 0;
         for action in actions {
-            self.WritePack("IIIIIIHBBBBH", action?.downcast()?)?;
+            let action = action?;
+            if let Ok(fields) = action.downcast::<TrgFields>() {
+                self.write_fields(action.py(), &fields.borrow())?;
+            } else {
+                self.WritePack("IIIIIIHBBBBH", action.downcast()?)?;
+            }
             action_count += 1;
         }
         if action_count < 64 {
@@ -173,3 +287,125 @@ impl PayloadBuffer {
         Ok(())
     }
 }
+
+fn write_shards(
+    data: &mut [u8],
+    shard_count: usize,
+    copies: &[(usize, usize, usize)],
+    patches: &[(usize, usize, [u8; 4])],
+    record_data: &[u8],
+) {
+    let shard_size = ((data.len() + shard_count - 1) / shard_count).max(1);
+    let mut shard_copies = vec![Vec::new(); shard_count];
+    let mut shard_patches = vec![Vec::new(); shard_count];
+    for &(dst, length, src) in copies {
+        if length > 0 {
+            for shard in dst / shard_size..=(dst + length - 1) / shard_size {
+                shard_copies[shard].push((dst, length, src));
+            }
+        }
+    }
+    for &(dst, size, bytes) in patches {
+        for shard in dst / shard_size..=(dst + size - 1) / shard_size {
+            shard_patches[shard].push((dst, size, bytes));
+        }
+    }
+
+    let write_shard = |shard: usize, chunk: &mut [u8]| {
+        let base = shard * shard_size;
+        let end = base + chunk.len();
+        for &(dst, length, src) in &shard_copies[shard] {
+            let (lo, hi) = (dst.max(base), (dst + length).min(end));
+            chunk[lo - base..hi - base]
+                .copy_from_slice(&record_data[src + lo - dst..src + hi - dst]);
+        }
+        // Patch after copying, since slots lie inside copied runs
+        for &(dst, size, bytes) in &shard_patches[shard] {
+            let (lo, hi) = (dst.max(base), (dst + size).min(end));
+            chunk[lo - base..hi - base].copy_from_slice(&bytes[lo - dst..hi - dst]);
+        }
+    };
+    if shard_count == 1 {
+        write_shard(0, data);
+        return;
+    }
+    std::thread::scope(|s| {
+        for (shard, chunk) in data.chunks_mut(shard_size).enumerate() {
+            let write_shard = &write_shard;
+            s.spawn(move || write_shard(shard, chunk));
+        }
+    });
+}
+
+/// Add `addend` to the little-endian dwords at offsets in `table`, which is
+/// an array of native-endian u32.
+fn relocate(data: &mut [u8], table: &[u8], addend: u32) {
+    for offset in table.chunks_exact(4) {
+        let offset = u32::from_ne_bytes(offset.try_into().unwrap()) as usize;
+        let dword = &mut data[offset..offset + 4];
+        let value = u32::from_le_bytes((&*dword).try_into().unwrap());
+        dword.copy_from_slice(&value.wrapping_add(addend).to_le_bytes());
+    }
+}
+
+/// Copy of payload placed at `offset`: prt entries get offset / 4 added and ort
+/// entries get offset added.
+#[pyfunction]
+pub fn relocate_payload<'py>(
+    py: Python<'py>,
+    data: &[u8],
+    prttable: &[u8],
+    orttable: &[u8],
+    offset: u32,
+) -> PyResult<Bound<'py, PyBytes>> {
+    if prttable.len() % 4 != 0 || orttable.len() % 4 != 0 {
+        return Err(PyValueError::new_err("Relocation table is not a u32 array"));
+    }
+    PyBytes::new_with(py, data.len(), |buf| {
+        buf.copy_from_slice(data);
+        relocate(buf, prttable, offset / 4);
+        relocate(buf, orttable, offset);
+        Ok(())
+    })
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_write_shards() {
+        let record_data: Vec<u8> = (0..=255).cycle().take(4000).collect();
+        let mut copies = Vec::new();
+        let mut patches = Vec::new();
+        for i in 0..100 {
+            copies.push((i * 40, 36, i * 37));
+            patches.push((i * 40 + 36, 4, [i as u8, 1, 2, 3]));
+            patches.push((i * 40 + 5, 2, [9, 9, 0, 0]));
+        }
+
+        let mut expected = vec![0; 4000];
+        write_shards(&mut expected, 1, &copies, &patches, &record_data);
+        assert_eq!(&expected[40..45], &record_data[37..42]);
+        assert_eq!(&expected[45..47], &[9, 9]);
+        assert_eq!(&expected[76..80], &[1, 1, 2, 3]);
+        for shard_count in [2, 3, 7, 16] {
+            let mut data = vec![0; 4000];
+            write_shards(&mut data, shard_count, &copies, &patches, &record_data);
+            assert_eq!(data, expected);
+        }
+    }
+
+    #[test]
+    fn test_relocate() {
+        let mut data = [0u8; 16];
+        data[4..8].copy_from_slice(&3u32.to_le_bytes());
+        data[8..12].copy_from_slice(&u32::MAX.to_le_bytes());
+        let table: Vec<u8> = [4u32, 8, 12].iter().flat_map(|x| x.to_ne_bytes()).collect();
+        relocate(&mut data, &table, 0x100);
+        assert_eq!(data[..4], [0; 4]);
+        assert_eq!(data[4..8], 0x103u32.to_le_bytes());
+        assert_eq!(data[8..12], 0xFFu32.to_le_bytes());
+        assert_eq!(data[12..], 0x100u32.to_le_bytes());
+    }
+}
@@ -0,0 +1,503 @@
+use std::collections::HashMap;
+use std::fs;
+use std::io;
+use std::path::Path;
+use std::time::{Duration, Instant};
+
+/// Index of free dwords in payload.
+///
+/// Segment tree keeping the free run lengths of each node, so that both
+/// conflict checks and searching a free run of given length take O(log n)
+/// instead of scanning every dword of an object.
+pub(crate) struct FreeIndex {
+    size: usize,
+    prefix: Vec<usize>, // free run length starting at node start
+    suffix: Vec<usize>, // free run length ending at node end
+    best: Vec<usize>,   // longest free run in node
+}
+
+impl FreeIndex {
+    pub(crate) fn new(len: usize) -> Self {
+        let size = len.max(1).next_power_of_two();
+        let mut lengths = vec![0; 2 * size];
+        for (node, length) in lengths.iter_mut().enumerate().skip(1) {
+            let level = usize::BITS - 1 - node.leading_zeros();
+            *length = size >> level;
+        }
+        Self {
+            size,
+            prefix: lengths.clone(),
+            suffix: lengths.clone(),
+            best: lengths,
+        }
+    }
+
+    /// Mark dwords in [lo, hi) as occupied.
+    pub(crate) fn occupy(&mut self, lo: usize, hi: usize) {
+        if lo < hi {
+            self.occupy_node(1, 0, self.size, lo, hi);
+        }
+    }
+
+    fn occupy_node(&mut self, node: usize, nlo: usize, nhi: usize, lo: usize, hi: usize) {
+        // Children of fully occupied nodes are never visited again.
+        if hi <= nlo || nhi <= lo || self.best[node] == 0 {
+            return;
+        }
+        if lo <= nlo && nhi <= hi {
+            self.prefix[node] = 0;
+            self.suffix[node] = 0;
+            self.best[node] = 0;
+            return;
+        }
+        let mid = (nlo + nhi) / 2;
+        self.occupy_node(2 * node, nlo, mid, lo, hi);
+        self.occupy_node(2 * node + 1, mid, nhi, lo, hi);
+
+        let half = mid - nlo;
+        let (l, r) = (2 * node, 2 * node + 1);
+        self.prefix[node] = if self.prefix[l] == half {
+            half + self.prefix[r]
+        } else {
+            self.prefix[l]
+        };
+        self.suffix[node] = if self.suffix[r] == half {
+            half + self.suffix[l]
+        } else {
+            self.suffix[r]
+        };
+        self.best[node] = self.best[l]
+            .max(self.best[r])
+            .max(self.suffix[l] + self.prefix[r]);
+    }
+
+    /// First occupied dword in [lo, hi).
+    pub(crate) fn first_occupied(&self, lo: usize, hi: usize) -> Option<usize> {
+        self.first_occupied_node(1, 0, self.size, lo, hi.min(self.size))
+    }
+
+    fn first_occupied_node(
+        &self,
+        node: usize,
+        nlo: usize,
+        nhi: usize,
+        lo: usize,
+        hi: usize,
+    ) -> Option<usize> {
+        if hi <= nlo || nhi <= lo || self.best[node] == nhi - nlo {
+            return None;
+        }
+        if self.best[node] == 0 {
+            return Some(lo.max(nlo));
+        }
+        let mid = (nlo + nhi) / 2;
+        self.first_occupied_node(2 * node, nlo, mid, lo, hi)
+            .or_else(|| self.first_occupied_node(2 * node + 1, mid, nhi, lo, hi))
+    }
+
+    /// First free dword at or after `from`.
+    pub(crate) fn next_free(&self, from: usize) -> Option<usize> {
+        self.next_free_node(1, 0, self.size, from)
+    }
+
+    fn next_free_node(&self, node: usize, nlo: usize, nhi: usize, from: usize) -> Option<usize> {
+        if nhi <= from || self.best[node] == 0 {
+            return None;
+        }
+        if self.best[node] == nhi - nlo {
+            return Some(from.max(nlo));
+        }
+        let mid = (nlo + nhi) / 2;
+        self.next_free_node(2 * node, nlo, mid, from)
+            .or_else(|| self.next_free_node(2 * node + 1, mid, nhi, from))
+    }
+
+    /// Leftmost position p >= `from` where [p, p + len) is free.
+    pub(crate) fn find_free_run(&self, from: usize, len: usize) -> Option<usize> {
+        if len == 0 {
+            return Some(from);
+        }
+        let mut carry = 0;
+        self.find_free_run_node(1, 0, self.size, from, len, &mut carry)
+    }
+
+    // `carry` is the length of free run (at or after `from`) ending at nlo.
+    fn find_free_run_node(
+        &self,
+        node: usize,
+        nlo: usize,
+        nhi: usize,
+        from: usize,
+        len: usize,
+        carry: &mut usize,
+    ) -> Option<usize> {
+        if nhi <= from {
+            return None;
+        }
+        let nlen = nhi - nlo;
+        if nlo >= from {
+            if *carry + self.prefix[node] >= len {
+                return Some(nlo - *carry);
+            }
+            if self.best[node] < len {
+                // No run fits inside this node; only its suffix can carry on.
+                *carry = if self.best[node] == nlen {
+                    *carry + nlen
+                } else {
+                    self.suffix[node]
+                };
+                return None;
+            }
+        } else if self.best[node] == 0 {
+            *carry = 0;
+            return None;
+        }
+        let mid = (nlo + nhi) / 2;
+        if let Some(p) = self.find_free_run_node(2 * node, nlo, mid, from, len, carry) {
+            return Some(p);
+        }
+        self.find_free_run_node(2 * node + 1, mid, nhi, from, len, carry)
+    }
+}
+
+/// Split occupation map into runs of occupied dwords.
+pub(crate) fn occupied_runs(dwoccupmap: &[i32]) -> Vec<(usize, usize)> {
+    let mut runs = Vec::new();
+    let mut i = 0;
+    while i < dwoccupmap.len() {
+        if dwoccupmap[i] == -1 {
+            i += 1;
+            continue;
+        }
+        let start = i;
+        while i < dwoccupmap.len() && dwoccupmap[i] != -1 {
+            i += 1;
+        }
+        runs.push((start, i));
+    }
+    runs
+}
+
+pub(crate) struct Placement {
+    pub(crate) alloctable: Vec<u32>,
+    pub(crate) payload_size: usize,
+    pub(crate) search_time: Duration,
+    pub(crate) apply_time: Duration,
+}
+
+/// Stack objects into payload, overlapping unoccupied dwords of objects.
+///
+/// The first object is the payload entry point, so it always starts at 0.
+/// Objects with a `preplaced` dword address are put there next, unless they
+/// would conflict with it or each other. Each of the other objects is placed
+/// at the lowest address, not lower than where the previous one was placed,
+/// at which none of its occupied dwords conflict with objects already placed.
+pub(crate) fn stack_objects(
+    dwoccupmap_list: &[Vec<i32>],
+    preplaced: &[Option<usize>],
+) -> Placement {
+    let total_len = dwoccupmap_list.iter().map(Vec::len).sum::<usize>();
+    let preplaced_end = dwoccupmap_list
+        .iter()
+        .zip(preplaced)
+        .filter_map(|(dwoccupmap, addr)| addr.map(|addr| addr + dwoccupmap.len()))
+        .max()
+        .unwrap_or(0);
+    let mut index = FreeIndex::new(total_len + preplaced_end + 1);
+    let mut alloctable = vec![0; dwoccupmap_list.len()];
+    let mut payload_size = 0;
+    let mut search_time = Duration::ZERO;
+    let mut apply_time = Duration::ZERO;
+
+    let mut placed = vec![false; dwoccupmap_list.len()];
+    let apply_start = Instant::now();
+    if let Some(root) = dwoccupmap_list.first() {
+        for (start, end) in occupied_runs(root) {
+            index.occupy(start, end);
+        }
+        placed[0] = true;
+        payload_size = root.len() * 4;
+    }
+    for (i, (dwoccupmap, addr)) in dwoccupmap_list.iter().zip(preplaced).enumerate() {
+        let Some(addr) = *addr else {
+            continue;
+        };
+        if i == 0 {
+            continue;
+        }
+        let runs = occupied_runs(dwoccupmap);
+        if runs
+            .iter()
+            .any(|&(start, end)| index.first_occupied(addr + start, addr + end).is_some())
+        {
+            continue;
+        }
+        for &(start, end) in &runs {
+            index.occupy(addr + start, addr + end);
+        }
+        placed[i] = true;
+        alloctable[i] = (addr * 4) as u32;
+        payload_size = payload_size.max((addr + dwoccupmap.len()) * 4);
+    }
+    apply_time += apply_start.elapsed();
+
+    let mut lallocaddr = 0;
+    for (i, dwoccupmap) in dwoccupmap_list.iter().enumerate() {
+        if placed[i] {
+            continue;
+        }
+        // Find the appropriate position to allocate an object
+        let search_start = Instant::now();
+        let runs = occupied_runs(dwoccupmap);
+        if let Some(&(anchor_start, anchor_end)) = runs.iter().max_by_key(|(s, e)| e - s) {
+            'search: loop {
+                // Skip to where the longest run of object fits
+                let p = index
+                    .find_free_run(lallocaddr + anchor_start, anchor_end - anchor_start)
+                    .expect("Payload index overflow");
+                lallocaddr = p - anchor_start;
+                // Update on conflict map
+                for &(start, end) in &runs {
+                    if let Some(conflict) =
+                        index.first_occupied(lallocaddr + start, lallocaddr + end)
+                    {
+                        let free = index.next_free(conflict).expect("Payload index overflow");
+                        lallocaddr = free - start;
+                        continue 'search;
+                    }
+                }
+                break;
+            }
+        }
+        search_time += search_start.elapsed();
+
+        // Apply occupation map
+        let apply_start = Instant::now();
+        for &(start, end) in &runs {
+            index.occupy(lallocaddr + start, lallocaddr + end);
+        }
+        alloctable[i] = (lallocaddr * 4) as u32;
+
+        let obj_payload_size = (lallocaddr + dwoccupmap.len()) * 4;
+        if obj_payload_size > payload_size {
+            payload_size = obj_payload_size;
+        }
+        apply_time += apply_start.elapsed();
+    }
+
+    Placement {
+        alloctable,
+        payload_size,
+        search_time,
+        apply_time,
+    }
+}
+
+/// FNV-1a hash of object contents, stable across builds.
+pub(crate) struct ObjDigest(u64);
+
+impl ObjDigest {
+    pub(crate) fn new() -> Self {
+        Self(0xcbf29ce484222325)
+    }
+
+    pub(crate) fn write(&mut self, bytes: &[u8]) {
+        for &b in bytes {
+            self.0 ^= b as u64;
+            self.0 = self.0.wrapping_mul(0x100000001b3);
+        }
+    }
+
+    pub(crate) fn finish(&self) -> u64 {
+        self.0
+    }
+}
+
+const CACHE_MAGIC: &[u8; 8] = b"EUDPLC01";
+
+/// Load object addresses of previous build, grouped by object digest.
+///
+/// Missing or malformed cache is treated as empty.
+pub(crate) fn load_placements(path: &Path) -> HashMap<u64, Vec<u32>> {
+    let mut placements: HashMap<u64, Vec<u32>> = HashMap::new();
+    let Ok(data) = fs::read(path) else {
+        return placements;
+    };
+    if data.len() < CACHE_MAGIC.len()
+        || &data[..CACHE_MAGIC.len()] != CACHE_MAGIC
+        || (data.len() - CACHE_MAGIC.len()) % 12 != 0
+    {
+        return placements;
+    }
+    for entry in data[CACHE_MAGIC.len()..].chunks_exact(12) {
+        let digest = u64::from_le_bytes(entry[..8].try_into().unwrap());
+        let addr = u32::from_le_bytes(entry[8..].try_into().unwrap());
+        placements.entry(digest).or_default().push(addr);
+    }
+    // Objects with same digest reuse addresses in order
+    for addrs in placements.values_mut() {
+        addrs.reverse();
+    }
+    placements
+}
+
+pub(crate) fn save_placements(
+    path: &Path,
+    digests: &[Option<u64>],
+    alloctable: &[u32],
+) -> io::Result<()> {
+    let mut data = Vec::with_capacity(CACHE_MAGIC.len() + 12 * digests.len());
+    data.extend_from_slice(CACHE_MAGIC);
+    for (digest, addr) in digests.iter().zip(alloctable) {
+        let Some(digest) = digest else { continue };
+        data.extend_from_slice(&digest.to_le_bytes());
+        data.extend_from_slice(&addr.to_le_bytes());
+    }
+    fs::write(path, data)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    /// Previous stacking algorithm, restarting scan on every conflict.
+    fn stack_objects_naive(dwoccupmap_list: &[Vec<i32>]) -> (Vec<u32>, usize) {
+        let mut dwoccupmap_sum = vec![-1; dwoccupmap_list.iter().map(Vec::len).sum::<usize>() + 1];
+        let mut alloctable = Vec::new();
+        let mut lallocaddr = 0;
+        let mut payload_size = 0;
+
+        for dwoccupmap in dwoccupmap_list {
+            let mut i = 0;
+            while i < dwoccupmap.len() {
+                if dwoccupmap[i] != -1 && dwoccupmap_sum[lallocaddr + i] != -1 {
+                    lallocaddr = (dwoccupmap_sum[lallocaddr + i] - dwoccupmap[i]) as usize;
+                    i = 0;
+                } else {
+                    i += 1;
+                }
+            }
+            for (i, &occup) in dwoccupmap.iter().enumerate().rev() {
+                let curoff = lallocaddr + i;
+                if occup != -1 || dwoccupmap_sum[curoff] != -1 {
+                    dwoccupmap_sum[curoff] = if dwoccupmap_sum[curoff + 1] == -1 {
+                        curoff as i32 + 1
+                    } else {
+                        dwoccupmap_sum[curoff + 1]
+                    };
+                }
+            }
+            alloctable.push((lallocaddr * 4) as u32);
+            payload_size = payload_size.max((lallocaddr + dwoccupmap.len()) * 4);
+        }
+        (alloctable, payload_size)
+    }
+
+    fn occupmap(occupied: &[bool]) -> Vec<i32> {
+        let mut map: Vec<i32> = Vec::with_capacity(occupied.len());
+        for &occup in occupied {
+            map.push(if !occup {
+                -1
+            } else if *map.last().unwrap_or(&-1) != -1 {
+                *map.last().unwrap()
+            } else {
+                map.len() as i32
+            });
+        }
+        map
+    }
+
+    fn trigger(conditions: usize, actions: usize) -> Vec<i32> {
+        let mut occupied = vec![false; 602];
+        let conditions_end = 2 + 5 * (conditions + (conditions < 16) as usize);
+        occupied[..conditions_end].fill(true);
+        let actions_end = 82 + 8 * (actions + (actions < 64) as usize);
+        occupied[82..actions_end].fill(true);
+        occupied[594] = true; // flags
+        occupied[601] = true; // currentAction
+        occupmap(&occupied)
+    }
+
+    #[test]
+    fn test_same_packing_as_naive() {
+        let mut seed: u64 = 0x2545F4914F6CDD1D;
+        let mut rand = move |n: u64| {
+            seed ^= seed << 13;
+            seed ^= seed >> 7;
+            seed ^= seed << 17;
+            (seed % n) as usize
+        };
+        let mut objects = Vec::new();
+        for _ in 0..3000 {
+            let object = match rand(4) {
+                0 | 1 => trigger(rand(17), rand(65)),
+                2 => occupmap(&vec![true; 1 + rand(40)]),
+                _ => {
+                    let len = 1 + rand(200);
+                    let occupied: Vec<bool> = (0..len).map(|_| rand(5) == 0).collect();
+                    occupmap(&occupied)
+                }
+            };
+            objects.push(object);
+        }
+        objects.push(Vec::new());
+        objects.push(occupmap(&[false, false, true]));
+
+        let (alloctable, payload_size) = stack_objects_naive(&objects);
+        let placement = stack_objects(&objects, &[]);
+        assert_eq!(placement.alloctable, alloctable);
+        assert_eq!(placement.payload_size, payload_size);
+
+        // Unchanged objects keep their address on rebuild
+        let mut changed = objects.clone();
+        let mut preplaced = Vec::new();
+        for (i, dwoccupmap) in changed.iter_mut().enumerate() {
+            if i % 10 == 3 {
+                *dwoccupmap = trigger(rand(17), rand(65));
+                preplaced.push(None);
+            } else {
+                preplaced.push(Some(alloctable[i] as usize / 4));
+            }
+        }
+        let placement = stack_objects(&changed, &preplaced);
+        let mut occupied = vec![false; placement.payload_size / 4];
+        for (i, dwoccupmap) in changed.iter().enumerate() {
+            let addr = placement.alloctable[i] as usize / 4;
+            if let Some(cached) = preplaced[i] {
+                assert_eq!(addr, cached);
+            }
+            for (start, end) in occupied_runs(dwoccupmap) {
+                for dword in &mut occupied[addr + start..addr + end] {
+                    assert!(!*dword);
+                    *dword = true;
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn test_root_at_zero() {
+        let objects = vec![occupmap(&[true, true]), occupmap(&[true, true, true])];
+        // Cached address of the second object conflicts with the root
+        let placement = stack_objects(&objects, &[Some(5), Some(0)]);
+        assert_eq!(placement.alloctable, vec![0, 8]);
+        assert_eq!(placement.payload_size, 20);
+    }
+
+    #[test]
+    fn test_find_free_run() {
+        let mut index = FreeIndex::new(64);
+        index.occupy(0, 3);
+        index.occupy(5, 9);
+        index.occupy(10, 12);
+        assert_eq!(index.first_occupied(3, 5), None);
+        assert_eq!(index.first_occupied(3, 6), Some(5));
+        assert_eq!(index.next_free(5), Some(9));
+        assert_eq!(index.find_free_run(0, 1), Some(3));
+        assert_eq!(index.find_free_run(0, 2), Some(3));
+        assert_eq!(index.find_free_run(0, 3), Some(12));
+        assert_eq!(index.find_free_run(4, 1), Some(4));
+        assert_eq!(index.find_free_run(9, 1), Some(9));
+        assert_eq!(index.find_free_run(9, 2), Some(12));
+    }
+}
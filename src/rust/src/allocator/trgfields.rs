@@ -0,0 +1,175 @@
+use pyo3::exceptions::{PyIndexError, PyOverflowError};
+use pyo3::prelude::*;
+use pyo3::types::{PyInt, PyList, PySlice, PyTuple};
+use pyo3::IntoPyObjectExt;
+
+/// Field sizes of Condition, "IIIHBBBBH"
+const CONDITION_LAYOUT: &[usize] = &[4, 4, 4, 2, 1, 1, 1, 1, 2];
+/// Field sizes of Action, "IIIIIIHBBBBH"
+const ACTION_LAYOUT: &[usize] = &[4, 4, 4, 4, 4, 4, 2, 1, 1, 1, 1, 2];
+
+/// Fields of Condition or Action, packed as they are written in trigger.
+///
+/// Integer fields are stored in place; other fields (ConstExpr, EUDVariable..)
+/// are kept aside and evaluated when trigger is written. Integers are decoded
+/// from packed bytes on read, sign-extended if they were assigned negative,
+/// so -1 reads back as -1 and 0xFFFFFFFF as 0xFFFFFFFF.
+#[pyclass(sequence, module = "eudplib.core.allocator")]
+pub struct TrgFields {
+    layout: &'static [usize],
+    data: [u8; 32],
+    negative: u16, // bit i: field i was assigned negative integer
+    exprs: Vec<(usize, PyObject)>,
+}
+
+impl TrgFields {
+    fn from_fields(layout: &'static [usize], fields: &Bound<'_, PyTuple>) -> PyResult<Self> {
+        if fields.len() != layout.len() {
+            return Err(PyIndexError::new_err(format!(
+                "Expected {} fields, got {}",
+                layout.len(),
+                fields.len()
+            )));
+        }
+        let mut trgfields = Self {
+            layout,
+            data: [0; 32],
+            negative: 0,
+            exprs: Vec::new(),
+        };
+        for (index, field) in fields.iter().enumerate() {
+            trgfields.set(index, field)?;
+        }
+        Ok(trgfields)
+    }
+
+    /// Packed bytes; fields kept aside are zero.
+    pub(crate) fn bytes(&self) -> &[u8] {
+        &self.data[..self.layout.iter().sum::<usize>()]
+    }
+
+    /// Non-integer fields with their (offset, size) in packed bytes.
+    pub(crate) fn exprs(&self) -> impl Iterator<Item = (usize, usize, &PyObject)> {
+        self.exprs.iter().map(|(index, expr)| {
+            let (offset, size) = self.span(*index);
+            (offset, size, expr)
+        })
+    }
+
+    fn span(&self, index: usize) -> (usize, usize) {
+        (self.layout[..index].iter().sum(), self.layout[index])
+    }
+
+    fn index(&self, index: isize) -> PyResult<usize> {
+        let len = self.layout.len() as isize;
+        let index = if index < 0 { index + len } else { index };
+        if 0 <= index && index < len {
+            Ok(index as usize)
+        } else {
+            Err(PyIndexError::new_err("TrgFields index out of range"))
+        }
+    }
+
+    fn get(&self, py: Python, index: usize) -> PyResult<PyObject> {
+        if let Some((_, expr)) = self.exprs.iter().find(|(i, _)| *i == index) {
+            return Ok(expr.clone_ref(py));
+        }
+        let (offset, size) = self.span(index);
+        let mut bytes = [0; 8];
+        bytes[..size].copy_from_slice(&self.data[offset..offset + size]);
+        let mut number = i64::from_le_bytes(bytes);
+        if self.negative & (1 << index) != 0 {
+            let shift = 64 - 8 * size;
+            number = (number << shift) >> shift;
+        }
+        number.into_py_any(py)
+    }
+
+    fn set(&mut self, index: usize, value: Bound<'_, PyAny>) -> PyResult<()> {
+        // Validate before modifying anything
+        let number = if value.is_instance_of::<PyInt>() {
+            let number = value
+                .extract::<i64>()
+                .ok()
+                .filter(|n| (i32::MIN as i64..=u32::MAX as i64).contains(n))
+                .ok_or_else(|| {
+                    PyOverflowError::new_err(format!(
+                        "Trigger field {index} out of 32-bit range: {value}"
+                    ))
+                })?;
+            Some(number)
+        } else {
+            None
+        };
+        self.exprs.retain(|(i, _)| *i != index);
+        self.negative &= !(1 << index);
+        let (offset, size) = self.span(index);
+        let number = number.unwrap_or_else(|| {
+            self.exprs.push((index, value.unbind()));
+            0
+        });
+        if number < 0 {
+            self.negative |= 1 << index;
+        }
+        self.data[offset..offset + size].copy_from_slice(&(number as u32).to_le_bytes()[..size]);
+        Ok(())
+    }
+}
+
+#[pymethods]
+impl TrgFields {
+    #[staticmethod]
+    #[pyo3(signature = (*fields))]
+    fn condition(fields: &Bound<'_, PyTuple>) -> PyResult<Self> {
+        Self::from_fields(CONDITION_LAYOUT, fields)
+    }
+
+    #[staticmethod]
+    #[pyo3(signature = (*fields))]
+    fn action(fields: &Bound<'_, PyTuple>) -> PyResult<Self> {
+        Self::from_fields(ACTION_LAYOUT, fields)
+    }
+
+    fn __len__(&self) -> usize {
+        self.layout.len()
+    }
+
+    fn __getitem__(&self, py: Python, index: &Bound<'_, PyAny>) -> PyResult<PyObject> {
+        if let Ok(slice) = index.downcast::<PySlice>() {
+            let indices = slice.indices(self.layout.len() as isize)?;
+            let fields = (0..indices.slicelength)
+                .map(|i| self.get(py, (indices.start + i as isize * indices.step) as usize))
+                .collect::<PyResult<Vec<_>>>()?;
+            return PyList::new(py, fields)?.into_py_any(py);
+        }
+        self.get(py, self.index(index.extract()?)?)
+    }
+
+    fn __setitem__(&mut self, index: isize, value: Bound<'_, PyAny>) -> PyResult<()> {
+        let index = self.index(index)?;
+        self.set(index, value)
+    }
+
+    fn __iter__<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyAny>> {
+        let fields = (0..self.layout.len())
+            .map(|index| self.get(py, index))
+            .collect::<PyResult<Vec<_>>>()?;
+        Ok(PyList::new(py, fields)?.as_any().try_iter()?.into_any())
+    }
+
+    /// Fields which are not integers, in order of assignment.
+    #[pyo3(name = "exprs")]
+    fn py_exprs(&self, py: Python) -> Vec<PyObject> {
+        self.exprs
+            .iter()
+            .map(|(_, expr)| expr.clone_ref(py))
+            .collect()
+    }
+
+    fn __repr__(&self, py: Python) -> PyResult<String> {
+        let fields = (0..self.layout.len())
+            .map(|index| Ok(self.get(py, index)?.bind(py).repr()?.to_string()))
+            .collect::<PyResult<Vec<_>>>()?;
+        Ok(format!("TrgFields([{}])", fields.join(", ")))
+    }
+}
@@ -4,6 +4,10 @@ use pyo3::exceptions::PyNotImplementedError;
 use pyo3::{intern, IntoPyObjectExt};
 use pyo3::prelude::*;
 use pyo3::types::PyNone;
+use std::sync::atomic::{AtomicUsize, Ordering};
+
+/// Number of EUDObjects created so far
+static OBJECT_COUNTER: AtomicUsize = AtomicUsize::new(0);
 
 /// Class for standalone object on memory
 ///
@@ -27,6 +31,7 @@ pub struct PyEUDObject;
 impl PyEUDObject {
     #[new]
     fn new(py: Python) -> PyResult<(Self, PyConstExpr)> {
+        OBJECT_COUNTER.fetch_add(1, Ordering::Relaxed);
         let expr = ConstExpr::new(PyNone::get(py).into_py_any(py)?, 0, 4);
         Ok((Self {}, PyConstExpr(expr)))
     }
@@ -35,7 +40,8 @@ impl PyEUDObject {
     ///
     /// Dynamically constructed EUDObject may have their dependency list
     /// generated during object construction. So their dependency list is
-    /// re-examined before allocation phase.
+    /// re-examined before allocation phase, whenever their GetDataSize has
+    /// changed since the last examination.
     #[allow(non_snake_case)]
     fn DynamicConstructed(&self) -> bool {
         false
@@ -78,9 +84,15 @@ impl PyEUDObject {
     }
 }
 
+/// Number of EUDObjects created so far.
+#[pyfunction]
+fn get_object_counter() -> usize {
+    OBJECT_COUNTER.load(Ordering::Relaxed)
+}
+
 #[pymodule]
 #[pyo3(name = "eudobj")]
 pub(crate) mod eudobj_mod {
     #[pymodule_export]
-    use super::PyEUDObject;
+    use super::{get_object_counter, PyEUDObject};
 }
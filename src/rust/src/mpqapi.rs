@@ -1,14 +1,92 @@
 use eudplib_stormlib::{Archive, OpenArchiveFlags};
-use pyo3::exceptions::PyOSError;
+use pyo3::create_exception;
+use pyo3::exceptions::{PyOSError, PyValueError};
+use pyo3::intern;
 use pyo3::prelude::*;
+use pyo3::types::{PyByteArray, PyString};
 use std::borrow::Cow;
 use std::fs;
-use std::io::Write;
-use tempfile;
+
+create_exception!(mpqapi, MPQFileError, PyOSError);
+
+/// MPQFileError for `archived_name`, which is kept as its attribute.
+fn file_error(py: Python, archived_name: &str, reason: impl std::fmt::Display) -> PyErr {
+    let err = MPQFileError::new_err(format!("{archived_name}: {reason}"));
+    match err.value(py).setattr(intern!(py, "archived_name"), archived_name) {
+        Ok(()) => err,
+        Err(e) => e,
+    }
+}
 
 /// Class for general expression with rlocints.
 #[pyclass(unsendable, name = "MPQ", module = "eudplib.core.mapdata.mpqapi")]
-pub struct PyMPQ(pub(crate) Archive);
+pub struct PyMPQ {
+    /// None once closed
+    archive: Option<Archive>,
+    /// Uncompressed size of replaced files, left as holes in the archive
+    stale_size: u64,
+}
+
+impl PyMPQ {
+    fn new(archive: Archive) -> Self {
+        Self {
+            archive: Some(archive),
+            stale_size: 0,
+        }
+    }
+
+    fn archive(&mut self) -> PyResult<&mut Archive> {
+        self.archive
+            .as_mut()
+            .ok_or_else(|| PyValueError::new_err("I/O operation on closed archive"))
+    }
+
+    /// Account for the file that adding `archived_name` would replace.
+    fn check_replace(&mut self, archived_name: &str, replace_existing: bool) -> PyResult<()> {
+        if replace_existing && self.archive()?.has_file(archived_name)? {
+            let size = self.archive()?.open_file(archived_name)?.get_size()?;
+            self.stale_size += size;
+        }
+        Ok(())
+    }
+
+    fn add_data(
+        &mut self,
+        archived_name: &str,
+        data: &[u8],
+        replace_existing: bool,
+    ) -> PyResult<()> {
+        self.check_replace(archived_name, replace_existing)?;
+        Ok(self
+            .archive()?
+            .add_file_from_bytes(data, archived_name, replace_existing)?)
+    }
+}
+
+/// Content of a file to add, or path to the file on disk
+enum FileSource<'a> {
+    Path(String),
+    Data(Cow<'a, [u8]>),
+}
+
+/// Files on disk read at once in `add_files` are bounded by this size.
+const READ_BATCH_SIZE: u64 = 64 << 20;
+
+/// Read files on disk, spread across threads.
+fn read_paths(paths: &[&str]) -> Vec<std::io::Result<Vec<u8>>> {
+    let threads = std::thread::available_parallelism().map_or(1, |n| n.get());
+    let chunk_size = ((paths.len() + threads - 1) / threads).max(1);
+    std::thread::scope(|s| {
+        let handles: Vec<_> = paths
+            .chunks(chunk_size)
+            .map(|chunk| s.spawn(move || chunk.iter().map(fs::read).collect::<Vec<_>>()))
+            .collect();
+        handles
+            .into_iter()
+            .flat_map(|handle| handle.join().expect("reading thread panicked"))
+            .collect()
+    })
+}
 
 #[pymethods]
 impl PyMPQ {
@@ -16,26 +94,40 @@ impl PyMPQ {
     #[staticmethod]
     fn open(path: &str) -> PyResult<Self> {
         let archive = Archive::open(path, OpenArchiveFlags::empty())?;
-        Ok(Self(archive))
+        Ok(Self::new(archive))
     }
 
     #[staticmethod]
     #[pyo3(signature = (path, sector_size=3, file_count=1024))]
     fn create(path: &str, sector_size: u32, file_count: u32) -> PyResult<Self> {
         let archive = Archive::create(path, sector_size, file_count)?;
-        Ok(Self(archive))
+        Ok(Self::new(archive))
     }
 
     fn get_file_names_from_listfile(&mut self) -> PyResult<Vec<String>> {
-        let listfile = String::from_utf8(self.0.open_file("(listfile)")?.read_all()?)?;
+        let listfile = String::from_utf8(self.archive()?.open_file("(listfile)")?.read_all()?)?;
         Ok(listfile.lines().map(|line| line.to_string()).collect())
     }
 
     fn extract_file(&mut self, file_path: &str) -> PyResult<Cow<[u8]>> {
-        let mut file = self.0.open_file(file_path)?;
+        let mut file = self.archive()?.open_file(file_path)?;
         Ok(file.read_all()?.into())
     }
 
+    /// Extract file into bytearray, resizing it to the file size.
+    fn extract_into(
+        &mut self,
+        file_path: &str,
+        buffer: &Bound<'_, PyByteArray>,
+    ) -> PyResult<usize> {
+        let mut file = self.archive()?.open_file(file_path)?;
+        buffer.resize(file.get_size()? as usize)?;
+        // Safety: buffer is neither resized nor read by Python while reading
+        let read = file.read_into(unsafe { buffer.as_bytes_mut() })?;
+        buffer.resize(read)?;
+        Ok(read)
+    }
+
     #[pyo3(signature = (archived_name, file_path, replace_existing=true))]
     fn add_file(
         &mut self,
@@ -43,54 +135,156 @@ impl PyMPQ {
         file_path: &str,
         replace_existing: bool,
     ) -> PyResult<()> {
+        self.check_replace(archived_name, replace_existing)?;
         Ok(self
-            .0
+            .archive()?
             .add_file(file_path, archived_name, replace_existing)?)
     }
 
+    #[pyo3(signature = (archived_name, data, replace_existing=true))]
+    fn add_file_from_bytes(
+        &mut self,
+        archived_name: &str,
+        data: Cow<'_, [u8]>,
+        replace_existing: bool,
+    ) -> PyResult<()> {
+        self.add_data(archived_name, &data, replace_existing)
+    }
+
+    /// Add files in bulk.
+    ///
+    /// Hash table is resized once to hold `file_count` files. Files on disk
+    /// are read in parallel, in batches of about `READ_BATCH_SIZE` bytes, and
+    /// each batch is written one after another before the next is read.
+    ///
+    /// Errors on a file are raised as MPQFileError with its archived_name.
+    #[pyo3(signature = (files, file_count=0, replace_existing=true))]
+    fn add_files(
+        &mut self,
+        py: Python,
+        files: Vec<(String, Bound<'_, PyAny>)>,
+        file_count: u32,
+        replace_existing: bool,
+    ) -> PyResult<()> {
+        let file_count = file_count.max(files.len() as u32);
+        if self.archive()?.get_max_file_count() < file_count {
+            // same as max(1024, 1 << file_count.bit_length())
+            let max_count = (1u32 << (32 - file_count.leading_zeros())).max(1024);
+            self.archive()?.set_max_file_count(max_count)?;
+        }
+
+        let mut sources = Vec::with_capacity(files.len());
+        for (_, path_or_content) in &files {
+            sources.push(if path_or_content.is_instance_of::<PyString>() {
+                FileSource::Path(path_or_content.extract()?)
+            } else {
+                FileSource::Data(path_or_content.extract::<Cow<[u8]>>()?)
+            });
+        }
+        let mut start = 0;
+        while start < files.len() {
+            // take files until paths to read reach READ_BATCH_SIZE,
+            // a file larger than that is read alone
+            let mut end = start;
+            let mut batch_size = 0;
+            let mut paths = Vec::new();
+            while end < files.len() && (paths.is_empty() || batch_size < READ_BATCH_SIZE) {
+                if let FileSource::Path(path) = &sources[end] {
+                    batch_size += fs::metadata(path).map_or(0, |meta| meta.len());
+                    paths.push(path.as_str());
+                }
+                end += 1;
+            }
+            let mut contents = py.allow_threads(|| read_paths(&paths)).into_iter();
+
+            for ((archived_name, _), source) in files[start..end].iter().zip(&sources[start..end])
+            {
+                let loaded;
+                let data: &[u8] = match source {
+                    FileSource::Path(path) => {
+                        loaded = contents.next().expect("missing file content").map_err(|e| {
+                            file_error(py, archived_name, format!("Cannot read {path}: {e}"))
+                        })?;
+                        &loaded
+                    }
+                    FileSource::Data(data) => data,
+                };
+                self.add_data(archived_name, data, replace_existing)
+                    .map_err(|e| file_error(py, archived_name, e))?;
+            }
+            start = end;
+        }
+        Ok(())
+    }
+
+    /// Copy file from another archive, without going through the disk.
+    #[pyo3(signature = (source, archived_name, replace_existing=true))]
+    fn copy_file_from(
+        &mut self,
+        mut source: PyRefMut<'_, Self>,
+        archived_name: &str,
+        replace_existing: bool,
+    ) -> PyResult<()> {
+        let data = source.archive()?.open_file(archived_name)?.read_all()?;
+        self.add_data(archived_name, &data, replace_existing)
+    }
+
     #[staticmethod]
     fn set_file_locale(file_locale: u32) {
         Archive::set_file_locale(file_locale);
     }
 
-    fn get_max_file_count(&mut self) -> u32 {
-        self.0.get_max_file_count()
+    fn get_max_file_count(&mut self) -> PyResult<u32> {
+        Ok(self.archive()?.get_max_file_count())
     }
 
     fn set_max_file_count(&mut self, count: u32) -> PyResult<()> {
-        Ok(self.0.set_max_file_count(count)?)
+        Ok(self.archive()?.set_max_file_count(count)?)
+    }
+
+    /// Uncompressed size of files replaced since the archive was opened.
+    ///
+    /// Replaced files leave their blocks behind until the archive is compacted.
+    #[getter]
+    fn stale_size(&self) -> u64 {
+        self.stale_size
     }
 
     fn compact(&mut self) -> PyResult<()> {
-        Ok(self.0.compact()?)
+        self.archive()?.compact()?;
+        self.stale_size = 0;
+        Ok(())
+    }
+
+    /// Flush and close the archive. Closing twice is allowed.
+    fn close(&mut self) {
+        self.archive = None;
     }
 
+    /// Copy archive with another sector size, leaving out `exclude` files.
     #[staticmethod]
+    #[pyo3(signature = (input_path, output_path, sector_size, exclude=Vec::new()))]
     fn clone_with_sector_size(
         input_path: &str,
         output_path: &str,
         sector_size: u32,
+        exclude: Vec<String>,
     ) -> PyResult<Self> {
         let mut input = Archive::open(input_path, OpenArchiveFlags::empty())?;
         let file_count = input.get_max_file_count();
         let listfile = String::from_utf8(input.open_file("(listfile)")?.read_all()?)?;
         let mut output = Archive::create(output_path, sector_size, file_count)?;
         for archived_file in listfile.lines() {
-            let temp_path = {
-                let mut file = input.open_file(archived_file)?;
-                let mut tmpfile = tempfile::NamedTempFile::with_prefix("tmp")?;
-                tmpfile.write_all(&file.read_all()?)?;
-                tmpfile.into_temp_path().keep().map_err(|e| {
-                    PyOSError::new_err(format!(
-                        "Persisting a temporary file path fails: {:?}",
-                        e.path
-                    ))
-                })?
-            };
-            output.add_file(&temp_path, &archived_file, true)?;
-            fs::remove_file(temp_path)?;
+            if exclude
+                .iter()
+                .any(|name| name.eq_ignore_ascii_case(archived_file))
+            {
+                continue;
+            }
+            let data = input.open_file(archived_file)?.read_all()?;
+            output.add_file_from_bytes(&data, archived_file, true)?;
         }
-        Ok(Self(output))
+        Ok(Self::new(output))
     }
 }
 
@@ -98,5 +292,5 @@ impl PyMPQ {
 #[pyo3(name = "mpqapi")]
 pub(crate) mod mpqapi_mod {
     #[pymodule_export]
-    use super::PyMPQ;
+    use super::{MPQFileError, PyMPQ};
 }
@@ -1,4 +1,5 @@
 # TEST HELPER
+import contextlib as _contextlib
 import functools
 import os as _os
 import random as _random
@@ -13,6 +14,9 @@ from eudplib import *
 from eudplib.collections.eudarray import _use_ptr_array
 from eudplib.utils.etc import _allow_epd_on_epd
 from eudplib.eudlib.utilf.datadumper import _add_datadumper
+from eudplib.bindings._rust import allocator as _allocator
+from eudplib.core.allocator import payload as _payload
+from eudplib.core.variable import vbuf as _vbuf
 
 _allow_epd_on_epd(False)
 _testFailed = EUDLightVariable()
@@ -140,6 +144,35 @@ class expect_eperror(expect_error):
         super().__init__(EPError)
 
 
+@_contextlib.contextmanager
+def isolated_payload():
+    """CreatePayload inside test, apart from payload of test map.
+
+    Payload options set inside are restored on exit.
+    """
+    names = (
+        "_payload_builder",
+        "_found_objects_dict",
+        "_payload_record",
+        "_payload_cache",
+        "_payload_optimize",
+        "_payload_eliminate",
+        "_profile_build",
+        "_build_profile",
+    )
+    saved = {name: getattr(_payload, name) for name in names}
+    saved_vbuf = _vbuf._evb, _vbuf._ecvb
+    _payload._payload_builder = _allocator.PayloadBuilder()
+    _vbuf._register_new_varbuffer()
+    _vbuf._register_new_custom_varbuffer()
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(_payload, name, value)
+        _vbuf._evb, _vbuf._ecvb = saved_vbuf
+
+
 ###############################################################
 # Performance testing helper
 ###############################################################
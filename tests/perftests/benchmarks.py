@@ -0,0 +1,74 @@
+from helper import *
+
+a, b = EUDVariable(1234567), EUDVariable(89)
+index = EUDVariable(5)
+epd = EUDVariable(EPD(0x58A364))
+src_db, dst_db, str_db = Db(64), Db(64), Db(128)
+arr = EUDArray(16)
+varr = EUDVArray(16)()
+
+
+def bench_add():
+    a + b
+
+
+def bench_mul():
+    f_mul(a, b)
+
+
+def bench_div():
+    f_div(a, b)
+
+
+def bench_dwread_epd():
+    f_dwread_epd(epd)
+
+
+def bench_memcpy():
+    f_memcpy(dst_db, src_db, 64)
+
+
+def bench_switch():
+    EUDSwitch(b)
+    for case in range(8):
+        if EUDSwitchCase()(case * 11 + 1):
+            a.__iadd__(case)
+            EUDBreak()
+    EUDEndSwitch()
+
+
+def bench_array_get():
+    arr[index]
+
+
+def bench_array_set():
+    arr[index] = a
+
+
+def bench_varray_get():
+    varr[index]
+
+
+def bench_varray_set():
+    varr[index] = a
+
+
+def bench_dbstr_print():
+    f_dbstr_print(str_db, "value: ", a, " / ", b)
+
+
+# (name, emitter) pairs. Each emitter emits code for one call; see
+# test_benchmark.py for how trigger costs are measured.
+benchmarks = [
+    ("Addition", bench_add),
+    ("Multiplication", bench_mul),
+    ("Division", bench_div),
+    ("f_dwread_epd", bench_dwread_epd),
+    ("f_memcpy (64 bytes)", bench_memcpy),
+    ("EUDSwitch (8 cases)", bench_switch),
+    ("EUDArray get", bench_array_get),
+    ("EUDArray set", bench_array_set),
+    ("EUDVArray get", bench_varray_get),
+    ("EUDVArray set", bench_varray_set),
+    ("f_dbstr_print", bench_dbstr_print),
+]
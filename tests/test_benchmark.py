@@ -0,0 +1,142 @@
+"""Trigger-cost benchmark suite, run without StarCraft.
+
+For each benchmark in perftests/benchmarks.py, records static cost of one
+call (triggers and actions emitted) and its executed cost (triggers,
+conditions and actions evaluated by the trigger emulator), then compares
+them against perftests/benchmark_baseline.json.
+
+    python test_benchmark.py           # exit code 1 on regression
+    python test_benchmark.py --update  # rewrite baseline
+    python test_benchmark.py --optimize  # with OptimizeTriggers(True)
+"""
+
+# ruff: noqa: I001
+
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from helper import *
+from perftests.benchmarks import benchmarks
+
+from eudplib.collections.eudarray import EUDArrayData
+from eudplib.core.emulator import TriggerEmulator
+from eudplib.core.rawtrigger import rawtriggerdef
+
+BASELINE = os.path.join(
+    os.path.dirname(__file__), "perftests", "benchmark_baseline.json"
+)
+
+
+@contextmanager
+def _emitted_triggers():
+    triggers = []
+    register = rawtriggerdef._register_trigger
+
+    def _register(trg):
+        triggers.append(trg)
+        register(trg)
+
+    rawtriggerdef._register_trigger = _register
+    try:
+        yield triggers
+    finally:
+        rawtriggerdef._register_trigger = register
+
+
+def _build(emitter):
+    # Warm up: compile EUDFuncs outside of measured chain
+    PushTriggerScope()
+    emitter()
+    PopTriggerScope()
+
+    PushTriggerScope()
+    entry = NextTrigger()
+    with _emitted_triggers() as triggers:
+        emitter()
+    RawTrigger()  # end of chain; nextptr becomes 0
+    PopTriggerScope()
+
+    return entry, {
+        "triggers": len(triggers),
+        "actions": sum(len(trg._actions) for trg in triggers),
+    }
+
+
+def measure(optimize=False):
+    LoadMap("outputmap/basemap/basemap_strx.scx")
+    CompressPayload(True)
+    ShufflePayload(False)
+    OptimizeTriggers(optimize)
+
+    entries, results = [], {}
+    for name, emitter in benchmarks:
+        entry, results[name] = _build(emitter)
+        entries.append(entry)
+
+    # Root object is placed at payload offset 0
+    emulator = TriggerEmulator(CreatePayload(EUDArrayData(entries)))
+    for i, name in enumerate(results):
+        stats = emulator.run(emulator.read_dword(emulator.base + 4 * i))
+        results[name]["executed_triggers"] = stats.triggers
+        results[name]["executed_conditions"] = stats.conditions
+        results[name]["executed_actions"] = stats.actions
+    return results
+
+
+def compare(results, baseline):
+    tolerance = baseline.get("tolerance", 0.0)
+    regressions = []
+    for name, metrics in results.items():
+        expected = baseline["benchmarks"].get(name)
+        if expected is None:
+            print(f" - [ NEW] {name}: {metrics}")
+            continue
+        for key, value in metrics.items():
+            limit = expected.get(key, value) * (1 + tolerance)
+            if value > limit:
+                regressions.append(f"{name}: {key} {expected[key]} -> {value}")
+            elif value < expected.get(key, value):
+                print(f" - [FAST] {name}: {key} {expected[key]} -> {value}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--update", action="store_true", help="rewrite baseline")
+    parser.add_argument(
+        "--optimize", action="store_true", help="enable OptimizeTriggers"
+    )
+    args = parser.parse_args()
+
+    results = measure(args.optimize)
+    for name, metrics in results.items():
+        print(f"{name:>24}: " + ", ".join(f"{k}={v}" for k, v in metrics.items()))
+
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding="utf-8") as file:
+            baseline = json.load(file)
+    elif args.update:
+        baseline = {"tolerance": 0.0, "benchmarks": {}}
+    else:
+        print(f" - [FAIL] Baseline {BASELINE} not found; run with --update")
+        sys.exit(1)
+
+    if args.update:
+        baseline["benchmarks"] = results
+        with open(BASELINE, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2, ensure_ascii=False)
+            file.write("\n")
+        print(f"Baseline written to {BASELINE}")
+        return
+
+    regressions = compare(results, baseline)
+    for regression in regressions:
+        print(f" - [FAIL] {regression}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -66,6 +66,16 @@ from unittests import (
     test_scdata,
     test_unitgroup,
     testcondition,
+    test_trgfields,
+    test_payload_reloc,
+    test_emulator,
+    test_inline,
+    test_usage_report,
+    test_tbl,
+    test_eps_cache,
+    test_eps_prefetch,
+    test_peephole,
+    test_liveness,
 )
 # fmt: on
 
@@ -0,0 +1,135 @@
+import struct
+
+from helper import *
+
+from eudplib.core.allocator.pbuffer import Payload
+from eudplib.core.emulator import TriggerEmulator
+
+_EUDX = 0x4353
+# trigger addresses, EPD-aligned
+_A, _B, _C, _D = 0x600000, 0x601000, 0x602000, 0x603000
+_MARKER = 100  # EPD of marker dword
+
+
+def _epd(address):
+    return (address - 0x58A364) // 4
+
+
+def _cond(condtype, player, comparison, amount, *, mask=0, flags=0, eudx=0):
+    return struct.pack(
+        "<IIIHBBBBH", mask, player, amount, 0, comparison, condtype, 0, flags, eudx
+    )
+
+
+def _act(acttype, player, modifier, amount, *, mask=0, flags=0, eudx=0):
+    return struct.pack(
+        "<IIIIIIHBBBBH",
+        *(mask, 0, 0, 0, player, amount, 0),
+        *(acttype, modifier, flags, 0, eudx),
+    )
+
+
+def _put(emulator, address, data):
+    for i, (dword,) in enumerate(struct.iter_unpack("<I", data)):
+        emulator.write_dword(address + 4 * i, dword)
+
+
+def _trigger(emulator, node, nextptr, conds=(), acts=(), flags=4):
+    emulator.write_dword(node + 4, nextptr)
+    for i, cond in enumerate(conds):
+        _put(emulator, node + 8 + 20 * i, cond)
+    for i, act in enumerate(acts):
+        _put(emulator, node + 8 + 320 + 32 * i, act)
+    emulator.write_dword(node + 8 + 320 + 2048, flags)
+
+
+def _emulator():
+    return TriggerEmulator(Payload(b"", [], []))
+
+
+def _marker(emulator):
+    return emulator.read_dword(0x58A364 + 4 * _MARKER)
+
+
+@TestInstance
+def test_emulator():
+    # SetMemoryX SetTo/Add only change masked bits
+    emulator = _emulator()
+    emulator.write_dword(0x58A364, 0x12345678)
+    _trigger(
+        emulator,
+        _A,
+        0,
+        acts=[
+            _act(45, 0, 7, 0xFFFF0000, mask=0x00FF00FF, eudx=_EUDX),
+            _act(45, 0, 8, 0x00000100, mask=0x0000FF00, eudx=_EUDX),
+        ],
+    )
+    emulator.run(_A)
+    test_assert("Emulator SetMemoryX", emulator.read_dword(0x58A364) == 0x12FF5700)
+
+    # DeathsX compares masked value
+    emulator = _emulator()
+    emulator.write_dword(0x58A364, 0x12FF5600)
+    mark = _act(45, _MARKER, 8, 1)
+    cond = _cond(15, 0, 10, 0xFF0000, mask=0xFF0000, eudx=_EUDX)
+    _trigger(emulator, _A, _B, [cond], [mark])
+    cond = _cond(15, 0, 10, 0x12FF5600, mask=0xFF, eudx=_EUDX)
+    _trigger(emulator, _B, 0, [cond], [mark])
+    emulator.run(_A)
+    test_assert("Emulator DeathsX", _marker(emulator) == 1)
+
+    # Subtract saturates at 0
+    emulator = _emulator()
+    emulator.write_dword(0x58A364, 5)
+    _trigger(emulator, _A, 0, acts=[_act(45, 0, 9, 10)])
+    emulator.run(_A)
+    test_assert("Emulator Subtract saturation", emulator.read_dword(0x58A364) == 0)
+
+    # CurrentPlayer resolves to player of run
+    emulator = _emulator()
+    _trigger(
+        emulator,
+        _A,
+        _B,
+        [_cond(15, 13, 10, 0)],
+        [_act(45, 13, 7, 7), _act(45, _MARKER, 8, 1)],
+    )
+    _trigger(emulator, _B, 0, [_cond(15, 3, 10, 7)], [_act(45, _MARKER, 8, 1)])
+    emulator.run(_A, player=3)
+    test_equality(
+        "Emulator CurrentPlayer",
+        [emulator.read_dword(0x58A364 + 4 * 3), _marker(emulator)],
+        [7, 2],
+    )
+
+    # Trigger is disabled after run, unless preserved by flag or action
+    emulator = _emulator()
+    _trigger(emulator, _A, _B, acts=[_act(45, _MARKER, 8, 1)], flags=0)
+    acts = [_act(3, 0, 0, 0), _act(45, _MARKER, 8, 10)]  # PreserveTrigger
+    _trigger(emulator, _B, _C, acts=acts, flags=0)
+    _trigger(
+        emulator,
+        _C,
+        0,
+        [_cond(13, 0, 0, 0, flags=2)],  # disabled Never
+        [_act(45, _MARKER, 8, 100), _act(45, _MARKER, 8, 1000, flags=2)],
+    )
+    emulator.run(_A)
+    emulator.run(_A)
+    test_equality(
+        "Emulator disabled/preserve flags",
+        [_marker(emulator), emulator.read_dword(_A + 2376) & 8],
+        [221, 8],
+    )
+
+    # SetNextPtr jumps over C to D
+    emulator = _emulator()
+    _trigger(emulator, _A, _B, acts=[_act(45, _epd(_B + 4), 7, _D)])
+    _trigger(emulator, _B, _C)
+    _trigger(emulator, _C, 0, acts=[_act(45, _MARKER, 8, 100)])
+    _trigger(emulator, _D, 0, acts=[_act(45, _MARKER, 8, 1)])
+    stats = emulator.run(_A)
+    test_equality(
+        "Emulator SetNextPtr", [_marker(emulator), stats.triggers], [1, 3]
+    )
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+
+from helper import *
+
+from eudplib.epscript import epscompile
+from eudplib.epscript.epsimp import EPSLoader, _epc_header, _load_cached_code
+
+_SOURCE = b"function cached() {\n    return 1;\n}\n"
+
+
+def _is_cached(path, source):
+    return _load_cached_code(path, _epc_header(path, source)) is not None
+
+
+@TestInstance
+def test_eps_cache():
+    tmpdir = tempfile.mkdtemp()
+    state = epscompile._get_compiler_state()
+    try:
+        path = os.path.join(tmpdir, "cached.eps")
+        with open(path, "wb") as file:
+            file.write(_SOURCE)
+        loader = EPSLoader("cached", path)
+        compiled = []
+        compile_eps = loader._compile
+
+        def _compile(path, file_data):
+            compiled.append(path)
+            return compile_eps(path, file_data)
+
+        loader._compile = _compile
+        loader.get_code("cached")
+        loader.get_code("cached")
+        test_assert(
+            "epScript cache hit",
+            len(compiled) == 1
+            and os.path.isfile(os.path.join(tmpdir, "__epspy__", "cached.epc")),
+        )
+
+        test_assert(
+            "epScript cache stale on source change",
+            _is_cached(path, _SOURCE) and not _is_cached(path, _SOURCE + b"\n"),
+        )
+
+        registered, debug_mode = state
+        globals_ = registered.get("globals", b"") + b"_eps_cache_test\0"
+        changed = {**registered, "globals": globals_}
+        epscompile._set_compiler_state(changed, debug_mode)
+        test_assert(
+            "epScript cache stale on registered globals change",
+            not _is_cached(path, _SOURCE),
+        )
+        epscompile._set_compiler_state(registered, debug_mode)
+
+        EPS_SetDebug(not debug_mode)
+        test_assert(
+            "epScript cache stale on debug mode change",
+            not _is_cached(path, _SOURCE),
+        )
+    finally:
+        epscompile._set_compiler_state(*state)
+        shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,57 @@
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+from helper import *
+
+from eudplib.epscript.epsimp import EPSLoader
+
+_SOURCES = {
+    "prefetch_a": b"function prefetch_a() {\n    return 1;\n}\n",
+    "prefetch_b": b"function prefetch_b() {\n    return 2;\n}\n",
+    "prefetch_bad": b"function prefetch_bad( {\n",
+}
+
+
+def _not_cached(self, path, file_data):
+    raise EPError(f"{path} is not served from cache")
+
+
+@TestInstance
+def test_eps_prefetch():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for name, source in _SOURCES.items():
+            with open(os.path.join(tmpdir, name + ".eps"), "wb") as file:
+                file.write(source)
+        # Unittest is not under __main__ guard, so compile in this process
+        failed = EPSPrefetch(tmpdir, max_workers=1)
+        test_assert(
+            "EPSPrefetch reports failed compile",
+            [os.path.basename(path) for path in failed] == ["prefetch_bad.eps"],
+        )
+        test_assert(
+            "EPSPrefetch writes cache",
+            all(
+                os.path.isfile(os.path.join(tmpdir, "__epspy__", name + ".epc"))
+                for name in ("prefetch_a", "prefetch_b")
+            ),
+        )
+
+        sys.path.insert(0, tmpdir)
+        compile_eps = EPSLoader._compile
+        EPSLoader._compile = _not_cached
+        try:
+            module = importlib.import_module("prefetch_a")
+            served = hasattr(module, "prefetch_a")
+        except EPError:
+            served = False
+        finally:
+            EPSLoader._compile = compile_eps
+            sys.path.remove(tmpdir)
+            sys.modules.pop("prefetch_a", None)
+        test_assert("Import served from EPSPrefetch cache", served)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
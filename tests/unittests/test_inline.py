@@ -0,0 +1,43 @@
+from helper import *
+
+from eudplib.core.eudfunc import eudfuncn
+
+
+def _pick(a, b):
+    if EUDIf()(a == 0):
+        EUDReturn(b, 0)
+    EUDEndIf()
+    return a + b, a
+
+
+f_pick = EUDFunc(_pick)
+f_pick_inline = EUDFunc(inline="auto")(_pick)
+
+
+@EUDFunc(inline="auto")
+def f_counter():
+    counter = EUDVariable()
+    counter += 1
+    return counter
+
+
+@TestInstance
+def test_inline():
+    limit = eudfuncn._INLINE_TRIGGER_LIMIT
+    eudfuncn._INLINE_TRIGGER_LIMIT = 64
+    try:
+        x = EUDVariable(3)
+        results = []
+        for f in (f_pick, f_pick_inline):
+            for a, b in ((0, 5), (x, 5), (2, x)):
+                s, t = f(a, b)
+                results.extend((s, t))
+        expected = [5, 0, 8, 3, 5, 2]
+        test_equality("Inline EUDFunc", results, expected * 2)
+        test_assert("Inline EUDFunc expanded", f_pick_inline._inlineCalls == 3)
+
+        counts = [f_counter(), f_counter(), f_counter()]
+        test_equality("Stateful EUDFunc not inlined", counts, [1, 2, 3])
+        test_assert("Stateful EUDFunc called", f_counter._inlineCalls == 0)
+    finally:
+        eudfuncn._INLINE_TRIGGER_LIMIT = limit
@@ -0,0 +1,57 @@
+from helper import *
+
+from eudplib.core.emulator import TriggerEmulator
+from eudplib.core.variable.vbuf import get_current_varbuffer
+
+# Outside of payload, read back from emulator
+RESULT = 0x58A364 + 4 * 200
+
+
+@EUDFunc
+def _f_add1(x):
+    return x + 1
+
+
+def _liveness_program():
+    PushTriggerScope()
+    entry = NextTrigger()
+    _f_add1(1)  # return value never read
+    by_cond = _f_add1(2)
+    if EUDIf()(by_cond == 3):
+        DoActions(SetMemory(RESULT, Add, 1))
+    EUDEndIf()
+    by_vproc = _f_add1(3)
+    VProc(by_vproc, by_vproc.QueueAssignTo(EPD(RESULT) + 1))
+    by_unit = EUDVariable()
+    by_unit << 7
+    # Deaths reads EPD(player) + 12 * unit
+    if EUDIf()(Deaths(EPD(by_unit.getValueAddr()) - 12, Exactly, 7, 1)):
+        DoActions(SetMemory(RESULT, Add, 10))
+    EUDEndIf()
+    RawTrigger()  # end of chain; nextptr becomes 0
+    PopTriggerScope()
+    return entry
+
+
+def _emulate(root, eliminate):
+    with isolated_payload():
+        EliminateDeadVariables(eliminate)
+        emulator = TriggerEmulator(CreatePayload(root))
+        varbuffer_size = get_current_varbuffer().GetDataSize()
+    emulator.run()
+    return emulator, varbuffer_size
+
+
+@TestInstance
+def test_liveness():
+    root = _liveness_program()
+    before, before_size = _emulate(root, False)
+    after, after_size = _emulate(root, True)
+    # Variables read by condition, VProc and Deaths unit offset are kept
+    test_assert(
+        "Dead variable elimination keeps emulated results",
+        before.read_dword(RESULT) == 11
+        and before.read_dword(RESULT + 4) == 4
+        and before._memory == after._memory,
+    )
+    test_assert("Dead variables removed", after_size < before_size)
@@ -0,0 +1,38 @@
+from helper import *
+
+from eudplib.maprw.injector.payload_reloc import (
+    _relocate_runs,
+    _relocate_singles,
+    plan_relocation,
+)
+
+
+def _expand(runs, singles):
+    epds = list(singles)
+    for start, stride, count in zip(runs[::3], runs[1::3], runs[2::3]):
+        epds.extend(start + stride * k for k in range(count))
+    return sorted(epds)
+
+
+@TestInstance
+def test_payload_reloc():
+    table = [400, 0, 4, 8, 12, 40, 48, 56, 100, 104, 200]
+    runs, singles = plan_relocation(table)
+    test_assert(
+        "plan_relocation runs",
+        list(runs) == [0, 1, 4, 10, 2, 3] and list(singles) == [25, 26, 50, 100],
+    )
+    test_assert(
+        "plan_relocation round-trip",
+        _expand(runs, singles) == sorted(offset // 4 for offset in table),
+    )
+
+    relocated = Db(4 * 102)
+    _relocate_runs(relocated, runs, 7)
+    _relocate_singles(relocated, singles, 7)
+    epds = [0, 3, 10, 14, 25, 26, 50, 100, 4, 11, 101]
+    test_equality(
+        "Relocate runs and singles",
+        [f_dwread_epd(EPD(relocated) + epd) for epd in epds],
+        [7] * 8 + [0] * 3,
+    )
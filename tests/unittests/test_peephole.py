@@ -0,0 +1,93 @@
+from helper import *
+
+from eudplib.core.allocator.peephole import _jump_target, optimize_triggers
+from eudplib.core.emulator import TriggerEmulator
+
+# Outside of payload, read back from emulator
+RESULT = 0x58A364 + 4 * 200
+
+
+def _optimize(*triggers):
+    return optimize_triggers(list(triggers), triggers[0])
+
+
+def _program():
+    PushTriggerScope()
+    entry = NextTrigger()
+    i, total = EUDVariable(), EUDVariable()
+    if EUDWhile()(i <= 9):
+        if EUDIf()(i >= 5):
+            total += i
+        if EUDElse()():
+            total += 10
+        EUDEndIf()
+        i += 1
+    EUDEndWhile()
+    VProc(total, total.QueueAssignTo(EPD(RESULT)))
+    RawTrigger()  # end of chain; nextptr becomes 0
+    PopTriggerScope()
+    return entry
+
+
+def _emulate(root, optimize):
+    with isolated_payload():
+        OptimizeTriggers(optimize)
+        emulator = TriggerEmulator(CreatePayload(root))
+    return emulator, emulator.run()
+
+
+@TestInstance
+def test_peephole():
+    PushTriggerScope()
+    first = RawTrigger(actions=SetMemory(RESULT, Add, 1))
+    empty1 = RawTrigger()
+    empty2 = RawTrigger()
+    last = RawTrigger(
+        conditions=Memory(RESULT, AtLeast, 1), actions=SetMemory(RESULT, Add, 2)
+    )
+    PopTriggerScope()
+    test_assert(
+        "Peephole jump threading",
+        _optimize(first, empty1, empty2, last) > 0
+        and _jump_target(first._nextptr) is last,
+    )
+
+    PushTriggerScope()
+    first = RawTrigger(actions=SetMemory(RESULT, Add, 1))
+    second = RawTrigger(actions=SetMemory(RESULT, Add, 2))
+    last = RawTrigger(
+        conditions=Memory(RESULT, AtLeast, 1), actions=SetMemory(RESULT, Add, 4)
+    )
+    PopTriggerScope()
+    test_assert(
+        "Peephole merge",
+        _optimize(first, second, last) > 0
+        and len(first._actions) == 2
+        and not second._actions
+        and [act.actindex for act in first._actions] == [0, 1]
+        and _jump_target(first._nextptr) is last,
+    )
+
+    PushTriggerScope()
+    first = RawTrigger(actions=SetMemory(RESULT, Add, 1))
+    act = SetMemory(RESULT, Add, 2)
+    second = RawTrigger(actions=act)
+    patch = RawTrigger(actions=SetMemory(act + 20, SetTo, 5))
+    PopTriggerScope()
+    _optimize(first, second, patch)
+    test_assert(
+        "Peephole merge refused on modified action",
+        len(first._actions) == 1
+        and second._actions == [act]
+        and _jump_target(first._nextptr) is second,
+    )
+
+    root = _program()
+    before, before_stats = _emulate(root, False)
+    after, after_stats = _emulate(root, True)
+    test_assert(
+        "Peephole keeps emulated results",
+        before.read_dword(RESULT) == 85
+        and before._memory == after._memory
+        and after_stats.triggers <= before_stats.triggers,
+    )
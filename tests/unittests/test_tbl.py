@@ -0,0 +1,56 @@
+import struct
+
+from helper import *
+
+from eudplib.core.mapdata import tblformat
+from eudplib.core.mapdata.tblformat import TBL, _suffix_hosts
+
+
+def _offsets(tbldata):
+    (count,) = struct.unpack_from("<I", tbldata, 0)
+    return struct.unpack_from(f"<{count}I", tbldata, 4)
+
+
+def _strings(tbldata):
+    return [
+        tbldata[offset : tbldata.index(b"\0", offset)]
+        for offset in _offsets(tbldata)
+    ]
+
+
+@TestInstance
+def test_tbl():
+    strings = [b"abc", b"bc", b"c", b"xbc", b"abc"]
+    test_assert(
+        "Suffix hosts of nested suffixes and duplicates",
+        _suffix_hosts(strings, [False] * 5) == [4, 4, 4, 3, 4],
+    )
+    test_assert(
+        "Unshared string is not host",
+        _suffix_hosts(strings, [False] * 4 + [True]) == [0, 0, 0, 3, 4],
+    )
+
+    tbl = TBL()
+    tbl.AddString("abc")
+    tbl.AddString("bc")
+    tbl.AddString("c")
+    tbl.ForceAddString("bc")
+    tbl.AddString("abc")
+    share_suffix = tblformat._share_suffix
+    try:
+        ShareStringSuffix(False)
+        unshared = tbl.save_tbl()
+        ShareStringSuffix(True)
+        shared = tbl.save_tbl()
+    finally:
+        ShareStringSuffix(share_suffix)
+
+    expected = [b"abc", b"bc", b"c", b"bc", b"abc"]
+    test_assert("TBL strings without sharing", _strings(unshared) == expected)
+    test_assert("TBL strings with sharing", _strings(shared) == expected)
+    abc, bc, c, forced, dup = _offsets(shared)
+    test_assert(
+        "TBL offsets with sharing",
+        [bc, c, dup] == [abc + 1, abc + 2, abc] and not abc <= forced <= abc + 3,
+    )
+    test_assert("TBL shrinks with sharing", len(shared) < len(unshared))
@@ -0,0 +1,37 @@
+from helper import *
+
+
+@TestInstance
+def test_trgfields():
+    act = SetMemory(0x58A364, SetTo, -1)
+    test_assert("TrgFields keeps assigned int", act.fields[5] == -1)
+    test_assert(
+        "TrgFields slicing",
+        act.fields[:4] == [0, 0, 0, 0] and act.fields[7:9] == [45, 7],
+    )
+    test_assert("TrgFields negative step", act.fields[9:6:-1] == [20, 7, 45])
+
+    act.fields[5] = 0xFFFFFFFF
+    test_assert("TrgFields u32 max", act.fields[5] == 0xFFFFFFFF)
+    with expect_error(OverflowError):
+        SetMemory(0x58A364, SetTo, 2**32)
+    with expect_error(OverflowError):
+        Memory(0x58A364, AtLeast, -(2**31) - 1)
+
+    # Failed assignment leaves field untouched
+    expr = Forward()
+    act.fields[5] = expr
+    with expect_error(OverflowError):
+        act.fields[5] = 2**40
+    test_assert("TrgFields validates first", act.fields[5] is expr)
+    expr << 0
+
+    # Integers are decoded from packed bytes
+    act.fields[5] = -5
+    act.fields[6] = -2
+    test_assert(
+        "TrgFields sign-aware decoding",
+        act.fields[5:7] == [-5, -2] and not act.fields.exprs(),
+    )
+    act.fields[6] = 0xFFFE
+    test_assert("TrgFields u16 max", act.fields[6] == 0xFFFE)
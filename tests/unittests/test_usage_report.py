@@ -0,0 +1,27 @@
+from helper import *
+
+
+@EUDFunc
+def _f_locals(x):
+    a, b = EUDVariable(), EUDVariable()
+    a << x
+    b << a + 1
+    return b
+
+
+@TestInstance
+def test_usage_report():
+    with isolated_payload():
+        PushTriggerScope()
+        root = NextTrigger()
+        _f_locals(1)
+        RawTrigger()  # end of chain; nextptr becomes 0
+        PopTriggerScope()
+        ProfileBuild(True)
+        CreatePayload(root)
+        functions = GetBuildProfile()["functions"]
+
+    usage = next(f for f in functions if f["name"].endswith("._f_locals"))
+    # argument, 2 locals, temporary and return value
+    test_assert("Variable slots of EUDFunc", usage["var_slots"] >= 3)
+    test_assert("Triggers of EUDFunc", usage["triggers"] > 0)